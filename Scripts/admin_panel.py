@@ -0,0 +1,453 @@
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+from Scripts.cafe_config import TOPUP_PACKAGES
+from Scripts.cafe_errors import CafeError
+from Scripts.cafe_metrics import timed
+from Scripts.cafe_model import set_if_changed
+
+
+class UserListView(tk.Frame):
+    """Virtualized member list for the admin panel's "All Users" tab.
+
+    Rows are inserted into the Treeview one page at a time as the list is
+    scrolled, so opening the tab costs the same for 100 or 100k members.
+    """
+
+    PAGE_SIZE = 200
+
+    COLUMNS = (
+        ("username", "Username", 150),
+        ("phone", "Phone", 120),
+        ("time", "Time (min)", 90),
+        ("points", "Points", 80),
+        ("status", "Status", 90),
+    )
+
+    def __init__(self, parent, controller):
+        super().__init__(parent, bg="white")
+        self.controller = controller
+
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in self.COLUMNS],
+                                 show="headings", selectmode="browse")
+        for column, heading, width in self.COLUMNS:
+            self.tree.heading(column, text=heading, command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=width, anchor="w")
+        self.tree.tag_configure("Approved", foreground="#27ae60")
+        self.tree.tag_configure("Pending", foreground="#e67e22")
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_scroll)
+
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.sort_column = None
+        self.sort_reverse = False
+        self.loading = False
+        self.matches = None  # Search results shown instead of everyone, if any
+        self.reset(list(controller.users))
+
+    def show_matches(self, usernames):
+        """Show only ``usernames`` (best match first), or everyone again for None"""
+        self.matches = usernames
+        self.sort_column = None
+        self.reset(list(self.controller.users) if usernames is None else list(usernames))
+        self.tree.yview_moveto(0)
+
+    def reset(self, usernames):
+        """Show ``usernames`` in order, materializing only the first page"""
+        self.tree.delete(*self.tree.get_children())
+        self.order = usernames
+        self.loaded = 0
+        self.load_more()
+
+    def load_more(self):
+        """Insert the next page of rows"""
+        self.loading = False
+        users = self.controller.users
+        end = min(self.loaded + self.PAGE_SIZE, len(self.order))
+        for username in self.order[self.loaded:end]:
+            info = users.get(username)
+            if info is not None:
+                self.tree.insert("", "end", iid=username,
+                                 values=self.row_values(username, info), tags=(info["status"],))
+        self.loaded = end
+
+    def row_values(self, username, info):
+        return (username, info.get("phone", ""), info["time"], info["points"], info["status"])
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Fetch the next page once the view gets close to the last loaded row
+        if float(last) > 0.9 and self.loaded < len(self.order) and not self.loading:
+            self.loading = True
+            self.after_idle(self.load_more)
+
+    def sort_by(self, column):
+        """Re-order by a column; clicking the same heading again reverses it"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            # Numbers read best largest first
+            self.sort_reverse = column in ("time", "points")
+
+        users = self.controller.users
+        if self.matches is not None:
+            usernames = sorted((u for u in self.matches if u in users),
+                               key=lambda u: u if column == "username" else users[u][column],
+                               reverse=self.sort_reverse)
+        elif column == "username":
+            usernames = sorted(users, reverse=self.sort_reverse)
+        else:
+            usernames = sorted(users, key=lambda u: users[u][column], reverse=self.sort_reverse)
+        self.reset(usernames)
+        self.tree.yview_moveto(0)
+
+    def update_user(self, username):
+        """Refresh one row in place, or drop it if the user was deleted"""
+        if not self.tree.exists(username):
+            return
+        info = self.controller.users.get(username)
+        if info is None:
+            self.tree.delete(username)
+        else:
+            self.tree.item(username, values=self.row_values(username, info), tags=(info["status"],))
+
+    def add_user(self, username):
+        """Append a new member to the end of the list"""
+        if self.matches is not None:
+            return  # Not part of the current search
+        self.order.append(username)
+        if self.loaded == len(self.order) - 1:
+            self.load_more()
+
+
+class PendingQueue(tk.Frame):
+    """Accounts waiting for a decision, with a filter and multi-select.
+
+    ``describe(key)`` gives a row's column values after the key. The
+    buttons hand the selected keys, or every key the filter shows, to
+    ``approve(keys)`` / ``reject(keys)`` in one call, so a whole event
+    night of sign-ups is one confirmation and one transaction.
+    """
+
+    FILTER_DELAY_MS = 150
+
+    def __init__(self, parent, columns, describe, approve, reject, noun):
+        super().__init__(parent, bg="white")
+        self.describe = describe
+        self.noun = noun
+        self.keys = {}   # key -> lowercase text the filter matches, in arrival order
+        self.shown = []  # Keys passing the filter, in tree order
+        self.filter_job = None
+
+        top = tk.Frame(self, bg="white")
+        top.pack(fill="x", pady=(0, 5))
+        tk.Label(top, text="Filter:", font=("Arial", 10), bg="white").pack(side="left")
+        self.filter_var = tk.StringVar()
+        tk.Entry(top, textvariable=self.filter_var, font=("Arial", 10), width=20).pack(side="left", padx=5)
+        self.filter_var.trace_add("write", self.filter_changed)
+        self.count_var = tk.StringVar()
+        tk.Label(top, textvariable=self.count_var, font=("Arial", 9), bg="white",
+                 fg="#7f8c8d").pack(side="left", padx=10)
+
+        buttons = tk.Frame(self, bg="white")
+        buttons.pack(side="bottom", fill="x", pady=(5, 0))
+        tk.Button(buttons, text="✓ Approve selected", command=lambda: approve(self.selected()),
+                  bg="#27ae60", fg="white", font=("Arial", 9, "bold"),
+                  cursor="hand2").pack(side="left", padx=5)
+        tk.Button(buttons, text="✓ Approve all shown", command=lambda: approve(list(self.shown)),
+                  bg="#1e8449", fg="white", font=("Arial", 9, "bold"),
+                  cursor="hand2").pack(side="left", padx=5)
+        tk.Button(buttons, text="✗ Reject selected", command=lambda: reject(self.selected()),
+                  bg="#e74c3c", fg="white", font=("Arial", 9, "bold"),
+                  cursor="hand2").pack(side="right", padx=5)
+
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in columns], show="headings",
+                                 selectmode="extended")
+        for column, heading, width in columns:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor="w")
+        scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.update_count())
+
+    def selected(self):
+        return list(self.tree.selection())
+
+    def needle(self):
+        return self.filter_var.get().strip().lower()
+
+    def add(self, key):
+        self.add_many([key])
+
+    def add_many(self, keys):
+        needle = self.needle()
+        for key in keys:
+            if key in self.keys:
+                continue
+            values = self.describe(key)
+            self.keys[key] = " ".join(str(v) for v in (key, *values)).lower()
+            if needle in self.keys[key]:
+                self.shown.append(key)
+                self.tree.insert("", "end", iid=key, values=(key, *values))
+        self.update_count()
+
+    def remove(self, keys):
+        gone = {k for k in keys if self.keys.pop(k, None) is not None}
+        if not gone:
+            return
+        self.tree.delete(*[k for k in gone if self.tree.exists(k)])
+        self.shown = [k for k in self.shown if k not in gone]
+        self.update_count()
+
+    def filter_changed(self, *args):
+        # Wait for a pause in typing before re-filtering
+        if self.filter_job is not None:
+            self.after_cancel(self.filter_job)
+        self.filter_job = self.after(self.FILTER_DELAY_MS, self.refilter)
+
+    def refilter(self):
+        self.filter_job = None
+        self.tree.delete(*self.tree.get_children())
+        needle = self.needle()
+        self.shown = [k for k, text in self.keys.items() if needle in text]
+        for key in self.shown:
+            self.tree.insert("", "end", iid=key, values=(key, *self.describe(key)))
+        self.update_count()
+
+    def update_count(self):
+        if not self.keys:
+            text = f"No pending {self.noun} approvals"
+        else:
+            text = f"{len(self.shown):,} of {len(self.keys):,} shown"
+            selected = len(self.tree.selection())
+            if selected:
+                text += f" · {selected:,} selected"
+        set_if_changed(self.count_var, text)
+
+
+class AdminPanel(tk.Toplevel):
+    """Admin dashboard window.
+
+    Rows are kept by username / admin ID so approvals and rejections only
+    touch the affected rows; the window, selected tab and scroll positions
+    are never rebuilt.
+    """
+
+    SEARCH_DELAY_MS = 150
+    SEARCH_LIMIT = 100
+
+    @timed("page.admin_panel")
+    def __init__(self, controller):
+        super().__init__(controller)
+        self.controller = controller
+        self.title("Admin Panel")
+        self.geometry("700x500")
+        self.resizable(False, False)
+        self.attributes('-topmost', True)
+        self.protocol("WM_DELETE_WINDOW", self.destroy)
+
+        tk.Label(self, text="Admin Dashboard", font=("Arial", 20, "bold")).pack(pady=(20, 5))
+        tk.Button(self, text="🍳 Kitchen Display", command=controller.show_kitchen_display,
+                  bg="#8e44ad", fg="white", font=("Arial", 10, "bold"),
+                  relief="flat", cursor="hand2").pack(pady=(0, 10))
+
+        # Tabs
+        self.tab_control = ttk.Notebook(self)
+
+        # Pending user approvals tab
+        pending_tab = tk.Frame(self.tab_control, bg="white")
+        self.tab_control.add(pending_tab, text="Pending Users")
+
+        tk.Label(pending_tab, text="Pending User Accounts",
+                font=("Arial", 14, "bold"), bg="white").pack(pady=15)
+
+        users = controller.users
+        self.pending_users = PendingQueue(
+            pending_tab, (("username", "Username", 200), ("phone", "Phone", 200)),
+            describe=lambda u: (users[u].get("phone", ""),),
+            approve=controller.approve_users, reject=controller.reject_users, noun="user")
+        self.pending_users.pack(pady=(0, 10), padx=20, fill="both", expand=True)
+        self.pending_users.add_many(users.by_status("Pending"))
+
+        # Pending admin approvals tab
+        pending_admin_tab = tk.Frame(self.tab_control, bg="white")
+        self.tab_control.add(pending_admin_tab, text="Pending Admins")
+
+        tk.Label(pending_admin_tab, text="Pending Admin Requests",
+                font=("Arial", 14, "bold"), bg="white").pack(pady=15)
+
+        requests = controller.pending_admins
+        self.pending_admins = PendingQueue(
+            pending_admin_tab, (("admin_id", "Admin ID", 200), ("name", "Name", 200)),
+            describe=lambda a: (requests[a]["name"],),
+            approve=controller.approve_admins, reject=controller.reject_admins, noun="admin")
+        self.pending_admins.pack(pady=(0, 10), padx=20, fill="both", expand=True)
+        self.pending_admins.add_many(list(requests))
+
+        # All users tab
+        users_tab = tk.Frame(self.tab_control, bg="white")
+        self.tab_control.add(users_tab, text="All Users")
+
+        tk.Label(users_tab, text="All User Accounts",
+                font=("Arial", 14, "bold"), bg="white").pack(pady=(15, 5))
+
+        search_row = tk.Frame(users_tab, bg="white")
+        search_row.pack(fill="x", padx=20)
+        tk.Label(search_row, text="Search:", font=("Arial", 10), bg="white").pack(side="left")
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(search_row, textvariable=self.search_var, font=("Arial", 10), width=24)
+        search_entry.pack(side="left", padx=5)
+        search_entry.bind("<Escape>", lambda e: self.search_var.set(""))
+        self.search_var.trace_add("write", self.search_changed)
+        self.search_job = None
+        self.search_status = tk.StringVar(value="Username or phone · click a heading to sort")
+        tk.Label(search_row, textvariable=self.search_status, font=("Arial", 9), bg="white",
+                 fg="#7f8c8d").pack(side="left", padx=10)
+
+        # Playtime bought at the counter; the ledger records which admin added it
+        topup_row = tk.Frame(users_tab, bg="white")
+        topup_row.pack(side="bottom", fill="x", padx=20, pady=(0, 10))
+        tk.Label(topup_row, text="Add paid playtime to the selected member:", font=("Arial", 9),
+                 bg="white").pack(side="left")
+        for code, package in TOPUP_PACKAGES.items():
+            tk.Button(topup_row, text=f"{package['name']} · ₱{package['price']}",
+                      command=lambda c=code: self.top_up(c), bg="#16a085", fg="white",
+                      font=("Arial", 9, "bold"), cursor="hand2", relief="flat").pack(side="left", padx=3)
+
+        # Only the visible pages of rows are ever built
+        self.users_list = UserListView(users_tab, controller)
+        self.users_list.pack(pady=10, padx=20, fill="both", expand=True)
+
+        # Reports tab; built the first time it is opened
+        self.reports_tab = tk.Frame(self.tab_control, bg="white")
+        self.tab_control.add(self.reports_tab, text="Reports")
+
+        top = tk.Frame(self.reports_tab, bg="white")
+        top.pack(fill="x", padx=20, pady=(15, 5))
+        tk.Label(top, text="Sales & Utilization", font=("Arial", 14, "bold"),
+                 bg="white").pack(side="left")
+        tk.Button(top, text="⟳ Refresh", command=self.show_report, bg="#3498db", fg="white",
+                  font=("Arial", 9, "bold"), relief="flat", cursor="hand2").pack(side="right")
+
+        self.report_text = tk.Text(self.reports_tab, font=("Courier", 10), bg="white",
+                                   relief="flat", wrap="none")
+        report_scroll = ttk.Scrollbar(self.reports_tab, orient="vertical",
+                                      command=self.report_text.yview)
+        self.report_text.configure(yscrollcommand=report_scroll.set)
+        report_scroll.pack(side="right", fill="y", pady=10)
+        self.report_text.pack(fill="both", expand=True, padx=(20, 0), pady=10)
+        self.report_shown = False
+        self.tab_control.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
+        self.tab_control.pack(expand=1, fill="both", padx=20, pady=10)
+
+        # Keep All Users rows in step with edits made anywhere in the app
+        self.subscription = controller.hub.subscribe(None, self.on_user_changed)
+
+        # Index members for substring search in the background, a chunk per idle turn
+        self.index_steps = controller.users.build_search_index()
+        self.index_job = self.after_idle(self.index_step)
+
+    def index_step(self):
+        self.index_job = None
+        if next(self.index_steps, None) is not None:
+            self.index_job = self.after(1, self.index_step)
+        elif self.search_var.get().strip():
+            self.run_search()  # Add the substring matches the prefix-only search missed
+
+    def search_changed(self, *args):
+        # Wait for a pause in typing before searching
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(self.SEARCH_DELAY_MS, self.run_search)
+
+    @timed("ui.search_users")
+    def run_search(self):
+        self.search_job = None
+        query = self.search_var.get().strip()
+        if not query:
+            self.users_list.show_matches(None)
+            set_if_changed(self.search_status, "Username or phone · click a heading to sort")
+            return
+        users = self.controller.users
+        matches = users.search(query, self.SEARCH_LIMIT)
+        self.users_list.show_matches(matches)
+        if len(matches) >= self.SEARCH_LIMIT:
+            text = f"First {len(matches)} matches"
+        else:
+            text = f"{len(matches)} match{'es' if len(matches) != 1 else ''}"
+        if not users.search_index.ready:
+            text += " · still indexing, names starting with it only"
+        set_if_changed(self.search_status, text)
+
+    def on_user_changed(self, username, fields):
+        if fields != {"orders"}:  # Order status isn't shown here
+            self.users_list.update_user(username)
+
+    def top_up(self, code):
+        selected = self.users_list.tree.selection()
+        if not selected:
+            messagebox.showinfo("Nothing Selected", "Select a member in the list first.", parent=self)
+            return
+        username, package = selected[0], TOPUP_PACKAGES[code]
+        if not messagebox.askyesno("Add Playtime",
+                                   f"Add {package['name']} of playtime to {username}?\n"
+                                   f"Collect ₱{package['price']} at the counter first.", parent=self):
+            return
+        try:
+            self.controller.service.top_up(username, code, self.controller.admin_id)
+        except CafeError as e:
+            self.controller.show_error(e, self)
+            return
+        messagebox.showinfo("Playtime Added", f"{package['name']} of playtime added for {username}.",
+                            parent=self)
+
+    def on_tab_changed(self, event):
+        if not self.report_shown and self.tab_control.select() == str(self.reports_tab):
+            self.show_report()
+
+    def show_report(self):
+        from Scripts.cafe_analytics import format_report  # numpy, if installed, is slow to import
+
+        try:
+            report = self.controller.service.sales_report()
+        except CafeError as e:
+            self.controller.show_error(e, self)
+            return
+        self.report_shown = True
+        self.report_text.configure(state="normal")
+        self.report_text.delete("1.0", "end")
+        self.report_text.insert("1.0", format_report(report))
+        self.report_text.configure(state="disabled")
+
+    def destroy(self):
+        self.controller.hub.unsubscribe(self.subscription)
+        # An unfinished index build resumes the next time the panel opens
+        for job in (self.index_job, self.search_job):
+            if job is not None:
+                self.after_cancel(job)
+        super().destroy()
+
+    def user_signed_up(self, username):
+        """A new account arrived while the panel is open"""
+        # Both the kiosk that signed up and the server's push may report it
+        if username in self.pending_users.keys:
+            return
+        self.pending_users.add(username)
+        self.users_list.add_user(username)
+
+    def users_decided(self, usernames):
+        """Take approved or rejected users out of the queue"""
+        self.pending_users.remove(usernames)
+
+    def admin_requested(self, admin_id):
+        self.pending_admins.add(admin_id)
+
+    def admins_decided(self, admin_ids):
+        self.pending_admins.remove(admin_ids)
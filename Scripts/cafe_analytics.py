@@ -0,0 +1,239 @@
+import argparse
+import random
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # The array/bisect versions below do the same work a bit slower
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def prefix_sums(values):
+    """Running totals with a leading 0, so sum(values[i:j]) = p[j] - p[i]"""
+    if np is not None:
+        return np.concatenate(([0.0], np.cumsum(np.frombuffer(values, dtype=np.float64)))).tolist()
+    return array("d", accumulate(values, initial=0.0))
+
+
+def count_before(sorted_values, points):
+    """For each point, how many values are strictly smaller"""
+    if np is not None:
+        return np.searchsorted(np.frombuffer(sorted_values, dtype=np.float64), points).tolist()
+    return [bisect_left(sorted_values, p) for p in points]
+
+
+def insert_sorted(values, value):
+    """Insert keeping ``values`` sorted; appending (the usual case) is O(1)"""
+    if not values or value >= values[-1]:
+        values.append(value)
+    else:
+        values.insert(bisect_right(values, value), value)
+
+
+class SalesHistory:
+    """Delivered orders and finished PC sessions as columns of typed arrays.
+
+    Each field is its own array (8-byte floats for times and prices, 2-byte
+    ints for items), under 20 bytes per order instead of a few hundred for
+    a dict. Orders are kept sorted by time, and session
+    starts and ends are each kept sorted, so a report is a handful of
+    binary searches over hour boundaries plus running totals rather than a
+    pass over every record.
+    """
+
+    def __init__(self, items):
+        self.items = dict(items)
+        self.item_codes = list(self.items)
+        self.item_index = {code: i for i, code in enumerate(self.item_codes)}
+
+        self.placed = array("d")
+        self.item = array("H")
+        self.price = array("d")
+        self.item_counts = [0] * len(self.item_codes)  # Running totals per item
+        self.item_revenue = [0.0] * len(self.item_codes)
+
+        self.starts = array("d")
+        self.ends = array("d")
+        self.pc_seconds = {}
+
+    @classmethod
+    def load(cls, store, items):
+        history = cls(items)
+        for placed, code, price in store.columns("order_history", ("placed", "item", "price"), "placed"):
+            history.add_order({"placed": placed, "item": code, "price": price})
+        for pc, start, end in store.columns("session_history", ("pc", "start", "end"), "start"):
+            history.add_session({"pc": pc, "start": start, "end": end})
+        return history
+
+    def add_order(self, record):
+        code = record["item"]
+        if code not in self.item_index:
+            self.item_index[code] = len(self.item_codes)
+            self.item_codes.append(code)
+            self.item_counts.append(0)
+            self.item_revenue.append(0.0)
+        placed = record["placed"]
+        # Batches are delivered slightly out of order, so don't assume appends
+        i = bisect_right(self.placed, placed) if self.placed and placed < self.placed[-1] else len(self.placed)
+        self.placed.insert(i, placed)
+        self.item.insert(i, self.item_index[code])
+        self.price.insert(i, record["price"])
+        self.item_counts[self.item_index[code]] += 1
+        self.item_revenue[self.item_index[code]] += record["price"]
+
+    def add_session(self, record):
+        start, end = record["start"], record["end"]
+        if start is None or end is None or end < start:
+            return
+        insert_sorted(self.starts, start)
+        insert_sorted(self.ends, end)
+        self.pc_seconds[record["pc"]] = self.pc_seconds.get(record["pc"], 0.0) + end - start
+
+    def report(self, pc_count, days=14, now=None):
+        """Revenue, top items, session length and occupancy over all history"""
+        now = time.time() if now is None else now
+        offset = time.localtime(now).tm_gmtoff  # Buckets follow the kiosk's clock
+        first = min(self.placed[0] if self.placed else now, self.starts[0] if self.starts else now)
+        first_hour = (first + offset) // HOUR * HOUR - offset
+        hours = [first_hour + h * HOUR for h in range(int((now - first_hour) // HOUR) + 2)]
+
+        # Revenue per clock hour from running totals at the hour boundaries
+        totals = prefix_sums(self.price)
+        cut = count_before(self.placed, hours)
+        hour_revenue = [totals[b] - totals[a] for a, b in zip(cut, cut[1:])]
+
+        # Seat-seconds per clock hour. Busy(t) = sum over sessions of the time
+        # spent before t, = sum(t - start for starts < t) - sum(t - end for ends < t)
+        start_totals, end_totals = prefix_sums(self.starts), prefix_sums(self.ends)
+        s_cut, e_cut = count_before(self.starts, hours), count_before(self.ends, hours)
+        busy = [s * t - start_totals[s] - (e * t - end_totals[e])
+                for t, s, e in zip(hours, s_cut, e_cut)]
+        hour_busy = [b - a for a, b in zip(busy, busy[1:])]
+
+        by_hour = [0.0] * 24
+        busy_by_hour = [0.0] * 24
+        hours_seen = [0] * 24
+        daily = {}
+        for t, revenue, seat_seconds in zip(hours, hour_revenue, hour_busy):
+            local = t + offset
+            hod = int(local % DAY // HOUR)
+            by_hour[hod] += revenue
+            busy_by_hour[hod] += seat_seconds
+            hours_seen[hod] += 1
+            day = time.strftime("%Y-%m-%d", time.gmtime(local // DAY * DAY))
+            daily[day] = daily.get(day, 0.0) + revenue
+
+        items = sorted(((code, self.items.get(code, {}).get("name", code), count, revenue)
+                        for code, count, revenue in zip(self.item_codes, self.item_counts, self.item_revenue)),
+                       key=lambda row: row[3], reverse=True)
+        sessions = len(self.starts)
+        span = max(now - first_hour, 1.0)
+        occupancy_by_hour = [busy_by_hour[h] / (pc_count * HOUR * hours_seen[h]) if hours_seen[h] else 0.0
+                             for h in range(24)]
+        return {
+            "orders": len(self.placed),
+            "revenue": totals[-1],
+            "daily": sorted(daily.items())[-days:],
+            "revenue_by_hour": by_hour,
+            "top_items": items,
+            "sessions": sessions,
+            "avg_session_minutes": (end_totals[-1] - start_totals[-1]) / sessions / 60 if sessions else 0.0,
+            "occupancy": (end_totals[-1] - start_totals[-1]) / (pc_count * span),
+            "occupancy_by_hour": occupancy_by_hour,
+            "busiest_hour": max(range(24), key=occupancy_by_hour.__getitem__),
+            "pc_utilization": sorted((pc, seconds / span) for pc, seconds in self.pc_seconds.items()),
+        }
+
+
+def format_report(report):
+    """Plain-text report for the admin panel's Reports tab"""
+    lines = [
+        f"Orders delivered: {report['orders']:,}    Revenue: ₱{report['revenue']:,.0f}",
+        f"PC sessions: {report['sessions']:,}    Average length: {report['avg_session_minutes']:.0f} min"
+        f"    Seat occupancy: {report['occupancy']:.0%}",
+        "",
+        "Top items",
+    ]
+    for code, name, count, revenue in report["top_items"][:10]:
+        lines.append(f"  {name:<16}{count:>9,} sold   ₱{revenue:>12,.0f}")
+
+    lines += ["", "Revenue by day"]
+    peak = max((r for _, r in report["daily"]), default=0) or 1
+    for day, revenue in report["daily"]:
+        lines.append(f"  {day}  ₱{revenue:>10,.0f}  {'█' * round(30 * revenue / peak)}")
+
+    lines += ["", f"Hour of day (busiest: {report['busiest_hour']:02d}:00)      revenue      occupancy"]
+    peak = max(report["revenue_by_hour"]) or 1
+    for hour in range(24):
+        revenue = report["revenue_by_hour"][hour]
+        occupancy = report["occupancy_by_hour"][hour]
+        lines.append(f"  {hour:02d}:00  ₱{revenue:>12,.0f}  {'█' * round(20 * revenue / peak):<20}"
+                     f"  {occupancy:>4.0%}")
+
+    if report["pc_utilization"]:
+        lines += ["", "Utilization per PC"]
+        row = []
+        for pc, share in report["pc_utilization"]:
+            row.append(f"PC {pc:>3}: {share:>4.0%}")
+            if len(row) == 6:
+                lines.append("  " + "   ".join(row))
+                row = []
+        if row:
+            lines.append("  " + "   ".join(row))
+    return "\n".join(lines)
+
+
+def bench(days, orders_per_day, sessions_per_day, pcs):
+    """Build ``days`` of synthetic history and time the report over it"""
+    from Scripts.cafe_config import FOOD_ITEMS
+
+    rng = random.Random(1)
+    now = time.time()
+    start = now - days * DAY
+    codes = list(FOOD_ITEMS)
+    history = SalesHistory(FOOD_ITEMS)
+
+    build = time.perf_counter()
+    placed = sorted(rng.uniform(start, now) for _ in range(days * orders_per_day))
+    items = [rng.randrange(len(codes)) for _ in placed]
+    for when, i in zip(placed, items):
+        history.add_order({"placed": when, "item": codes[i], "price": FOOD_ITEMS[codes[i]]["price"]})
+    for begin in sorted(rng.uniform(start, now) for _ in range(days * sessions_per_day)):
+        history.add_session({"pc": rng.randint(1, pcs), "start": begin,
+                             "end": begin + rng.uniform(15, 240) * 60})
+    build = time.perf_counter() - build
+
+    timer = time.perf_counter()
+    report = history.report(pcs, now=now)
+    elapsed = time.perf_counter() - timer
+    text = format_report(report)
+
+    memory = sum(a.itemsize * len(a) for a in (history.placed, history.item, history.price,
+                                              history.starts, history.ends))
+    print(f"{days} days: {report['orders']:,} orders, {report['sessions']:,} sessions, "
+          f"{memory / 1e6:.1f} MB of columns (built in {build:.1f}s)")
+    print(f"Report in {elapsed * 1000:.0f} ms using {'numpy' if np is not None else 'array/bisect'}")
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the sales report over synthetic history")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--orders", type=int, default=2000, help="Orders per day")
+    parser.add_argument("--sessions", type=int, default=1500, help="PC sessions per day")
+    parser.add_argument("--pcs", type=int, default=300)
+    parser.add_argument("--show", action="store_true", help="Print the report too")
+    args = parser.parse_args()
+    text = bench(args.days, args.orders, args.sessions, args.pcs)
+    if args.show:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
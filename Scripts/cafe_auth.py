@@ -0,0 +1,79 @@
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# scrypt cost; raise CAFE_SCRYPT_N on faster kiosks (must be a power of two)
+SCRYPT_N = int(os.environ.get("CAFE_SCRYPT_N", 2 ** 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+
+PREFIX = "scrypt$"
+
+
+def hash_password(password, n=None):
+    """Return a salted scrypt hash as "scrypt$n$r$p$salt$hash" """
+    n = n or SCRYPT_N
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=SCRYPT_R, p=SCRYPT_P,
+                            maxmem=256 * n * SCRYPT_R)
+    return f"{PREFIX}{n}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+
+
+def is_hashed(stored):
+    return isinstance(stored, str) and stored.startswith(PREFIX)
+
+
+def verify_password(password, stored):
+    """Check a password against a stored hash (or a legacy plaintext value)"""
+    if not stored:
+        return False
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode(), stored.encode())
+    try:
+        _, n, r, p, salt, digest = stored.split("$")
+        n, r, p = int(n), int(r), int(p)
+        actual = hashlib.scrypt(password.encode(), salt=bytes.fromhex(salt), n=n, r=r, p=p,
+                                maxmem=256 * n * r)
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual.hex(), digest)
+
+
+def needs_rehash(stored):
+    """True for plaintext or hashes made with an older cost setting"""
+    if not is_hashed(stored):
+        return True
+    return stored.split("$")[1] != str(SCRYPT_N)
+
+
+class AuthWorker:
+    """Runs hashing off the Tk thread and hands results back through after()"""
+
+    POLL_MS = 15
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="CafeAuth")
+
+    def submit(self, func, *args, callback, errback):
+        """Run ``func(*args)`` on the pool; ``callback`` gets its result on
+        the Tk thread, or ``errback`` the exception it raised"""
+        future = self.pool.submit(func, *args)
+
+        def poll():
+            if not future.done():
+                self.widget.after(self.POLL_MS, poll)
+                return
+            try:
+                result = future.result()
+            except Exception as e:  # Not only refusals: a lost server connection, a broken hash
+                errback(e)
+                return
+            callback(result)
+
+        self.widget.after(self.POLL_MS, poll)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,403 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from Scripts.cafe_auth import SCRYPT_N, hash_password
+from Scripts.cafe_config import FOOD_ITEMS, pc_zones
+from Scripts.cafe_journal import EventJournal
+from Scripts.cafe_model import ChangeHub, UserTable
+from Scripts.cafe_orders import OrderBook
+from Scripts.cafe_service import CafeService
+from Scripts.cafe_store import CafeStore
+
+# name -> (members, PCs)
+SIZES = {
+    "small": (1_000, 10),
+    "medium": (100_000, 300),
+    "large": (1_000_000, 1000),
+}
+
+PASSWORD = "bench1234"
+PENDING_SHARE = 0.001  # Accounts waiting for approval
+OCCUPIED_SHARE = 0.5  # PCs already in use when the run starts
+
+# Ignore changes smaller than this when comparing runs; timer noise
+NOISE_US = 2.0
+
+# Default relative slowdowns that count as regressions. A single p99 moves
+# with whatever else the machine was doing, so it gets far more room.
+P50_THRESHOLD = 0.25
+P99_THRESHOLD = 1.0
+
+
+def seed_tables(members, pcs, seed):
+    """Reproducible plain-dict tables: ``members`` accounts and ``pcs`` PCs.
+
+    Every account shares one password hash (hashing a million passwords
+    would take hours); logins still run the full scrypt check each time.
+    """
+    rng = random.Random(seed)
+    stored = hash_password(PASSWORD)
+    users = {}
+    for i in range(members):
+        pending = rng.random() < PENDING_SHARE
+        users[f"user{i:07d}"] = {
+            "password": stored,
+            "phone": f"0917{i:07d}",
+            "time": 0 if pending else rng.randint(30, 600),
+            "points": rng.randint(0, 500),
+            "streak": 0,
+            "last_login": None,
+            "status": "Pending" if pending else "Approved",
+            "slot": None,
+        }
+    slots = {pc: "Vacant" for pc in range(1, pcs + 1)}
+    approved = [u for u, info in users.items() if info["status"] == "Approved"]
+    for pc, username in zip(rng.sample(range(1, pcs + 1), int(pcs * OCCUPIED_SHARE)),
+                            rng.sample(approved, int(pcs * OCCUPIED_SHARE))):
+        users[username]["slot"] = pc
+        slots[pc] = "Occupied"
+    admins = {"admin": {"password": stored, "status": "Approved"}}
+    return {"users": users, "admins": admins, "pending_admins": {}, "slots": slots, "orders": {}}
+
+
+def stats(samples_ns):
+    """Throughput and latency percentiles from per-call timings"""
+    samples = sorted(samples_ns)
+    total = sum(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] / 1000
+    return {
+        "runs": len(samples),
+        "ops_per_s": round(len(samples) / (total / 1e9), 1) if total else None,
+        "p50_us": round(pick(0.50), 2),
+        "p99_us": round(pick(0.99), 2),
+        "max_us": round(samples[-1] / 1000, 2),
+    }
+
+
+def median_of(results):
+    """Combine repeated results for one data set: the median of every figure"""
+    failed = [r for r in results if "error" in r]
+    if failed:
+        return failed[0]
+    combined = {}
+    for op, first in results[0].items():
+        if isinstance(first, dict):
+            combined[op] = {field: median_value([r[op][field] for r in results]) for field in first}
+        elif isinstance(first, (int, float)):
+            combined[op] = median_value([r[op] for r in results])
+        else:
+            combined[op] = first
+    return combined
+
+
+def median_value(values):
+    if any(v is None for v in values):
+        return None
+    return round(statistics.median(values), 2)
+
+
+def measure(func, args_list):
+    """Time ``func(*args)`` once per entry of ``args_list``"""
+    clock = time.perf_counter_ns
+    samples = []
+    for args in args_list:
+        start = clock()
+        func(*args)
+        samples.append(clock() - start)
+    return stats(samples)
+
+
+def bench_service(members, pcs, seed, runs, login_runs):
+    """Service operations against a seeded data set; returns {op: stats}"""
+    data_dir = tempfile.mkdtemp(prefix="cafe_bench_")
+    store = CafeStore(os.path.join(data_dir, "cafe.db"))
+    journal = EventJournal(os.path.join(data_dir, "journal.jsonl"), store)
+    journal.start()
+
+    build = time.perf_counter()
+    plain = seed_tables(members, pcs, seed)
+    hub = ChangeHub(None)
+    tables = dict(plain, users=UserTable(hub, plain["users"]), orders=OrderBook(hub))
+    service = CafeService(tables, journal, store, FOOD_ITEMS, pc_zones(pcs))
+    build = time.perf_counter() - build
+
+    rng = random.Random(seed + 1)
+    users = service.users
+    names = users.sorted_names
+    approved = users.by_status("Approved")
+    idle = [u for u in approved if not users[u]["slot"]]
+    results = {"build_s": round(build, 2)}
+
+    # Logins run scrypt, so far fewer of them
+    results["login"] = measure(service.login, [(rng.choice(approved), PASSWORD) for _ in range(login_runs)])
+
+    picks = [rng.choice(names) for _ in range(runs)]
+    results["lookup_username"] = measure(users.get, [(u,) for u in picks])
+    results["lookup_phone"] = measure(users.find_by_phone, [(users[u]["phone"],) for u in picks])
+    results["lookup_prefix"] = measure(lambda p: users.with_prefix(p, 50), [(u[:8],) for u in picks])
+
+    # Claim a free PC then give it back, so the hall stays as full as it started
+    claim, release = [], []
+    clock = time.perf_counter_ns
+    for _ in range(runs):
+        username = rng.choice(idle)
+        while True:
+            pc = rng.randint(1, pcs)
+            if service.allocator.is_free(pc):
+                break
+        start = clock()
+        service.assign_pc(username, pc)
+        claim.append(clock() - start)
+        start = clock()
+        service.end_pc_session(username)
+        release.append(clock() - start)
+    results["assign_pc"] = stats(claim)
+    results["end_pc_session"] = stats(release)
+    results["assign_any_and_end"] = measure(lambda u: (service.assign_any_pc(u), service.end_pc_session(u)),
+                                            [(rng.choice(idle),) for _ in range(runs)])
+
+    # Orders; the kitchen clears the queue (untimed) before it fills up
+    codes = list(FOOD_ITEMS)
+    samples = []
+    for n in range(runs):
+        if len(service.orders.waiting) >= service.orders.MAX_QUEUED:
+            ids = [i for i in service.orders if service.orders[i]["status"] == "Queued"]
+            service.kitchen_take(len(ids))
+            service.kitchen_deliver(ids)
+        args = (rng.choice(approved), codes[n % len(codes)])
+        start = clock()
+        service.place_order(*args)
+        samples.append(clock() - start)
+    results["place_order"] = stats(samples)
+
+    journal.close()
+    store.close()
+    shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+
+def bench_memory(members, pcs, seed):
+    """Memory held by the member table once loaded; returns {"users_mb", "bytes_per_member"}.
+
+    Records go through JSON first, as they do coming out of the store, so
+    every record has its own strings rather than sharing the seed's.
+    """
+    plain = seed_tables(members, pcs, seed)["users"]
+    rows = {username: json.dumps(info) for username, info in plain.items()}
+    del plain
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    users = UserTable(ChangeHub(None), {username: json.loads(data) for username, data in rows.items()})
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del users
+    return {"users_mb": round(used / 1e6, 1), "bytes_per_member": round(used / members)}
+
+
+def find_display():
+    """(DISPLAY value, Xvfb process or None), or (None, None) when there is no X server"""
+    if os.environ.get("DISPLAY"):
+        return os.environ["DISPLAY"], None
+    if not shutil.which("Xvfb"):
+        return None, None
+    display = ":97"
+    xvfb = subprocess.Popen(["Xvfb", display, "-screen", "0", "1920x1080x24", "-nolisten", "tcp"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    socket_path = f"/tmp/.X11-unix/X{display[1:]}"
+    for _ in range(50):
+        if os.path.exists(socket_path):
+            return display, xvfb
+        time.sleep(0.1)
+    xvfb.terminate()
+    return None, None
+
+
+def bench_render(size, seed, runs, display):
+    """Time the Tk screens in a child process (it needs its own PC count and display)"""
+    members, pcs = SIZES[size]
+    env = dict(os.environ, DISPLAY=display, CAFE_PC_COUNT=str(pcs))
+    env.pop("CAFE_SERVER", None)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    child = subprocess.run([sys.executable, "-m", "Scripts.cafe_bench", "--render-child", size,
+                            "--seed", str(seed), "--render-runs", str(runs)],
+                           cwd=root, env=env, capture_output=True, text=True)
+    if child.returncode != 0:
+        return {"error": child.stderr.strip().splitlines()[-1] if child.stderr.strip() else "failed"}
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def render_child(size, seed, runs):
+    """Body of the render child: seed a database, start the kiosk, time its screens"""
+    import main
+
+    members, pcs = SIZES[size]
+    data_dir = tempfile.mkdtemp(prefix="cafe_bench_ui_")
+    store = CafeStore(os.path.join(data_dir, "cafe.db"))
+    store.apply_batch([{table: list(rows.items()) for table, rows in seed_tables(members, pcs, seed).items()}])
+    store.close()
+    main.DB_PATH = os.path.join(data_dir, "cafe.db")
+    main.JOURNAL_PATH = os.path.join(data_dir, "journal.jsonl")
+
+    start = time.perf_counter()
+    app = main.MainApp()
+    app.update()
+    results = {"startup_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    def timed(action):
+        start = time.perf_counter_ns()
+        action()
+        app.update()  # Include geometry and drawing, not just widget creation
+        return time.perf_counter_ns() - start
+
+    def repeat(name, action, reset):
+        samples = []
+        for _ in range(runs):
+            samples.append(timed(action))
+            reset()
+            app.update()
+        results[name] = stats(samples)
+
+    repeat("show_admin_panel", app.show_admin_panel, lambda: app.admin_panel.destroy())
+
+    app.current_user = app.users.by_status("Approved")[0]
+    app.show_main_interface()
+    app.update()
+    results["show_page_first"] = stats([timed(lambda: app.show_page("cafe"))])
+    pages = iter(["home", "cafe"] * runs)
+    results["show_page_switch"] = stats([timed(lambda: app.show_page(next(pages))) for _ in range(runs)])
+
+    app.show_page("cafe")
+    page = app.pages["cafe"]
+    results["select_pc_first"] = stats([timed(page.select_pc)])
+    page.hide_pc_popup()
+    repeat("select_pc", page.select_pc, page.hide_pc_popup)
+
+    app.shutdown()
+    app.destroy()
+    shutil.rmtree(data_dir, ignore_errors=True)
+    print(json.dumps(results))
+
+
+def compare(current, baseline, threshold=P50_THRESHOLD, p99_threshold=P99_THRESHOLD):
+    """Lines describing every operation that got slower than ``baseline``:
+    p50 by more than ``threshold``, p99 by more than ``p99_threshold``.
+
+    Both reports should hold medians over several --repeat runs; single
+    runs differ by more than these thresholds on an idle machine.
+    """
+    thresholds = {"p50_us": threshold, "p99_us": p99_threshold}
+    regressions = []
+    for size, result in current["sizes"].items():
+        before = baseline.get("sizes", {}).get(size)
+        if before is None:
+            continue
+        for group in ("ops", "render"):
+            for op, now in result.get(group, {}).items():
+                then = before.get(group, {}).get(op)
+                if not isinstance(now, dict) or not isinstance(then, dict) or "p50_us" not in then:
+                    continue
+                for metric, limit in thresholds.items():
+                    if now[metric] - then[metric] > max(NOISE_US, then[metric] * limit):
+                        regressions.append(f"{size} {op} {metric}: {then[metric]:,.1f} -> {now[metric]:,.1f}"
+                                           f" (+{(now[metric] / then[metric] - 1) * 100 if then[metric] else 0:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cafe service and kiosk screens")
+    parser.add_argument("--sizes", default="small,medium",
+                        help=f"Comma-separated data sets from {', '.join(f'{k} ({u:,} members/{p} PCs)' for k, (u, p) in SIZES.items())}")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=5000, help="Calls per fast operation")
+    parser.add_argument("--login-runs", type=int, default=20, help="Logins (scrypt) per data set")
+    parser.add_argument("--render-runs", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Run each data set this many times and report the median of each figure (default 3)")
+    parser.add_argument("--no-render", action="store_true", help="Skip the Tk screen timings")
+    parser.add_argument("--json", metavar="PATH", help="Write results here")
+    parser.add_argument("--compare", metavar="BASELINE", help="Flag regressions against an earlier --json file")
+    parser.add_argument("--threshold", type=float, default=P50_THRESHOLD,
+                        help=f"Relative p50 slowdown that counts as a regression (default {P50_THRESHOLD})")
+    parser.add_argument("--p99-threshold", type=float, default=P99_THRESHOLD,
+                        help=f"Relative p99 slowdown that counts as a regression (default {P99_THRESHOLD})")
+    parser.add_argument("--render-child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.render_child:
+        render_child(args.render_child, args.seed, args.render_runs)
+        return
+
+    display, xvfb = (None, None) if args.no_render else find_display()
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scrypt_n": SCRYPT_N,
+            "seed": args.seed,
+            "runs": args.runs,
+            "repeat": args.repeat,
+        },
+        "sizes": {},
+    }
+    try:
+        for size in args.sizes.split(","):
+            members, pcs = SIZES[size]
+            print(f"{size}: {members:,} members, {pcs} PCs")
+            result = {"members": members, "pcs": pcs}
+            result["ops"] = median_of([bench_service(members, pcs, args.seed, args.runs, args.login_runs)
+                                       for _ in range(args.repeat)])
+            result["memory"] = bench_memory(members, pcs, args.seed)
+            if display:
+                result["render"] = median_of([bench_render(size, args.seed, args.render_runs, display)
+                                              for _ in range(args.repeat)])
+            else:
+                result["render"] = {"skipped": "no X display (set DISPLAY or install Xvfb)"}
+            report["sizes"][size] = result
+
+            print(f"  {'memory':<20}{result['memory']['users_mb']:>12,.1f} MB"
+                  f"   {result['memory']['bytes_per_member']:>10,} B/member")
+            for group in ("ops", "render"):
+                for op, row in result[group].items():
+                    if isinstance(row, dict):
+                        print(f"  {op:<20}{row['ops_per_s'] or 0:>12,.0f}/s   p50 {row['p50_us']:>10,.1f} µs"
+                              f"   p99 {row['p99_us']:>10,.1f} µs")
+                    else:
+                        print(f"  {op:<20}{row}")
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("repeat", 1) < 2 or args.repeat < 2:
+            print("Note: comparing single runs; use --repeat 3 or more for both for a reliable gate")
+        regressions = compare(report, baseline, args.threshold, args.p99_threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import itertools
+import socket
+import threading
+from concurrent.futures import Future
+
+from Scripts.cafe_errors import ERRORS, CafeError
+from Scripts.cafe_protocol import encode_frame, recv_frame
+
+
+class RemoteError(CafeError):
+    """The cafe server could not be reached or didn't understand a request"""
+
+
+class CafeClient:
+    """Persistent, pipelined connection from a kiosk to the cafe server.
+
+    One connection is shared by every caller in the process. Requests are
+    written as soon as they are submitted and matched to their responses by
+    id, so several can be in flight at once. Server pushes (change sets) go
+    to ``on_push`` and session events to ``on_event``, on the reader thread.
+    """
+
+    def __init__(self, host, port, on_push=None, on_event=None, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.on_push = on_push
+        self.on_event = on_event
+        self.timeout = timeout
+        self.ids = itertools.count(1)
+        self.waiting = {}
+        self.send_lock = threading.Lock()
+        self.sock = None
+        self.connect()
+
+    def connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.settimeout(None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        threading.Thread(target=self.read_loop, args=(sock,), name="CafeClientReader",
+                         daemon=True).start()
+
+    def read_loop(self, sock):
+        try:
+            while True:
+                message = recv_frame(sock)
+                if "push" in message:
+                    if self.on_push:
+                        self.on_push(message["push"])
+                    continue
+                if "event" in message:
+                    if self.on_event:
+                        self.on_event(message["event"])
+                    continue
+                future = self.waiting.pop(message["id"], None)
+                if future is None:
+                    continue
+                if message["ok"]:
+                    future.set_result(message.get("result"))
+                else:
+                    # Refusals come back as the CafeError type the server raised
+                    future.set_exception(ERRORS.get(message.get("type"), RemoteError)(message["error"]))
+        except (OSError, ConnectionError, ValueError) as e:
+            # Fail everything still waiting; the next submit reconnects
+            waiting, self.waiting = self.waiting, {}
+            for future in waiting.values():
+                future.set_exception(RemoteError(f"Lost connection to cafe server: {e}"))
+            if self.sock is sock:
+                self.sock = None
+
+    def submit(self, op, **args):
+        """Send a request without waiting; returns a Future for the result"""
+        future = Future()
+        request_id = next(self.ids)
+        frame = encode_frame({"id": request_id, "op": op, "args": args})
+        with self.send_lock:
+            if self.sock is None:
+                self.connect()
+            self.waiting[request_id] = future
+            try:
+                self.sock.sendall(frame)
+            except OSError as e:
+                self.waiting.pop(request_id, None)
+                self.sock = None
+                raise RemoteError(f"Lost connection to cafe server: {e}")
+        return future
+
+    def call(self, op, **args):
+        """Send a request and wait for its result (raises a CafeError)"""
+        try:
+            return self.submit(op, **args).result(timeout=self.timeout)
+        except CafeError:
+            raise
+        except Exception as e:
+            raise RemoteError(f"Cafe server unavailable: {e}")
+
+    def fetch(self, table):
+        """Every row of a server table as (key, record) pairs, a page per request"""
+        rows, start = [], 0
+        while start is not None:
+            page = self.call("snapshot", table=table, start=start)
+            rows += page["rows"]
+            start = page["next"]
+        return rows
+
+    def close(self):
+        sock, self.sock = self.sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
@@ -0,0 +1,49 @@
+import os
+
+# Shared cafe settings used by the kiosk app and the cafe server
+
+FOOD_ITEMS = {
+    "C1": {"name": "Coffee", "price": 50, "points": 1},
+    "S1": {"name": "Softdrink", "price": 30, "points": 1},
+    "B1": {"name": "Burger", "price": 80, "points": 2},
+    "F1": {"name": "Fries", "price": 40, "points": 1},
+}
+
+# Stations in the hall; PCs added here are created on the next start
+PC_COUNT = int(os.environ.get("CAFE_PC_COUNT", 10))
+
+
+def pc_zones(pc_count):
+    """Named groups of PCs members can ask for ("any free VIP PC").
+
+    The last two fifths of the hall are VIP.
+    """
+    vip_start = pc_count - pc_count * 2 // 5 + 1
+    return {
+        "Regular": range(1, vip_start),
+        "VIP": range(vip_start, pc_count + 1),
+    }
+
+
+PC_ZONES = pc_zones(PC_COUNT)
+
+APPROVAL_MINUTES = 100  # Playtime granted when an account is approved
+STREAK_BONUS_EVERY = 7  # Days of login streak per bonus
+STREAK_BONUS_POINTS = 10  # Loyalty points per bonus
+
+# Loyalty points members can trade for playtime
+REDEEM_RULES = {
+    "R30": {"name": "30 minutes", "points": 20, "minutes": 30},
+    "R60": {"name": "1 hour", "points": 35, "minutes": 60},
+    "R180": {"name": "3 hours", "points": 90, "minutes": 180},
+}
+
+# Playtime members can buy, paid at the counter like food orders
+TOPUP_PACKAGES = {
+    "T60": {"name": "1 hour", "price": 40, "minutes": 60},
+    "T180": {"name": "3 hours", "price": 100, "minutes": 180},
+    "T300": {"name": "5 hours", "price": 150, "minutes": 300},
+}
+
+DEFAULT_ADMIN_ID = "admin"
+DEFAULT_ADMIN_PASSWORD = "admin123"
@@ -0,0 +1,81 @@
+class CafeError(Exception):
+    """An operation was refused; the message is meant for the kiosk user"""
+
+    title = "Error"  # Dialog title front ends should use
+
+
+class InvalidInput(CafeError):
+    """A form field is missing or malformed"""
+
+
+class NotFound(CafeError):
+    """No such member, admin, PC or order"""
+
+
+class AlreadyExists(CafeError):
+    """Username, admin ID or phone number is taken"""
+
+
+class AuthFailed(CafeError):
+    """Wrong password"""
+
+
+class NotApproved(CafeError):
+    """The account is waiting for an admin"""
+
+    title = "Pending Approval"
+
+
+class NoPlaytime(CafeError):
+    """The member has no minutes left"""
+
+
+class NotEnoughPoints(CafeError):
+    """The member can't afford a redemption"""
+
+    title = "Not Enough Points"
+
+
+class PCUnavailable(CafeError):
+    """The PC was taken, or the member already has one"""
+
+
+class KitchenBusy(CafeError):
+    """The kitchen queue is full"""
+
+    title = "Kitchen Busy"
+
+
+class NotAllowed(CafeError):
+    """The cafe server needs a member or admin login for this first"""
+
+    title = "Not Allowed"
+
+
+class SaveFailed(CafeError):
+    """Changes aren't reaching the database (locked, disk full)"""
+
+    title = "Database Error"
+
+
+# By class name, so errors keep their type across the cafe server protocol
+ERRORS = {cls.__name__: cls for cls in (CafeError, InvalidInput, NotFound, AlreadyExists, AuthFailed,
+                                        NotApproved, NoPlaytime, NotEnoughPoints, PCUnavailable, KitchenBusy,
+                                        NotAllowed, SaveFailed)}
+
+
+def error_name(error):
+    """ERRORS key of the most specific class ``error`` belongs to"""
+    return next(cls.__name__ for cls in type(error).__mro__ if cls.__name__ in ERRORS)
+
+
+def attempt(func, *args, **kwargs):
+    """Call ``func``; returns (True, result) or (False, the CafeError it raised).
+
+    For work handed to another thread, where the error has to travel back
+    as a value.
+    """
+    try:
+        return True, func(*args, **kwargs)
+    except CafeError as e:
+        return False, e
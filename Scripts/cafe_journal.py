@@ -0,0 +1,251 @@
+import json
+import os
+import queue
+import threading
+import time
+
+from Scripts.cafe_auth import hash_password
+from Scripts.cafe_config import DEFAULT_ADMIN_ID, DEFAULT_ADMIN_PASSWORD, PC_COUNT
+from Scripts.cafe_errors import SaveFailed
+from Scripts.cafe_model import SlotTable, UserTable
+from Scripts.cafe_orders import OrderBook
+from Scripts.cafe_store import CafeStore
+
+
+def apply_changes(state, changes):
+    """Apply one change set to a dict of tables ({table: {key: record}}).
+
+    Tables missing from ``state`` (the order history) only live in the store.
+    """
+    for table, rows in changes.items():
+        target = state.get(table)
+        if target is None:
+            continue
+        # Bulk imports and decisions, pushed or replayed
+        if isinstance(target, UserTable) and len(rows) > 1:
+            if all(r is not None for _, r in rows):
+                target.add_many(rows)
+                continue
+            if all(r is None for _, r in rows):
+                target.remove_many([k for k, _ in rows])
+                continue
+        for key, record in rows:
+            if record is None:
+                target.pop(key, None)
+            else:
+                target[key] = record
+
+
+def open_state(db_path, journal_path, hub, slot_hub=None):
+    """Load the snapshot, replay the journal tail and start journaling.
+
+    Returns (store, journal, tables) where tables maps table name to the
+    live dict (users is a UserTable and orders an OrderBook, both reporting
+    to ``hub``; with a ``slot_hub`` slots is a SlotTable reporting to it).
+    """
+    store = CafeStore(db_path)
+    journal = EventJournal(journal_path, store)
+    tables = {
+        "users": UserTable(hub, store.load("users")),
+        "admins": store.load("admins"),
+        "pending_admins": store.load("pending_admins"),
+        "slots": SlotTable(slot_hub, store.load("slots")) if slot_hub else store.load("slots"),
+        "orders": OrderBook(hub, store.load("orders")),
+    }
+    journal.replay(tables)
+    store.open_ledger()  # Upgrading: opening balances, now the store matches the tables
+    journal.start()
+    # Delivered orders have left the book; never reuse their ids
+    orders = tables["orders"]
+    orders.next_id = max(orders.next_id, store.max_key("order_history") + 1)
+
+    # First run: default admin and PCs
+    if not tables["admins"]:
+        tables["admins"][DEFAULT_ADMIN_ID] = {"password": hash_password(DEFAULT_ADMIN_PASSWORD),
+                                              "status": "Approved"}
+        journal.append("create_admin", {"admins": [(DEFAULT_ADMIN_ID, dict(tables["admins"][DEFAULT_ADMIN_ID]))]})
+    new_pcs = [pc for pc in range(1, PC_COUNT + 1) if pc not in tables["slots"]]
+    if new_pcs:
+        tables["slots"].update({pc: "Vacant" for pc in new_pcs})
+        journal.append("create_slots", {"slots": [(pc, "Vacant") for pc in new_pcs]})
+    return store, journal, tables
+
+
+class EventJournal:
+    """Append-only JSON-lines log of every state change.
+
+    Events are queued by the UI thread and group-committed by a background
+    thread: one write + fsync per group, then the same group is folded into
+    the SQLite store. Every SNAPSHOT_EVERY events the store is checkpointed
+    and the journal truncated, so startup only replays a short tail.
+
+    A group that can't be saved (database locked by another tool, disk
+    full) is kept and retried every RETRY_S seconds together with whatever
+    was queued meanwhile; ``error`` holds the failure until a retry works.
+    """
+
+    SNAPSHOT_EVERY = 5000
+    MAX_BATCH = 500
+    RETRY_S = 1.0
+
+    def __init__(self, path, store):
+        self.path = path
+        self.store = store
+        self.seq = store.last_seq()
+        self.lock = threading.Lock()
+        self.saved_changed = threading.Condition(self.lock)
+        self.pending = queue.Queue()
+        self.stopping = threading.Event()
+        self.since_snapshot = 0
+        self.written = self.saved = self.seq  # Last event in the journal file / in the store
+        self.error = None
+        self.file = None
+        self.thread = None
+
+    def replay(self, state):
+        """Apply journal events newer than the store to ``state``.
+
+        Returns the number of events replayed. Must be called before start().
+        """
+        snapshot_seq = self.seq
+        tail = []
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        break  # Torn write from a crash, nothing valid after it
+                    if event["seq"] > snapshot_seq:
+                        tail.append(event)
+
+        for event in tail:
+            apply_changes(state, event["changes"])
+        if tail:
+            self.seq = self.written = self.saved = tail[-1]["seq"]
+            self.store.apply_batch([e["changes"] for e in tail], seq=self.seq)
+        return len(tail)
+
+    def start(self):
+        """Take a fresh snapshot and start the writer thread"""
+        self.store.checkpoint()
+        # Unbuffered, so a failed write can be cut off cleanly before the retry
+        self.file = open(self.path, "wb", buffering=0)
+        self.thread = threading.Thread(target=self.run, name="CafeJournalWriter", daemon=True)
+        self.thread.start()
+
+    def append(self, kind, changes):
+        """Record an event; returns immediately"""
+        with self.lock:
+            self.seq += 1
+            event = {"seq": self.seq, "ts": round(time.time(), 3), "type": kind, "changes": changes}
+            # Queued under the lock so the writer sees events in seq order
+            self.pending.put(event)
+
+    def run(self):
+        batch = []
+        stop = False
+        while True:
+            if not batch:
+                event = self.pending.get()
+                if event is None:
+                    return
+                batch.append(event)
+            # Group whatever else is already waiting into the same commit
+            while not stop and len(batch) < self.MAX_BATCH:
+                try:
+                    event = self.pending.get_nowait()
+                except queue.Empty:
+                    break
+                if event is None:
+                    stop = True
+                    break
+                batch.append(event)
+            try:
+                self.commit(batch)
+            except Exception as e:  # sqlite3.Error, OSError, ...: keep the batch for the retry
+                self.set_saved(self.saved, e)
+                if self.stopping.is_set():
+                    print(f"Journal closed with events {self.saved + 1}-{batch[-1]['seq']} not in the store: {e}")
+                    return
+                self.stopping.wait(self.RETRY_S)
+                continue
+            self.set_saved(batch[-1]["seq"], None)
+            batch = []
+            if stop:
+                return
+
+    def set_saved(self, seq, error):
+        with self.saved_changed:
+            if (error is None) != (self.error is None):
+                print(f"Journal write failed, retrying: {error}" if error else "Journal writes recovered")
+            self.saved = seq
+            self.error = error
+            self.saved_changed.notify_all()
+
+    def commit(self, batch):
+        """Write ``batch`` to the journal file, then fold it into the store.
+
+        Safe to repeat after a failure: events already written or already
+        in the store are skipped.
+        """
+        unwritten = [e for e in batch if e["seq"] > self.written]
+        if unwritten:
+            data = b"".join(json.dumps(e, separators=(",", ":")).encode() + b"\n" for e in unwritten)
+            end = self.file.tell()
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[self.file.write(view):]
+                os.fsync(self.file.fileno())
+            except OSError:
+                # Replay stops at a torn line, so never leave one before the retry
+                self.file.seek(end)
+                self.file.truncate()
+                raise
+            self.written = unwritten[-1]["seq"]
+
+        unsaved = [e for e in batch if e["seq"] > self.saved]
+        if unsaved:
+            self.store.apply_batch([e["changes"] for e in unsaved], seq=unsaved[-1]["seq"])
+            self.since_snapshot += len(unsaved)
+            self.saved = unsaved[-1]["seq"]
+        if self.since_snapshot >= self.SNAPSHOT_EVERY:
+            self.snapshot()
+
+    def snapshot(self):
+        """Make the store durable up to the last event and empty the journal"""
+        self.store.checkpoint()
+        self.file.seek(0)
+        self.file.truncate()
+        self.since_snapshot = 0
+
+    def flush(self):
+        """Wait until every event appended so far is in the store.
+
+        Raises SaveFailed instead of waiting while the writer can't save.
+        """
+        if not self.thread:
+            return
+        with self.saved_changed:
+            target = self.seq
+            while self.saved < target:
+                if self.error is not None:
+                    raise SaveFailed(f"The cafe database can't be saved right now:\n{self.error}")
+                self.saved_changed.wait()
+
+    def close(self, snapshot=False):
+        """Flush everything queued so far and stop the writer thread.
+
+        With ``snapshot`` the journal is also emptied into the store, so a
+        large bulk write isn't parsed again on the next start. If saving is
+        failing, one last attempt is made; events already in the journal
+        file are replayed into the store on the next start.
+        """
+        if self.thread:
+            self.pending.put(None)
+            self.stopping.set()
+            self.thread.join()
+            if snapshot and self.error is None:
+                self.snapshot()
+            self.file.close()
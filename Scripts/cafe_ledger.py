@@ -0,0 +1,92 @@
+import argparse
+import os
+import time
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry kinds, by what moved the balance:
+#   opening       balance a member had when the ledger was introduced
+#   import        balance brought in by Scripts/cafe_transfer.py
+#   approval      playtime granted when an account is approved
+#   order         points earned on a food order
+#   streak_bonus  points paid by the nightly streak rollover
+#   redeem        points traded for minutes (REDEEM_RULES)
+#   topup         minutes bought (TOPUP_PACKAGES), with the admin who took payment
+#   play          minutes used by one PC session, written when it ends
+#   closed        whatever was left when an account was rejected
+
+
+def ledger_entry(entry_id, username, kind, points=0, minutes=0, **details):
+    """A ledger row; positive amounts are credits, negative ones debits"""
+    return {"id": entry_id, "username": username, "kind": kind, "points": points, "minutes": minutes,
+            "at": round(time.time(), 3), **details}
+
+
+def replay(store):
+    """Add up every ledger entry in order; returns {username: [points, minutes]}"""
+    totals = {}
+    for username, points, minutes in store.columns("ledger", ("username", "points", "minutes"), "key"):
+        total = totals.get(username)
+        if total is None:
+            totals[username] = [points, minutes]
+        else:
+            total[0] += points
+            total[1] += minutes
+    return totals
+
+
+def check(store):
+    """Compare the replayed ledger with every member's running totals.
+
+    Minutes charged in a session still running are debited from the
+    balance at once but only reach the ledger when the session ends, so
+    they are added back from session_minutes. Members who are gone must
+    net to zero. Returns (username, "points" or "minutes", ledger total,
+    balance) for every disagreement; empty means consistent.
+    """
+    totals = replay(store)
+    problems = []
+    members = store.columns("users", ("key", "points", "time", "session_minutes"), "key")
+    for username, points, minutes, running in members:
+        expected = totals.pop(username, (0, 0))
+        balance = (points or 0, (minutes or 0) + (running or 0))
+        for field, want, have in zip(("points", "minutes"), expected, balance):
+            if want != have:
+                problems.append((username, field, want, have))
+    for username, expected in totals.items():
+        for field, want in zip(("points", "minutes"), expected):
+            if want:
+                problems.append((username, field, want, 0))
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that every member's points and minutes match their ledger. "
+                    "Stop the kiosk or cafe server using the database first.")
+    parser.add_argument("--db", default=os.path.join(DATA_DIR, "cafe.db"))
+    parser.add_argument("--journal", default=os.path.join(DATA_DIR, "cafe_journal.jsonl"))
+    parser.add_argument("--limit", type=int, default=20, help="Disagreements to list")
+    args = parser.parse_args()
+
+    from Scripts.cafe_journal import open_state
+    from Scripts.cafe_model import ChangeHub
+
+    started = time.perf_counter()
+    store, journal, tables = open_state(args.db, args.journal, ChangeHub(None))
+    try:
+        journal.flush()
+        problems = check(store)
+    finally:
+        journal.close()
+        store.close()
+    print(f"Checked {len(tables['users']):,} members in {time.perf_counter() - started:.1f}s")
+    for username, field, want, have in problems[:args.limit]:
+        print(f"  {username}: {field} ledger {want:,} but balance {have:,}")
+    if problems:
+        raise SystemExit(f"{len(problems):,} balances disagree with the ledger")
+    print("Every balance matches its ledger")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import threading
+from datetime import date, timedelta
+from itertools import compress, repeat
+from operator import and_, attrgetter, gt, le, lt, mod, not_
+
+from Scripts.cafe_config import STREAK_BONUS_EVERY
+
+
+def day_key(day):
+    """A day as stored in last_login ("2026-10-18"); keys sort like the dates"""
+    return day.isoformat() if day else ""
+
+
+def member_columns(users):
+    """(usernames, last login keys, streaks) of every member as parallel lists.
+
+    Safe off the owner's thread: the record list is taken in one step and
+    each field read is atomic.
+    """
+    records = list(users.values())
+    names = list(map(attrgetter("username"), records))
+    logins = [r.get("last_login") or "" for r in records]
+    streaks = [r.get("streak") or 0 for r in records]
+    return names, logins, streaks
+
+
+def rollover_plan(names, logins, streaks, since, until, every=STREAK_BONUS_EVERY):
+    """Decide a rollover from member columns; returns (lapsed, rewarded).
+
+    Closes the days after ``since`` up to ``until`` (day keys, "" for
+    never). Lapsed members have a streak but didn't log in on ``until``;
+    rewarded ones reached a multiple of ``every`` days on a closed day.
+    A member's streak is as of their last login, so for those whose last
+    login falls on a closed day it is the streak that day ended with.
+    Members who have logged in again since had that day settled by
+    CafeService.record_login instead.
+    Each condition is one map/compress pass over the columns, run in C
+    rather than a Python loop per member.
+    """
+    has_streak = list(map(gt, streaks, repeat(0)))
+    missed = map(lt, logins, repeat(until))
+    lapsed = list(compress(names, map(and_, has_streak, missed)))
+    closed = map(and_, map(gt, logins, repeat(since)), map(le, logins, repeat(until)))
+    milestone = map(and_, has_streak, map(not_, map(mod, streaks, repeat(every))))
+    rewarded = list(compress(names, map(and_, closed, milestone)))
+    return lapsed, rewarded
+
+
+class StreakRollover:
+    """Closes each finished day once: pays streak bonuses and breaks the
+    streaks of members who missed it.
+
+    A timer on ``widget`` (Tk, or the cafe server's LoopTimer) checks at
+    start and then every CHECK_MS whether a day has ended since the last
+    rollover. The
+    member columns are read and the plan made on a worker thread; only
+    the writes run on the owner's thread. Bonuses are paid together with
+    the day being marked closed (CafeService.close_days); broken streaks
+    follow CHUNK members per step (break_streaks), since after days
+    without a rollover they can be a large share of the members. Any not
+    reached before a restart are caught by the next night's plan.
+    """
+
+    CHECK_MS = 60_000
+    POLL_MS = 100
+    CHUNK = 5000
+
+    def __init__(self, widget, service):
+        self.widget = widget
+        self.service = service
+        self.after_id = None
+        self.thread = None
+        self.result = None
+        self.lapsed = ()  # (until, usernames) still to break, a chunk per step
+
+    def run(self):
+        if self.after_id is None:
+            self.after_id = self.widget.after(0, self.check)  # Days that ended while stopped
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+
+    def check(self):
+        if self.lapsed:
+            until, usernames = self.lapsed
+            self.service.break_streaks(until, usernames[:self.CHUNK])
+            del usernames[:self.CHUNK]
+            if not usernames:
+                self.lapsed = ()
+        elif self.thread is not None:
+            if not self.thread.is_alive():
+                self.thread = None
+                if self.result is not None:
+                    until, (lapsed, rewarded) = self.result
+                    self.service.close_days(until, rewarded)
+                    self.lapsed = (until, lapsed) if lapsed else ()
+        else:
+            until = date.today() - timedelta(days=1)
+            if until.toordinal() > self.service.rollover_day:
+                self.start(until)
+        busy = self.thread is not None or self.lapsed
+        self.after_id = self.widget.after(self.POLL_MS if busy else self.CHECK_MS, self.check)
+
+    def start(self, until):
+        last = self.service.rollover_day
+        since = day_key(date.fromordinal(last) if last else None)
+        self.result = None
+        self.thread = threading.Thread(target=self.plan, args=(since, until), name="CafeStreakRollover",
+                                       daemon=True)
+        self.thread.start()
+
+    def plan(self, since, until):
+        try:
+            columns = member_columns(self.service.users)
+            self.result = (until.toordinal(), rollover_plan(*columns, since, day_key(until)))
+        except Exception as e:  # Retried at the next check
+            print(f"Streak rollover failed: {e}")
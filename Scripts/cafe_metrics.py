@@ -0,0 +1,202 @@
+import bisect
+import functools
+import os
+import threading
+import time
+
+# CAFE_METRICS=0 turns instrumentation off entirely (decorators become no-ops)
+ENABLED = os.environ.get("CAFE_METRICS", "1") != "0"
+DEFAULT_PORT = int(os.environ.get("CAFE_METRICS_PORT", 9478))
+
+# Histogram bucket upper bounds in seconds, as Prometheus expects them
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BOUNDS_NS = [int(b * 1e9) for b in BUCKETS]
+
+
+class Histogram:
+    """Call count, errors, total time and bucketed latency of one action"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = [0] * (len(BUCKETS) + 1)  # Last slot is +Inf
+        self.total_ns = 0
+        self.errors = 0
+
+    def observe(self, elapsed_ns, failed=False):
+        i = bisect.bisect_left(BOUNDS_NS, elapsed_ns)
+        with self.lock:
+            self.counts[i] += 1
+            self.total_ns += elapsed_ns
+            if failed:
+                self.errors += 1
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.total_ns, self.errors
+
+
+class Metrics:
+    """Named action histograms, shared by the whole process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def snapshot(self):
+        """{action: {"count", "sum_s", "errors", "buckets"}}; buckets are per-bucket counts"""
+        result = {}
+        for name, histogram in sorted(self.histograms.items()):
+            counts, total_ns, errors = histogram.snapshot()
+            result[name] = {"count": sum(counts), "sum_s": total_ns / 1e9, "errors": errors,
+                            "buckets": counts}
+        return result
+
+    def prometheus(self):
+        """The snapshot in Prometheus text exposition format"""
+        lines = ["# HELP cafe_action_seconds Time spent in kiosk handlers and service operations.",
+                 "# TYPE cafe_action_seconds histogram"]
+        errors = ["# HELP cafe_action_errors_total Calls that raised.",
+                  "# TYPE cafe_action_errors_total counter"]
+        for name, data in self.snapshot().items():
+            running = 0
+            for bound, count in zip((*BUCKETS, "+Inf"), data["buckets"]):
+                running += count
+                lines.append(f'cafe_action_seconds_bucket{{action="{name}",le="{bound}"}} {running}')
+            lines.append(f'cafe_action_seconds_sum{{action="{name}"}} {data["sum_s"]:.6f}')
+            lines.append(f'cafe_action_seconds_count{{action="{name}"}} {data["count"]}')
+            errors.append(f'cafe_action_errors_total{{action="{name}"}} {data["errors"]}')
+        return "\n".join(lines + errors) + "\n"
+
+
+METRICS = Metrics()
+
+
+def timed(name):
+    """Decorator recording every call of the function under ``name``"""
+    def decorate(func):
+        if not ENABLED:
+            return func
+        histogram = METRICS.histogram(name)
+        clock = time.perf_counter_ns
+
+        @functools.wraps(func)
+        def timed_call(*args, **kwargs):
+            start = clock()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                histogram.observe(clock() - start, failed)
+        return timed_call
+    return decorate
+
+
+class measure:
+    """Context manager form of timed(), for blocks that aren't a whole function"""
+
+    def __init__(self, name):
+        self.histogram = METRICS.histogram(name) if ENABLED else None
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.histogram is not None:
+            self.histogram.observe(time.perf_counter_ns() - self.start, exc_type is not None)
+
+
+def append_line(path, line, max_bytes, backups):
+    """Append ``line`` to a log that rolls over to path.1 ... path.<backups> at ``max_bytes``"""
+    if os.path.exists(path) and os.path.getsize(path) + len(line) > max_bytes:
+        for i in range(backups - 1, 0, -1):
+            if os.path.exists(f"{path}.{i}"):
+                os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+        os.replace(path, f"{path}.1")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+
+
+class MetricsExporter:
+    """Writes the metrics to a rotating JSON-lines file and serves them over HTTP.
+
+    A snapshot line is appended every ``interval`` seconds (only when
+    something changed) to ``path``, which rolls over at ``max_bytes``
+    keeping ``backups`` old files. With a ``port``, Prometheus can scrape
+    http://127.0.0.1:<port>/metrics; the server only listens on localhost.
+    """
+
+    def __init__(self, path, port=None, interval=60, max_bytes=1_000_000, backups=3):
+        self.path = path
+        self.port = port
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.stopped = threading.Event()
+        self.server = None
+        self.last = None
+
+    def start(self):
+        if not ENABLED:
+            return self
+        if self.port:
+            self.start_http()
+        threading.Thread(target=self.run, name="CafeMetrics", daemon=True).start()
+        return self
+
+    def start_http(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split("?")[0] != "/metrics":
+                    handler.send_error(404)
+                    return
+                body = METRICS.prometheus().encode()
+                handler.send_response(200)
+                handler.send_header("Content-Type", "text/plain; version=0.0.4")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass  # Don't print a line per scrape
+
+        try:
+            self.server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        except OSError as e:
+            print(f"Metrics endpoint not started on port {self.port}: {e}")
+            return
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name="CafeMetricsHTTP", daemon=True).start()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+    def write(self):
+        """Append a snapshot line if anything changed since the last one"""
+        import json
+        snapshot = METRICS.snapshot()
+        if snapshot == self.last:
+            return
+        self.last = snapshot
+        line = json.dumps({"time": round(time.time(), 3), "actions": snapshot}) + "\n"
+        append_line(self.path, line, self.max_bytes, self.backups)
+
+    def close(self):
+        self.stopped.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if ENABLED:
+            self.write()
@@ -0,0 +1,398 @@
+import bisect
+import sys
+from collections.abc import Mapping
+
+
+def changed(fields, field):
+    """True if ``field`` is in a change set (None means everything changed)"""
+    return fields is None or field in fields or "*" in fields
+
+
+def set_if_changed(var, value):
+    """Set a Tk variable only when the value differs, so bound widgets don't redraw"""
+    if var.get() != value:
+        var.set(value)
+
+
+class ChangeHub:
+    """Collects field-level change events and delivers them once per idle turn.
+
+    Subscribers register for one username (or None for every user) and are
+    called as ``callback(username, fields)`` with the set of fields that
+    changed since the last delivery. Without a widget (headless use, e.g.
+    the cafe server) changes are delivered immediately.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.subscribers = {}
+        self.pending = {}
+        self.scheduled = False
+
+    def subscribe(self, username, callback):
+        self.subscribers.setdefault(username, []).append(callback)
+        return (username, callback)
+
+    def unsubscribe(self, token):
+        username, callback = token
+        callbacks = self.subscribers.get(username, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def notify(self, username, field):
+        self.pending.setdefault(username, set()).add(field)
+        self.schedule()
+
+    def notify_many(self, usernames, field):
+        """notify() for many users, delivered together"""
+        for username in usernames:
+            self.pending.setdefault(username, set()).add(field)
+        self.schedule()
+
+    def schedule(self):
+        if self.widget is None:
+            self.flush()
+        elif not self.scheduled:
+            self.scheduled = True
+            self.widget.after_idle(self.flush)
+
+    def flush(self):
+        """Deliver everything that changed since the last flush"""
+        pending, self.pending = self.pending, {}
+        self.scheduled = False
+        everyone = self.subscribers.get(None, [])
+        for username, fields in pending.items():
+            for callback in self.subscribers.get(username, []) + everyone:
+                callback(username, fields)
+
+
+def normalize_phone(phone):
+    """Digits only, so "0917 123 4567" and "0917-123-4567" index the same"""
+    phone = str(phone)
+    if phone.isdigit():
+        return phone  # Already normalized, the common case
+    return "".join(filter(str.isdigit, phone))
+
+
+# Values many members share; one string object each instead of one per record
+SHARED_FIELDS = ("status", "last_login")
+MISSING = object()
+
+
+class UserRecord(Mapping):
+    """A member's record; writes to a field are reported to the owning table.
+
+    Fields live in slots rather than a dict per member, which is most of a
+    member's memory at a million members, and the status and last login
+    strings are interned. It still reads like a dict (``record["points"]``,
+    ``get``, ``in``, ``items``, ``copy()``); a field that was never
+    set is absent, as with a dict. Fields outside FIELDS, e.g. from newer
+    data, go in a per-record overflow dict.
+    """
+
+    FIELDS = ("password", "phone", "time", "points", "streak", "last_login", "status", "slot", "since",
+              "session_minutes")
+    __slots__ = ("table", "username", "extra") + FIELDS
+
+    def __init__(self, table, username, data):
+        self.table = table
+        self.username = username
+        self.extra = None
+        for field, value in data.items():
+            self.store(field, value)
+
+    def store(self, field, value):
+        if field in SHARED_FIELDS and value.__class__ is str:
+            value = sys.intern(value)
+        if field in self.FIELDS:
+            setattr(self, field, value)
+        elif self.extra is None:
+            self.extra = {field: value}
+        else:
+            self.extra[field] = value
+
+    def __getitem__(self, field):
+        value = self.get(field, MISSING)
+        if value is MISSING:
+            raise KeyError(field)
+        return value
+
+    def get(self, field, default=None):
+        if field in self.FIELDS:
+            return getattr(self, field, default)
+        return default if self.extra is None else self.extra.get(field, default)
+
+    def __contains__(self, field):
+        return self.get(field, MISSING) is not MISSING
+
+    def __iter__(self):
+        return iter(self.copy())
+
+    def __len__(self):
+        return len(self.copy())
+
+    def copy(self):
+        """The record as a plain dict, e.g. to journal or send"""
+        data = {}
+        for field in self.FIELDS:
+            value = getattr(self, field, MISSING)
+            if value is not MISSING:
+                data[field] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self):
+        return f"UserRecord({self.username!r}, {self.copy()!r})"
+
+    def __setitem__(self, field, value):
+        old = self.get(field, MISSING)
+        if old == value:
+            return
+        self.store(field, value)
+        self.table.field_changed(self.username, field, None if old is MISSING else old, value)
+
+
+class UserTable(dict):
+    """username -> UserRecord, reporting inserts, edits and deletes to a ChangeHub.
+
+    A whole-record insert or delete is reported as the "*" field. The table
+    also keeps secondary indexes current on every change:
+
+    - status buckets (status -> usernames, in insertion order)
+    - normalized phone -> username, or a set of usernames if shared
+    - a sorted username list for prefix lookups
+    """
+
+    INDEXED = ("status", "phone")
+
+    def __init__(self, hub, records=None):
+        super().__init__()
+        self.hub = hub
+        self.status_index = {}
+        self.phone_index = {}
+        self.search_index = None  # Substring search, built on demand
+        self.search_build = None
+        for username, data in (records or {}).items():
+            record = UserRecord(self, username, data)
+            super().__setitem__(username, record)
+            self.index_record(username, record)
+        self.sorted_names = sorted(self)
+
+    def __setitem__(self, username, data):
+        old = self.get(username)
+        if old is not None:
+            self.unindex_record(username, old)
+        else:
+            bisect.insort(self.sorted_names, username)
+        record = UserRecord(self, username, data)
+        super().__setitem__(username, record)
+        self.index_record(username, record)
+        self.hub.notify(username, "*")
+
+    def add_many(self, rows):
+        """Insert or replace many (username, data) rows at once.
+
+        Same effect as assigning each row, but the sorted name list is
+        merged once instead of insorted per row, which matters for imports
+        of hundreds of thousands of members.
+        """
+        new_names = []
+        for username, data in rows:
+            old = self.get(username)
+            if old is not None:
+                self.unindex_record(username, old)
+            else:
+                new_names.append(username)
+            record = UserRecord(self, username, data)
+            super().__setitem__(username, record)
+            self.index_record(username, record)
+        self.hub.notify_many([username for username, _ in rows], "*")
+        if len(new_names) < 16:
+            for username in new_names:
+                bisect.insort(self.sorted_names, username)
+        elif new_names:
+            new_names.sort()
+            names = self.sorted_names
+            start = len(names)
+            names.extend(new_names)
+            if start and names[start - 1] > names[start]:
+                names.sort()  # Two sorted runs, merged in O(n)
+
+    def remove_many(self, usernames):
+        """Delete many users at once; the sorted name list is filtered in one pass"""
+        gone = []
+        for username in usernames:
+            record = super().pop(username, None)
+            if record is not None:
+                self.unindex_record(username, record)
+                gone.append(username)
+        if len(gone) < 16:
+            for username in gone:
+                del self.sorted_names[bisect.bisect_left(self.sorted_names, username)]
+        else:
+            removed = set(gone)
+            self.sorted_names = [name for name in self.sorted_names if name not in removed]
+        self.hub.notify_many(gone, "*")
+
+    def __delitem__(self, username):
+        self.pop(username)
+
+    def pop(self, username, *default):
+        if username not in self:
+            return super().pop(username, *default)
+        record = super().pop(username)
+        self.unindex_record(username, record)
+        i = bisect.bisect_left(self.sorted_names, username)
+        del self.sorted_names[i]
+        self.hub.notify(username, "*")
+        return record
+
+    def field_changed(self, username, field, old, new):
+        if field == "status":
+            self.status_index.get(old, {}).pop(username, None)
+            self.status_index.setdefault(new, {})[username] = None
+        elif field == "phone":
+            self.drop_phone(username, old)
+            self.add_phone(username, new)
+            if self.search_index is not None:
+                self.search_index.add(username, new)
+        self.hub.notify(username, field)
+
+    def index_record(self, username, record):
+        self.status_index.setdefault(record.get("status"), {})[username] = None
+        self.add_phone(username, record.get("phone", ""))
+        if self.search_index is not None:
+            self.search_index.add(username, record.get("phone", ""))
+
+    def unindex_record(self, username, record):
+        self.status_index.get(record.get("status"), {}).pop(username, None)
+        self.drop_phone(username, record.get("phone", ""))
+        if self.search_index is not None:
+            self.search_index.remove(username)
+
+    def add_phone(self, username, phone):
+        # Phones are nearly always unique, and a set per member would
+        # outweigh the rest of the index
+        key = normalize_phone(phone or "")
+        if not key:
+            return  # No phone, or one a kiosk's mirror wasn't sent
+        owners = self.phone_index.get(key)
+        if owners is None:
+            self.phone_index[key] = username
+        elif owners.__class__ is str:
+            if owners != username:
+                self.phone_index[key] = {owners, username}
+        else:
+            owners.add(username)
+
+    def drop_phone(self, username, phone):
+        key = normalize_phone(phone or "")
+        owners = self.phone_index.get(key)
+        if owners is None:
+            return
+        if owners.__class__ is str:
+            if owners == username:
+                del self.phone_index[key]
+            return
+        owners.discard(username)
+        if len(owners) == 1:
+            self.phone_index[key] = owners.pop()
+
+    # Queries cost O(result size), not O(members)
+
+    def by_status(self, status):
+        """Usernames with the given status, oldest first"""
+        return list(self.status_index.get(status, ()))
+
+    def count_status(self, status):
+        return len(self.status_index.get(status, ()))
+
+    def find_by_phone(self, phone):
+        """Usernames registered with this phone number"""
+        key = normalize_phone(phone)
+        owners = self.phone_index.get(key) if key else None
+        if owners is None:
+            return set()
+        return {owners} if owners.__class__ is str else set(owners)
+
+    def search(self, query, limit=50):
+        """Usernames for a search box: those starting with ``query`` first,
+        then ones containing it, or whose phone contains its digits.
+
+        Substring matches need the trigram index; without one it is built
+        here (seconds for a million members), while build_search_index()
+        is still running only prefix matches are returned.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        results = dict.fromkeys(self.with_prefix(query, limit))
+        if len(results) < limit:
+            if self.search_index is None:
+                for _ in self.build_search_index():
+                    pass
+            if self.search_index.ready:
+                for username in self.search_index.search(query, limit):
+                    results[username] = None
+                    if len(results) >= limit:
+                        break
+        return list(results)
+
+    def build_search_index(self, chunk=2000):
+        """Build the search index ``chunk`` members per step of the
+        returned generator, so the UI can spread it over idle callbacks.
+
+        Members added, edited or removed meanwhile are indexed as usual;
+        calling this again while a build is unfinished resumes it.
+        """
+        if self.search_build is None:
+            self.search_build = self.fill_search_index(chunk)
+        return self.search_build
+
+    def fill_search_index(self, chunk):
+        from Scripts.cafe_search import SearchIndex
+        index = self.search_index = SearchIndex(ready=False)
+        names = list(self)
+        for start in range(0, len(names), chunk):
+            for username in names[start:start + chunk]:
+                record = self.get(username)
+                # Skip members gone or already indexed by a change since
+                if record is not None and username not in index.ids:
+                    index.add(username, record.get("phone", ""))
+            yield min(start + chunk, len(names))
+        index.ready = True
+
+    def with_prefix(self, prefix, limit=None):
+        """Usernames starting with ``prefix`` in sorted order"""
+        names = self.sorted_names
+        i = bisect.bisect_left(names, prefix)
+        result = []
+        while i < len(names) and names[i].startswith(prefix):
+            result.append(names[i])
+            if limit is not None and len(result) >= limit:
+                break
+            i += 1
+        return result
+
+
+class SlotTable(dict):
+    """pc -> "Vacant"/"Occupied", reporting status changes to a ChangeHub.
+
+    Subscribers get ``callback(pc, {"status"})``, coalesced like member
+    changes, so the floor map can recolour just the stations that moved.
+    """
+
+    def __init__(self, hub, records=None):
+        super().__init__(records or {})
+        self.hub = hub
+
+    def __setitem__(self, pc, status):
+        if self.get(pc) == status:
+            return
+        super().__setitem__(pc, status)
+        self.hub.notify(pc, "status")
+
+    def update(self, other=(), **kwargs):
+        for pc, status in dict(other, **kwargs).items():
+            self[pc] = status
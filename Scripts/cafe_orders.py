@@ -0,0 +1,204 @@
+import argparse
+import itertools
+import os
+import tempfile
+import time
+
+from Scripts.cafe_errors import KitchenBusy
+
+# Order lifecycle; each step stamps its own time field on the order
+STATUSES = ("Queued", "Preparing", "Ready", "Delivered")
+STAMPS = {"Queued": "placed", "Preparing": "started", "Ready": "ready", "Delivered": "delivered"}
+
+
+class OrderQueueFull(KitchenBusy):
+    """The kitchen already has MAX_QUEUED orders waiting; try again shortly"""
+
+
+class OrderBook(dict):
+    """order id -> open order, with the kitchen's waiting queue on top.
+
+    Orders are placed as "Queued" and wait in arrival order until the
+    kitchen takes a batch ("Preparing"), then become "Ready" and finally
+    "Delivered", at which point they leave the book for the order history.
+    The waiting queue is bounded: once MAX_QUEUED orders are waiting, new
+    ones are refused with OrderQueueFull so the kitchen isn't buried.
+
+    Like UserTable, every change is reported to the ChangeHub, here as the
+    "orders" field of the member who placed it, so their kiosk can show
+    status updates.
+    """
+
+    MAX_QUEUED = 100
+    BATCH_SIZE = 12
+
+    def __init__(self, hub, records=None):
+        super().__init__()
+        self.hub = hub
+        self.waiting = {}  # Queued ids, oldest first (a dict keeps order)
+        self.by_user = {}  # username -> {order id: None}
+        self.next_id = 1
+        for order_id, record in (records or {}).items():
+            if record["status"] != "Delivered":
+                self[order_id] = record
+
+    def __setitem__(self, order_id, record):
+        old = self.get(order_id)
+        if old is not None:
+            self.unindex(order_id, old)
+        super().__setitem__(order_id, record)
+        if record["status"] == "Queued":
+            self.waiting[order_id] = None
+        self.by_user.setdefault(record["username"], {})[order_id] = None
+        self.next_id = max(self.next_id, order_id + 1)
+        self.hub.notify(record["username"], "orders")
+
+    def __delitem__(self, order_id):
+        self.pop(order_id)
+
+    def pop(self, order_id, *default):
+        if order_id not in self:
+            return super().pop(order_id, *default)
+        record = super().pop(order_id)
+        self.unindex(order_id, record)
+        self.hub.notify(record["username"], "orders")
+        return record
+
+    def unindex(self, order_id, record):
+        self.waiting.pop(order_id, None)
+        mine = self.by_user.get(record["username"])
+        if mine is not None:
+            mine.pop(order_id, None)
+            if not mine:
+                del self.by_user[record["username"]]
+
+    def place(self, username, item_code, item, now=None):
+        """Queue a new order; returns it or raises OrderQueueFull"""
+        if len(self.waiting) >= self.MAX_QUEUED:
+            raise OrderQueueFull("The kitchen is busy right now. Please order again in a few minutes.")
+        order_id = self.next_id
+        self[order_id] = {
+            "id": order_id,
+            "username": username,
+            "item": item_code,
+            "name": item["name"],
+            "price": item["price"],
+            "points": item["points"],
+            "status": "Queued",
+            "placed": round(time.time() if now is None else now, 3),
+        }
+        return self[order_id]
+
+    def take_batch(self, limit=None, now=None):
+        """Move the oldest waiting orders to "Preparing"; returns their ids"""
+        ids = list(itertools.islice(self.waiting, limit or self.BATCH_SIZE))
+        self.advance(ids, "Preparing", now)
+        return ids
+
+    def advance(self, ids, status, now=None):
+        """Move orders to a later status; returns the ids that changed.
+
+        Delivered orders are removed from the book; read them before
+        calling this if they need to be kept (see finish()).
+        """
+        stamp = round(time.time() if now is None else now, 3)
+        rank = STATUSES.index(status)
+        moved = []
+        for order_id in ids:
+            record = self.get(order_id)
+            if record is None or STATUSES.index(record["status"]) >= rank:
+                continue
+            if status == "Delivered":
+                self.pop(order_id)
+            else:
+                self[order_id] = dict(record, status=status, **{STAMPS[status]: stamp})
+            moved.append(order_id)
+        return moved
+
+    def finish(self, ids, now=None):
+        """Deliver orders; returns their final records for the order history"""
+        stamp = round(time.time() if now is None else now, 3)
+        done = [dict(self[i], status="Delivered", delivered=stamp) for i in ids
+                if i in self and self[i]["status"] != "Delivered"]
+        self.advance([r["id"] for r in done], "Delivered", now)
+        return done
+
+    def for_user(self, username):
+        """A member's open orders, oldest first"""
+        return [self[i] for i in sorted(self.by_user.get(username, ()))]
+
+    def in_kitchen(self):
+        """Orders being prepared or waiting for pickup, oldest first"""
+        return [r for i, r in sorted(self.items()) if r["status"] in ("Preparing", "Ready")]
+
+
+def bench(rate, minutes, kitchen_every):
+    """Drive the full order loop at ``rate`` orders/minute through the journal.
+
+    Time is simulated so an hour of peak trade runs in seconds; the kitchen
+    takes a batch every ``kitchen_every`` simulated seconds and delivers
+    what it prepared on the previous visit.
+    """
+    from Scripts.cafe_config import FOOD_ITEMS
+    from Scripts.cafe_journal import EventJournal
+    from Scripts.cafe_model import ChangeHub
+    from Scripts.cafe_store import CafeStore
+
+    data_dir = tempfile.mkdtemp(prefix="cafe_orders_")
+    store = CafeStore(os.path.join(data_dir, "cafe.db"))
+    journal = EventJournal(os.path.join(data_dir, "journal.jsonl"), store)
+    journal.start()
+    orders = OrderBook(ChangeHub(None))
+    codes = list(FOOD_ITEMS)
+    total = rate * minutes
+    gap = 60 / rate
+    refused = 0
+    waits = []
+    preparing = []
+    next_visit = kitchen_every
+
+    start = time.perf_counter()
+    for n in range(total):
+        now = n * gap
+        if now >= next_visit:
+            # Deliver the last batch, start the next one
+            done = orders.finish(preparing, now=now)
+            waits.extend(r["delivered"] - r["placed"] for r in done)
+            journal.append("deliver_orders", {"orders": [(r["id"], None) for r in done],
+                                              "order_history": [(r["id"], r) for r in done]})
+            preparing = orders.take_batch(now=now)
+            journal.append("take_orders", {"orders": [(i, orders[i]) for i in preparing]})
+            next_visit += kitchen_every
+        code = codes[n % len(codes)]
+        try:
+            order = orders.place(f"member{n % 300}", code, FOOD_ITEMS[code], now=now)
+        except OrderQueueFull:
+            refused += 1
+            continue
+        journal.append("place_order", {"orders": [(order["id"], dict(order))]})
+    journal.close()
+    elapsed = time.perf_counter() - start
+    store.close()
+
+    waits.sort()
+    print(f"{total} orders at {rate}/min over {minutes} simulated minutes "
+          f"processed in {elapsed:.2f}s ({total / elapsed:,.0f} orders/s, journaled)")
+    print(f"Delivered {len(waits)}, refused {refused} (queue limit {OrderBook.MAX_QUEUED}), "
+          f"still open {len(orders)}")
+    if waits:
+        print(f"Order to delivery: median {waits[len(waits) // 2]:.0f}s, "
+              f"p95 {waits[int(len(waits) * 0.95)]:.0f}s (simulated)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the order queue at peak-hour rates")
+    parser.add_argument("--rate", type=int, default=300, help="Orders per minute")
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--kitchen-every", type=float, default=2.0,
+                        help="Simulated seconds between kitchen batches")
+    args = parser.parse_args()
+    bench(args.rate, args.minutes, args.kitchen_every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import json
+import struct
+
+# Every frame is a 4-byte big-endian length followed by a compact JSON body.
+#
+#   request:  {"id": 7, "op": "assign_pc", "args": {...}}
+#   response: {"id": 7, "ok": true, "result": ...}
+#             {"id": 7, "ok": false, "error": "PC is no longer available!"}
+#   push:     {"push": {"users": [[key, record], ...], "slots": [...]}}
+#   event:    {"event": {"kind": "low_time", "username": "ana", "minutes": 5}}
+#             {"event": {"kind": "expired", "username": "ana"}}
+#
+# Requests may be pipelined; responses carry the request id and pushes and
+# events carry none. Pushes use the journal's change-set format; events are
+# the server's session clock telling kiosks what their own clock would, and
+# go only to the member's kiosks and admin kiosks.
+
+HEADER = struct.Struct(">I")
+MAX_FRAME = 64 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode_frame(message):
+    body = json.dumps(message, separators=(",", ":")).encode()
+    return HEADER.pack(len(body)) + body
+
+
+def decode_body(body):
+    return json.loads(body)
+
+
+async def read_frame(reader):
+    """Read one frame from an asyncio StreamReader; None on a clean EOF"""
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except Exception:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ProtocolError(f"Frame too large: {length} bytes")
+    return decode_body(await reader.readexactly(length))
+
+
+def recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed by server")
+        data += chunk
+    return bytes(data)
+
+
+def recv_frame(sock):
+    """Read one frame from a blocking socket"""
+    (length,) = HEADER.unpack(recv_exactly(sock, HEADER.size))
+    if length > MAX_FRAME:
+        raise ProtocolError(f"Frame too large: {length} bytes")
+    return decode_body(recv_exactly(sock, length))
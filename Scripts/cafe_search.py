@@ -0,0 +1,97 @@
+from array import array
+
+from Scripts.cafe_model import normalize_phone
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Trigram index over usernames and phone numbers for substring search.
+
+    Each member gets a small integer id and each trigram an array of the
+    ids containing it; a million members take about 160 MB, several
+    times less than a set of usernames per trigram. Removing a member
+    only clears its id; the arrays are rebuilt once a quarter of the ids
+    are dead.
+
+    ``ready`` is False while UserTable.build_search_index() is still
+    filling it in; searches skip the index until then.
+    """
+
+    MIN_DEAD = 1000  # Don't bother compacting small indexes
+
+    def __init__(self, members=(), ready=True):
+        self.ids = {}       # username -> id
+        self.names = []     # id -> username, None once removed
+        self.folded = []    # id -> lowercase username
+        self.phones = []    # id -> normalized phone
+        self.name_grams = {}
+        self.phone_grams = {}
+        self.dead = 0
+        self.ready = ready
+        for username, phone in members:
+            self.add(username, phone)
+
+    def add(self, username, phone):
+        """Index a member, replacing what was indexed for them before"""
+        if username in self.ids:
+            self.remove(username)
+        i = len(self.names)
+        folded = username.lower()
+        if folded == username:
+            folded = username  # Share the string; most names are already lowercase
+        phone = normalize_phone(phone)
+        self.ids[username] = i
+        self.names.append(username)
+        self.folded.append(folded)
+        self.phones.append(phone)
+        for grams, text in ((self.name_grams, folded), (self.phone_grams, phone)):
+            for gram in trigrams(text):
+                postings = grams.get(gram)
+                if postings is None:
+                    postings = grams[gram] = array("I")
+                postings.append(i)
+
+    def remove(self, username):
+        i = self.ids.pop(username, None)
+        if i is None:
+            return
+        self.names[i] = None
+        self.dead += 1
+        if self.dead >= self.MIN_DEAD and self.dead * 4 > len(self.names):
+            self.compact()
+
+    def compact(self):
+        live = [(name, phone) for name, phone in zip(self.names, self.phones) if name is not None]
+        self.__init__(live, self.ready)
+
+    def search(self, query, limit):
+        """Up to ``limit`` usernames containing ``query`` (ignoring case),
+        then, if it has no letters, ones whose phone contains its digits;
+        needs 3+ characters"""
+        results = {}
+        folded = query.lower()
+        if len(folded) >= 3:
+            self.scan(self.name_grams, folded, self.folded, results, limit)
+        digits = normalize_phone(query)
+        if len(digits) >= 3 and len(results) < limit and not any(map(str.isalpha, query)):
+            self.scan(self.phone_grams, digits, self.phones, results, limit)
+        return list(results)
+
+    def scan(self, grams, needle, texts, results, limit):
+        """Add matches of ``needle`` to ``results``, walking the rarest trigram's ids"""
+        postings = []
+        for gram in trigrams(needle):
+            ids = grams.get(gram)
+            if ids is None:
+                return  # Some trigram occurs nowhere, so the needle doesn't either
+            postings.append(ids)
+        names = self.names
+        for i in min(postings, key=len):
+            name = names[i]
+            if name is not None and needle in texts[i] and name not in results:
+                results[name] = None
+                if len(results) >= limit:
+                    return
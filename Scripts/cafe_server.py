@@ -0,0 +1,597 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import traceback
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+from Scripts.cafe_auth import hash_password, verify_password
+from Scripts.cafe_config import DEFAULT_ADMIN_ID, DEFAULT_ADMIN_PASSWORD, TOPUP_PACKAGES
+from Scripts.cafe_errors import CafeError, InvalidInput, NotAllowed, error_name
+from Scripts.cafe_journal import open_state
+from Scripts.cafe_ledger import check as check_ledger
+from Scripts.cafe_loyalty import StreakRollover
+from Scripts.cafe_metrics import DEFAULT_PORT as DEFAULT_METRICS_PORT, MetricsExporter
+from Scripts.cafe_model import ChangeHub
+from Scripts.cafe_protocol import encode_frame, read_frame
+from Scripts.cafe_service import CafeService
+from Scripts.cafe_sessions import SessionClock
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PORT = 5150
+
+
+class LoopTimer:
+    """after()/after_cancel() on top of an asyncio loop, for SessionClock"""
+
+    def __init__(self, loop):
+        self.loop = loop
+
+    def after(self, ms, func):
+        return self.loop.call_later(ms / 1000, func)
+
+    def after_cancel(self, handle):
+        handle.cancel()
+
+
+class KioskConnection:
+    """One kiosk's connection and who has logged in over it"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.member = None  # Username from a successful login
+        self.admin = None  # Admin ID from a successful verify_admin
+        self.snapshot = {}  # table -> keys still to send, while a mirror is paged out
+        self.tasks = set()  # Requests still running
+
+
+# Member fields sent only to admins and to the member's own kiosk
+PRIVATE_FIELDS = ("phone",)
+
+
+def public(record, hidden=()):
+    """Copy of a record without its password hash or the ``hidden`` fields"""
+    if not isinstance(record, Mapping):
+        return record
+    record = record.copy()
+    record.pop("password", None)
+    for field in hidden:
+        record.pop(field, None)
+    return record
+
+
+class CafeServer:
+    """Serves one CafeService to every kiosk in the cafe.
+
+    All state lives on the event loop thread, so each operation is atomic
+    without locks; only password hashing is sent to a thread pool, between
+    an operation's check_* half and the operation itself. Every change is
+    journaled by the service and pushed to all connected kiosks so their
+    local mirrors stay current.
+
+    Each connection carries its own login: reads, signups and logins are
+    open to all, a member's operations need that member (or an admin)
+    logged in on the same connection, and everything else needs an admin.
+    Members' phones are only sent to admins and to the member's own
+    connection; when a login changes, the affected rows are pushed again.
+    """
+
+    SNAPSHOT_PAGE = 10_000
+
+    def __init__(self, db_path, journal_path):
+        self.hub = ChangeHub(None)
+        self.store, self.journal, tables = open_state(db_path, journal_path, self.hub)
+        self.service = CafeService(tables, self.journal, self.store)
+        self.service.on_commit = self.push
+        self.users = self.service.users
+        self.admins = self.service.admins
+        self.pending_admins = self.service.pending_admins
+        self.slots = self.service.slots
+        self.orders = self.service.orders
+        self.clients = set()
+        self.hasher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="CafeServerAuth")
+        self.sessions = None
+        self.rollover = None
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT, unix_path=None):
+        loop = asyncio.get_running_loop()
+        self.sessions = SessionClock(LoopTimer(loop), self.service.charge_minute, self.warn_low_time,
+                                     self.expire_session)
+        self.service.sessions = self.sessions
+        for username, info in self.users.items():
+            if info["slot"]:
+                self.sessions.start(username, info["time"])
+        self.sessions.run()
+        self.rollover = StreakRollover(LoopTimer(loop), self.service)
+        self.rollover.run()
+
+        if unix_path:
+            self.server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port)
+        return self.server
+
+    def close(self):
+        if self.sessions:
+            self.sessions.cancel()
+        if self.rollover:
+            self.rollover.cancel()
+        if self.server:
+            self.server.close()
+        self.hasher.shutdown(wait=False)
+        self.journal.close()
+        self.store.close()
+
+    async def handle_client(self, reader, writer):
+        conn = KioskConnection(writer)
+        self.clients.add(conn)
+        try:
+            while True:
+                request = await read_frame(reader)
+                if request is None:
+                    break
+                # Each request runs as its own task so a slow password hash
+                # doesn't hold up requests pipelined behind it
+                task = asyncio.ensure_future(self.run_request(conn, request))
+                conn.tasks.add(task)
+                task.add_done_callback(conn.tasks.discard)
+        except asyncio.CancelledError:
+            # Server shutting down
+            for task in conn.tasks:
+                task.cancel()
+        except Exception as e:
+            print(f"Client error: {e}")
+        finally:
+            self.clients.discard(conn)
+            # Requests pipelined before the kiosk hung up still finish
+            # (or unwind) before their writer goes away
+            if conn.tasks:
+                await asyncio.gather(*conn.tasks, return_exceptions=True)
+            writer.close()
+
+    async def run_request(self, conn, request):
+        request_id = request.get("id")
+        try:
+            op = request["op"]
+            handler = self.OPS[op]
+            args = request.get("args", {})
+            self.authorize(conn, op, args)
+            result = handler(self, conn, **args) if op in self.CONNECTION_OPS else handler(self, **args)
+            if asyncio.iscoroutine(result):
+                result = await result
+            frame = encode_frame({"id": request_id, "ok": True, "result": result})
+        except CafeError as e:
+            frame = encode_frame({"id": request_id, "ok": False, "type": error_name(e), "error": str(e)})
+        except (KeyError, TypeError) as e:
+            frame = encode_frame({"id": request_id, "ok": False, "error": f"Bad request: {e}"})
+        except Exception as e:
+            # Anything else is a server bug, but the kiosk still gets its answer
+            traceback.print_exc()
+            frame = encode_frame({"id": request_id, "ok": False, "error": f"Server error: {e}"})
+        self.send(conn, frame)
+        try:
+            # Also holds back a kiosk that isn't reading its pushes and events
+            await conn.writer.drain()
+        except ConnectionError:
+            pass  # The kiosk hung up; handle_client cleans up
+
+    def authorize(self, conn, op, args):
+        """Refuse ``op`` unless the connection's login allows it"""
+        if op in self.OPEN_OPS:
+            return
+        if self.is_admin(conn):
+            return
+        if op in self.MEMBER_OPS:
+            if conn.member is None:
+                raise NotAllowed("Please log in first.")
+            if args.get("username") != conn.member:
+                raise NotAllowed("You can only do that for your own account.")
+            return
+        raise NotAllowed("An admin must log in on this kiosk first.")
+
+    def is_admin(self, conn):
+        return conn.admin is not None and conn.admin in self.admins
+
+    def visible(self, conn, table, key, record):
+        """``record`` as the connection may see it"""
+        if table == "users" and key != conn.member and not self.is_admin(conn):
+            return public(record, PRIVATE_FIELDS)
+        return public(record)
+
+    def set_login(self, conn, member, admin):
+        """Change who is logged in on the connection, then resend the users
+        whose private fields it can now see, or no longer can"""
+        was_admin, old_member = self.is_admin(conn), conn.member
+        conn.member, conn.admin = member, admin
+        if self.is_admin(conn) != was_admin:
+            keys = list(self.users)
+        elif member != old_member:
+            keys = [k for k in (old_member, member) if k in self.users]
+        else:
+            return
+        for start in range(0, len(keys), self.SNAPSHOT_PAGE):
+            rows = [(k, self.visible(conn, "users", k, self.users[k]))
+                    for k in keys[start:start + self.SNAPSHOT_PAGE]]
+            self.send(conn, encode_frame({"push": {"users": rows}}))
+
+    def send(self, conn, frame):
+        if not conn.writer.is_closing():
+            conn.writer.write(frame)
+
+    def push(self, changes):
+        """Send a committed change set to every kiosk, as each may see it"""
+        changed_users = {k for k, _ in changes.get("users", ())}
+        frames = {}  # Connections that see the same rows share one frame
+        for conn in list(self.clients):
+            view = "admin" if self.is_admin(conn) else conn.member if conn.member in changed_users else None
+            frame = frames.get(view)
+            if frame is None:
+                frame = frames[view] = encode_frame({"push": {
+                    table: [(k, self.visible(conn, table, k, r)) for k, r in rows]
+                    for table, rows in changes.items()}})
+            self.send(conn, frame)
+
+    def send_event(self, kind, username, **event):
+        """Tell the kiosks logged in as the member, and admin kiosks, about
+        one of the member's session events"""
+        frame = encode_frame({"event": {"kind": kind, "username": username, **event}})
+        for conn in list(self.clients):
+            if conn.member == username or self.is_admin(conn):
+                self.send(conn, frame)
+
+    def warn_low_time(self, username, minutes):
+        self.send_event("low_time", username, minutes=minutes)
+
+    def expire_session(self, username):
+        self.service.end_pc_session(username)
+        self.send_event("expired", username)
+
+    async def hash(self, password):
+        return await asyncio.get_running_loop().run_in_executor(self.hasher, hash_password, password)
+
+    async def verify(self, password, stored):
+        return await asyncio.get_running_loop().run_in_executor(self.hasher, verify_password,
+                                                                password, stored)
+
+    async def upgrade_password(self, table, key, password):
+        """Re-hash a plaintext or outdated password after a successful check"""
+        if self.service.needs_rehash(table, key):
+            self.service.set_password_hash(table, key, await self.hash(password))
+
+    # Operations
+
+    def op_snapshot(self, conn, table, start=0):
+        """One page of a table for a kiosk building its mirror; returns
+        {"rows": [(key, record), ...], "next": start of the next page or None}.
+
+        The keys are fixed when the first page is asked for. Rows changed
+        while the rest are paged out are also pushed, and the kiosk applies
+        those pushes after the whole mirror is loaded.
+        """
+        source = {"users": self.users, "admins": self.admins, "pending_admins": self.pending_admins,
+                  "slots": self.slots, "orders": self.orders}.get(table)
+        if source is None:
+            raise InvalidInput(f"Unknown table {table!r}")
+        if start == 0:
+            conn.snapshot[table] = list(source)
+        keys = conn.snapshot.get(table)
+        if keys is None:
+            raise InvalidInput("Snapshot pages must start from 0")
+        page = keys[start:start + self.SNAPSHOT_PAGE]
+        end = start + len(page)
+        if end >= len(keys):
+            del conn.snapshot[table]
+            end = None
+        return {"rows": [(k, self.visible(conn, table, k, source[k])) for k in page if k in source],
+                "next": end}
+
+    def op_get_user(self, conn, username):
+        return self.visible(conn, "users", username, self.users.get(username))
+
+    def op_get_slots(self):
+        return list(self.slots.items())
+
+    async def op_signup(self, username, password, phone):
+        self.service.check_signup(username, password, phone)
+        self.service.signup(username, password, phone, hashed=await self.hash(password))
+
+    async def op_login(self, conn, username, password):
+        self.service.check_login(username, password)
+        ok = await self.verify(password, self.service.password_hash("users", username))
+        record = self.service.login(username, password, verified=ok)
+        # A member at the kiosk doesn't inherit an earlier admin login
+        self.set_login(conn, username, None)
+        await self.upgrade_password("users", username, password)
+        return public(record)
+
+    async def op_verify_admin(self, conn, admin_id, password):
+        self.service.check_admin_login(admin_id, password)
+        ok = await self.verify(password, self.service.password_hash("admins", admin_id))
+        status = self.service.verify_admin(admin_id, password, verified=ok)
+        self.set_login(conn, conn.member, admin_id)
+        await self.upgrade_password("admins", admin_id, password)
+        return status
+
+    def op_logout(self, conn):
+        self.set_login(conn, None, None)
+
+    async def op_request_admin(self, admin_id, password, name):
+        self.service.check_admin_request(admin_id, password, name)
+        self.service.request_admin(admin_id, password, name, hashed=await self.hash(password))
+
+    def op_check_reset(self, username, phone):
+        """The phone check before a kiosk asks for the new password, done
+        here because kiosks aren't sent other members' phones"""
+        self.service.check_reset(username, phone)
+
+    async def op_reset_password(self, username, phone, password):
+        self.service.check_reset(username, phone)
+        self.service.check_new_password(password)
+        self.service.reset_password(username, phone, password, hashed=await self.hash(password))
+
+    def op_approve_user(self, username):
+        self.service.approve_user(username)
+
+    def op_reject_user(self, username):
+        self.service.reject_user(username)
+
+    def op_approve_admin(self, admin_id):
+        self.service.approve_admin(admin_id)
+
+    def op_reject_admin(self, admin_id):
+        self.service.reject_admin(admin_id)
+
+    def op_approve_users(self, usernames):
+        return self.service.approve_users(usernames)
+
+    def op_reject_users(self, usernames):
+        return self.service.reject_users(usernames)
+
+    def op_approve_admins(self, admin_ids):
+        return self.service.approve_admins(admin_ids)
+
+    def op_reject_admins(self, admin_ids):
+        return self.service.reject_admins(admin_ids)
+
+    def op_update_phone(self, username, phone):
+        self.service.update_phone(username, phone)
+
+    def op_assign_pc(self, username, pc_num):
+        self.service.assign_pc(username, pc_num)
+
+    def op_assign_any_pc(self, username, zone=None):
+        return self.service.assign_any_pc(username, zone)
+
+    def op_end_pc_session(self, username):
+        return self.service.end_pc_session(username)
+
+    def op_place_order(self, username, item_code):
+        return self.service.place_order(username, item_code)
+
+    def op_redeem(self, username, code):
+        return self.service.redeem(username, code)
+
+    def op_top_up(self, conn, username, code):
+        return self.service.top_up(username, code, conn.admin)
+
+    def op_kitchen_take(self, limit=None):
+        return self.service.kitchen_take(limit)
+
+    def op_kitchen_ready(self, ids):
+        self.service.kitchen_ready(ids)
+
+    def op_kitchen_deliver(self, ids):
+        self.service.kitchen_deliver(ids)
+
+    def op_sales_report(self):
+        return self.service.sales_report()
+
+    OPS = {name[3:]: func for name, func in list(locals().items()) if name.startswith("op_")}
+    # Given the kiosk's connection as their first argument
+    CONNECTION_OPS = {"snapshot", "get_user", "login", "verify_admin", "logout", "top_up"}
+    OPEN_OPS = {"snapshot", "get_user", "get_slots", "signup", "login", "verify_admin", "logout",
+                "request_admin", "check_reset", "reset_password"}
+    # Allowed to the member named by their ``username`` argument
+    MEMBER_OPS = {"update_phone", "assign_pc", "assign_any_pc", "end_pc_session", "place_order", "redeem"}
+
+
+def simulate(kiosks, rounds):
+    """Run a server and ``kiosks`` simulated kiosk clients on localhost"""
+    from Scripts.cafe_client import CafeClient, RemoteError
+
+    data_dir = tempfile.mkdtemp(prefix="cafe_sim_")
+    server = CafeServer(os.path.join(data_dir, "cafe.db"), os.path.join(data_dir, "journal.jsonl"))
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run_server():
+        asyncio.set_event_loop(loop)
+        listener = loop.run_until_complete(server.start(port=0))
+        server.port = listener.sockets[0].getsockname()[1]
+        started.set()
+        loop.run_forever()
+        # Let the connection handlers see their clients go away, then shut down
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        server.close()
+        loop.close()
+
+    server_thread = threading.Thread(target=run_server, daemon=True)
+    server_thread.start()
+    started.wait()
+
+    admin = CafeClient("127.0.0.1", server.port)
+    admin.call("verify_admin", admin_id=DEFAULT_ADMIN_ID, password=DEFAULT_ADMIN_PASSWORD)
+    # Every kiosk orders for and redeems from this member, racing for the same points
+    admin.call("signup", username="shared", password="pass1234", phone="09990000000")
+    admin.call("approve_user", username="shared")
+    redeemed = [0]
+    counts = [0] * kiosks
+    failures = []
+    kiosks_done = threading.Event()
+    delivered = [0]
+
+    def kitchen():
+        # Take a batch, mark it ready, deliver it; repeat until the kiosks stop
+        client = CafeClient("127.0.0.1", server.port)
+        try:
+            client.call("verify_admin", admin_id=DEFAULT_ADMIN_ID, password=DEFAULT_ADMIN_PASSWORD)
+            while True:
+                ids = client.call("kitchen_take")
+                if ids:
+                    client.call("kitchen_ready", ids=ids)
+                    client.call("kitchen_deliver", ids=ids)
+                    delivered[0] += len(ids)
+                elif kiosks_done.is_set():
+                    break
+                else:
+                    time.sleep(0.005)
+        except Exception as e:
+            failures.append(f"kitchen: {e}")
+        finally:
+            client.close()
+
+    kitchen_thread = threading.Thread(target=kitchen)
+    kitchen_thread.start()
+
+    def kiosk(k):
+        client = CafeClient("127.0.0.1", server.port)
+        # The shared member is logged in at every kiosk at once
+        shared = CafeClient("127.0.0.1", server.port)
+        try:
+            username = f"kiosk{k}"
+            client.call("signup", username=username, password="pass1234", phone=f"0917{k:07d}")
+            admin.call("approve_user", username=username)
+            client.call("login", username=username, password="pass1234")
+            shared.call("login", username="shared", password="pass1234")
+            # Logins are checked per connection and per member
+            for call in (lambda: shared.call("assign_any_pc", username=username),
+                         lambda: client.call("approve_user", username=username),
+                         lambda: client.call("top_up", username=username, code=next(iter(TOPUP_PACKAGES)))):
+                try:
+                    call()
+                    failures.append(f"kiosk {k}: acted without the right login")
+                except NotAllowed:
+                    pass
+            # Phones go to the member themselves and admins only
+            if "phone" in shared.call("get_user", username=username) or \
+                    "phone" not in client.call("get_user", username=username):
+                failures.append(f"kiosk {k}: phone sent to the wrong kiosk")
+            # A bad PC number gets a refusal, not silence
+            try:
+                client.call("assign_pc", username=username, pc_num=-1)
+            except RemoteError as e:
+                failures.append(f"kiosk {k}: bad PC number not refused: {e}")
+            except CafeError:
+                pass
+            for r in range(rounds):
+                if r % 2:
+                    # Let the server pick: no race to lose
+                    try:
+                        client.call("assign_any_pc", username=username)
+                    except Exception:
+                        counts[k] += 1
+                        continue  # Every PC is taken
+                    client.call("end_pc_session", username=username)
+                    counts[k] += 2
+                    continue
+                # Pipeline: ask for slots and order food without waiting in between
+                slots = client.submit("get_slots")
+                order = shared.submit("place_order", username="shared", item_code="B1")
+                redeem = shared.submit("redeem", username="shared", code="R30")
+                try:
+                    order.result()
+                except Exception:
+                    pass  # Kitchen queue full; the kiosk would say "try again"
+                try:
+                    redeem.result()
+                    redeemed[0] += 1
+                except CafeError:
+                    pass  # Not enough points yet
+                counts[k] += 3
+                for pc, status in slots.result():
+                    if status == "Vacant":
+                        try:
+                            client.call("assign_pc", username=username, pc_num=pc)
+                        except Exception:
+                            counts[k] += 1
+                            continue  # Lost the race to another kiosk
+                        client.call("end_pc_session", username=username)
+                        counts[k] += 3
+                        break
+        except Exception as e:
+            failures.append(f"kiosk {k}: {e}")
+        finally:
+            client.close()
+            shared.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=kiosk, args=(k,)) for k in range(kiosks)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    kiosks_done.set()
+    kitchen_thread.join()
+    elapsed = time.perf_counter() - start
+
+    occupied = sum(1 for s in server.slots.values() if s == "Occupied")
+    holders = sum(1 for u in server.users.values() if u["slot"])
+    try:
+        server.service.allocator.check()
+    except AssertionError as e:
+        failures.append(f"slot allocator: {e}")
+    server.journal.flush()
+    failures += [f"ledger: {u} {field} {want} != {have}" for u, field, want, have in check_ledger(server.store)]
+    admin.close()
+    loop.call_soon_threadsafe(loop.stop)
+    server_thread.join()
+
+    print(f"{kiosks} kiosks, {sum(counts)} requests in {elapsed:.2f}s "
+          f"({sum(counts) / elapsed:,.0f} req/s)")
+    print(f"Occupied slots: {occupied}, users holding a slot: {holders}")
+    print(f"Orders delivered by the kitchen: {delivered[0]}, still open: {len(server.orders)}")
+    print(f"Redemptions from the shared member: {redeemed[0]}, points left: {server.users['shared']['points']}")
+    for failure in failures:
+        print(failure)
+    return not failures and occupied == holders
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Central cafe server for kiosk clients")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--simulate", type=int, metavar="KIOSKS",
+                        help="Run a load test with this many simulated kiosks")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--metrics-port", type=int, default=DEFAULT_METRICS_PORT,
+                        help="Serve Prometheus metrics on 127.0.0.1 at this port (0 to disable)")
+    args = parser.parse_args()
+
+    if args.simulate:
+        raise SystemExit(0 if simulate(args.simulate, args.rounds) else 1)
+
+    server = CafeServer(os.path.join(DATA_DIR, "cafe_server.db"),
+                        os.path.join(DATA_DIR, "cafe_server_journal.jsonl"))
+    metrics = MetricsExporter(os.path.join(DATA_DIR, "cafe_server_metrics.jsonl"), args.metrics_port).start()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.start(args.host, args.port, args.unix))
+    print(f"Cafe server listening on {args.unix or f'{args.host}:{args.port}'}")
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        metrics.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,658 @@
+import itertools
+import time
+from collections.abc import Mapping
+from datetime import date, timedelta
+
+from Scripts.cafe_auth import hash_password, needs_rehash, verify_password
+from Scripts.cafe_config import (APPROVAL_MINUTES, FOOD_ITEMS, PC_ZONES, REDEEM_RULES, STREAK_BONUS_EVERY,
+                                 STREAK_BONUS_POINTS, TOPUP_PACKAGES)
+from Scripts.cafe_errors import (AlreadyExists, AuthFailed, InvalidInput, NoPlaytime, NotAllowed, NotApproved,
+                                 NotEnoughPoints, NotFound, PCUnavailable)
+from Scripts.cafe_ledger import ledger_entry
+from Scripts.cafe_metrics import timed
+from Scripts.cafe_slots import SlotAllocator
+
+MIN_PASSWORD = 4
+MIN_ADMIN_PASSWORD = 6
+
+
+class CafeChecks:
+    """The cheap validation half of each operation, run against whatever
+    copy of the tables the caller holds (a thin kiosk checks its mirror
+    before asking the server, which checks again).
+    """
+
+    def __init__(self, tables):
+        self.users = tables["users"]
+        self.admins = tables["admins"]
+        self.pending_admins = tables["pending_admins"]
+
+    def check_signup(self, username, password, phone):
+        if not username or not password or not phone:
+            raise InvalidInput("All fields are required!")
+        if len(password) < MIN_PASSWORD:
+            raise InvalidInput(f"Password must be at least {MIN_PASSWORD} characters!")
+        if username in self.users:
+            raise AlreadyExists("Username already exists!")
+        if self.users.find_by_phone(phone):
+            raise AlreadyExists("Phone number is already registered!")
+
+    def check_login(self, username, password):
+        if not username or not password:
+            raise InvalidInput("Username and password cannot be empty!")
+        if username not in self.users:
+            raise NotFound("Account not found!")
+
+    def check_reset(self, username, phone):
+        if not username or not phone:
+            raise InvalidInput("All fields are required!")
+        if username not in self.users:
+            raise NotFound("Username not found!")
+        if username not in self.users.find_by_phone(phone):
+            raise InvalidInput("Phone number does not match!")
+
+    def check_new_password(self, password):
+        if not password:
+            raise InvalidInput("Password cannot be empty!")
+        if len(password) < MIN_PASSWORD:
+            raise InvalidInput(f"Password must be at least {MIN_PASSWORD} characters!")
+
+    def check_admin_request(self, admin_id, password, name):
+        if not admin_id or not password or not name:
+            raise InvalidInput("All fields are required!")
+        if len(password) < MIN_ADMIN_PASSWORD:
+            raise InvalidInput(f"Password must be at least {MIN_ADMIN_PASSWORD} characters!")
+        if admin_id in self.admins or admin_id in self.pending_admins:
+            raise AlreadyExists("Admin ID already exists!")
+
+    def check_admin_login(self, admin_id, password):
+        if admin_id not in self.admins:
+            raise AuthFailed("Incorrect admin ID or password!")
+
+
+class CafeService(CafeChecks):
+    """Every cafe rule and state change, with no UI attached.
+
+    Methods raise CafeError subclasses (Scripts/cafe_errors.py) carrying the
+    message to show, instead of opening dialogs, so the same code backs the
+    standalone kiosk, the cafe server and the benchmarks.
+
+    Hashing a password takes tens of milliseconds, so operations that need
+    one come in halves: ``check_*`` validates cheaply, the caller hashes
+    wherever suits it (a worker thread, an executor) and passes
+    ``hashed=``/``verified=`` to the operation itself. Left out, the
+    operation hashes inline.
+
+    ``sessions`` is an optional SessionClock the owner attaches; it is
+    started and stopped as PCs are claimed and released. ``on_commit`` is
+    called with every change set after it is journaled.
+
+    A member's "points" and "time" are running totals. Every change to
+    them goes through post() and is journaled with a matching ledger
+    entry in the same commit (see Scripts/cafe_ledger.py), except the
+    minutes a running session uses, which are counted in
+    "session_minutes" and entered when the session ends.
+    """
+
+    def __init__(self, tables, journal, store, items=FOOD_ITEMS, zones=PC_ZONES):
+        super().__init__(tables)
+        self.slots = tables["slots"]
+        self.orders = tables["orders"]
+        self.journal = journal
+        self.store = store
+        self.items = items
+        self.allocator = SlotAllocator(self.slots, self.users, zones)
+        self.session_ids = itertools.count(store.max_key("session_history") + 1)
+        self.ledger_ids = itertools.count(store.max_key("ledger") + 1)
+        self.redeem_rules = REDEEM_RULES
+        self.topups = TOPUP_PACKAGES
+        self.analytics = None
+        self.sessions = None
+        self.on_commit = None
+        self.rollover_day = store.meta("rollover_day")  # Last day closed, as a date ordinal
+
+    @timed("service.commit")
+    def commit(self, kind, users=(), admins=(), pending_admins=(), slots=(), orders=(), history=None,
+               meta=None):
+        """Journal the current value of the given keys (None if deleted).
+
+        ``history`` maps a history table (order_history, session_history)
+        to finished records to append to it, ``meta`` store counters to set.
+        """
+        changes = {}
+        for table, keys in (("users", users), ("admins", admins),
+                            ("pending_admins", pending_admins), ("slots", slots), ("orders", orders)):
+            if keys:
+                source = getattr(self, table)
+                # Copy records so later edits don't race the journal writer
+                changes[table] = [(k, source[k].copy() if isinstance(source.get(k), Mapping) else source.get(k))
+                                  for k in keys]
+        for table, records in (history or {}).items():
+            changes[table] = [(r["id"], r) for r in records]
+        if meta:
+            changes["meta"] = list(meta.items())
+        self.journal.append(kind, changes)
+        if self.on_commit:
+            self.on_commit({t: rows for t, rows in changes.items() if t not in (history or ())})
+
+    # Passwords
+
+    def password_hash(self, table, key):
+        """Stored hash of a member ("users") or admin ("admins"), to verify off-thread.
+
+        Run check_login / check_admin_login first.
+        """
+        return getattr(self, table)[key]["password"]
+
+    def set_password_hash(self, table, key, hashed):
+        """Store a re-hashed password (after needs_rehash) if the account still exists"""
+        records = getattr(self, table)
+        if key in records:
+            records[key]["password"] = hashed
+            self.commit("rehash_password", **{table: [key]})
+
+    def needs_rehash(self, table, key):
+        records = getattr(self, table)
+        return key in records and needs_rehash(records[key]["password"])
+
+    # Members
+
+    @timed("service.signup")
+    def signup(self, username, password, phone, hashed=None):
+        """Create a pending account"""
+        # Checked again: another sign-up may have landed while hashing
+        self.check_signup(username, password, phone)
+        self.users[username] = {
+            "password": hashed or hash_password(password),
+            "phone": phone,
+            "time": 0,
+            "points": 0,
+            "streak": 0,
+            "last_login": None,
+            "status": "Pending",
+            "slot": None
+        }
+        self.commit("signup", users=[username])
+
+    @timed("service.login")
+    def login(self, username, password, verified=None):
+        """Check a member's password; returns their record"""
+        self.check_login(username, password)
+        if verified is None:
+            verified = verify_password(password, self.users[username]["password"])
+        if not verified:
+            raise AuthFailed("Incorrect password!")
+        if self.users[username]["status"] != "Approved":
+            raise NotApproved("Your account is pending admin approval.")
+        self.record_login(username)
+        return self.users[username]
+
+    def record_login(self, username, today=None):
+        """Extend or restart the member's streak on their first login of the day.
+
+        If their last login was on a day that has ended but that the
+        rollover hasn't closed yet, that day's streak bonus is paid here,
+        before the streak moves on; close_days then skips them.
+        """
+        today = today or date.today()
+        info = self.users[username]
+        last = info.get("last_login")
+        key = today.isoformat()
+        if last == key:
+            return
+        streak = info.get("streak") or 0
+        entries = []
+        closed = date.fromordinal(self.rollover_day).isoformat() if self.rollover_day else ""
+        if last and closed < last < key and streak and not streak % STREAK_BONUS_EVERY:
+            entries.append(self.post(username, "streak_bonus", points=STREAK_BONUS_POINTS, day=last))
+        yesterday = (today - timedelta(days=1)).isoformat()
+        info["streak"] = streak + 1 if last == yesterday else 1
+        info["last_login"] = key
+        self.commit("login", users=[username], history={"ledger": entries} if entries else None)
+
+    # Streak rollover, planned off-thread by Scripts/cafe_loyalty.py
+
+    @timed("service.close_days")
+    def close_days(self, until, rewarded):
+        """Pay STREAK_BONUS_POINTS to ``rewarded`` and mark every day up to
+        ``until`` (a date ordinal) closed, in one change, so a bonus is
+        never paid twice. Returns the usernames paid.
+        """
+        key = date.fromordinal(until).isoformat()
+        # Anyone who has logged in since the plan was made was paid by record_login
+        paid = [u for u in dict.fromkeys(rewarded)
+                if u in self.users and (self.users[u].get("last_login") or "") <= key]
+        entries = [self.post(u, "streak_bonus", points=STREAK_BONUS_POINTS) for u in paid]
+        self.rollover_day = until
+        self.commit("close_days", users=paid, history={"ledger": entries}, meta={"rollover_day": until})
+        return paid
+
+    @timed("service.break_streaks")
+    def break_streaks(self, until, usernames):
+        """Zero the streaks of members who missed day ``until`` (an ordinal),
+        skipping any who have logged in since; returns those changed"""
+        key = date.fromordinal(until).isoformat()
+        broken = []
+        for username in usernames:
+            info = self.users.get(username)
+            if info is not None and info.get("streak") and (info.get("last_login") or "") < key:
+                info["streak"] = 0
+                broken.append(username)
+        if broken:
+            self.commit("break_streaks", users=broken)
+        return broken
+
+    @timed("service.reset_password")
+    def reset_password(self, username, phone, password, hashed=None):
+        self.check_reset(username, phone)
+        self.check_new_password(password)
+        self.users[username]["password"] = hashed or hash_password(password)
+        self.commit("reset_password", users=[username])
+
+    @timed("service.update_phone")
+    def update_phone(self, username, phone):
+        if not phone:
+            raise InvalidInput("Phone number cannot be empty!")
+        if self.users.find_by_phone(phone) - {username}:
+            raise AlreadyExists("Phone number is already registered!")
+        if username in self.users:
+            self.users[username]["phone"] = phone
+            self.commit("update_phone", users=[username])
+
+    @timed("service.approve_user")
+    def approve_user(self, username):
+        if username not in self.users:
+            raise NotFound("Account not found!")
+        if self.users[username]["status"] != "Pending":
+            return  # Already approved; the playtime is granted once
+        self.users[username]["status"] = "Approved"
+        entry = self.post(username, "approval", minutes=APPROVAL_MINUTES)
+        self.commit("approve_user", users=[username], history={"ledger": [entry]})
+
+    @timed("service.reject_user")
+    def reject_user(self, username):
+        if username not in self.users:
+            raise NotFound("Account not found!")
+        self.end_pc_session(username)
+        entries = self.close_account(username)
+        del self.users[username]
+        self.commit("reject_user", users=[username], history={"ledger": entries})
+
+    @timed("service.approve_users")
+    def approve_users(self, usernames):
+        """Approve many pending members as one journaled change; returns those approved.
+
+        Names already decided (or gone) are skipped: another admin may
+        have got there first.
+        """
+        approved = [u for u in dict.fromkeys(usernames)
+                    if u in self.users and self.users[u]["status"] == "Pending"]
+        entries = []
+        for username in approved:
+            self.users[username]["status"] = "Approved"
+            entries.append(self.post(username, "approval", minutes=APPROVAL_MINUTES))
+        if approved:
+            self.commit("approve_users", users=approved, history={"ledger": entries})
+        return approved
+
+    @timed("service.reject_users")
+    def reject_users(self, usernames):
+        """Delete many pending members as one journaled change; returns those rejected"""
+        rejected = [u for u in dict.fromkeys(usernames)
+                    if u in self.users and self.users[u]["status"] == "Pending"]
+        entries = []
+        for username in rejected:
+            self.end_pc_session(username)
+            entries += self.close_account(username)
+        self.users.remove_many(rejected)
+        if rejected:
+            self.commit("reject_users", users=rejected, history={"ledger": entries})
+        return rejected
+
+    # Admins
+
+    @timed("service.verify_admin")
+    def verify_admin(self, admin_id, password, verified=None):
+        """Check an admin's password; returns their status"""
+        self.check_admin_login(admin_id, password)
+        stored = self.admins[admin_id]["password"]
+        if verified is None:
+            verified = verify_password(password, stored)
+        if not verified:
+            raise AuthFailed("Incorrect admin ID or password!")
+        if self.admins[admin_id]["status"] != "Approved":
+            raise NotApproved("Your admin account is pending approval!")
+        return self.admins[admin_id]["status"]
+
+    @timed("service.request_admin")
+    def request_admin(self, admin_id, password, name, hashed=None):
+        self.check_admin_request(admin_id, password, name)
+        self.pending_admins[admin_id] = {"password": hashed or hash_password(password),
+                                         "name": name, "status": "Pending"}
+        self.commit("request_admin", pending_admins=[admin_id])
+
+    @timed("service.approve_admin")
+    def approve_admin(self, admin_id):
+        if admin_id not in self.pending_admins:
+            raise NotFound("Admin request not found!")
+        admin_info = self.pending_admins.pop(admin_id)
+        self.admins[admin_id] = {"password": admin_info["password"], "name": admin_info["name"],
+                                 "status": "Approved"}
+        self.commit("approve_admin", admins=[admin_id], pending_admins=[admin_id])
+
+    @timed("service.reject_admin")
+    def reject_admin(self, admin_id):
+        if self.pending_admins.pop(admin_id, None) is None:
+            raise NotFound("Admin request not found!")
+        self.commit("reject_admin", pending_admins=[admin_id])
+
+    @timed("service.approve_admins")
+    def approve_admins(self, admin_ids):
+        """Approve many admin requests as one journaled change; returns those approved"""
+        approved = [a for a in dict.fromkeys(admin_ids) if a in self.pending_admins]
+        for admin_id in approved:
+            admin_info = self.pending_admins.pop(admin_id)
+            self.admins[admin_id] = {"password": admin_info["password"], "name": admin_info["name"],
+                                     "status": "Approved"}
+        if approved:
+            self.commit("approve_admins", admins=approved, pending_admins=approved)
+        return approved
+
+    @timed("service.reject_admins")
+    def reject_admins(self, admin_ids):
+        """Drop many admin requests as one journaled change; returns those rejected"""
+        rejected = [a for a in dict.fromkeys(admin_ids) if self.pending_admins.pop(a, None) is not None]
+        if rejected:
+            self.commit("reject_admins", pending_admins=rejected)
+        return rejected
+
+    # PCs
+
+    def check_can_play(self, username):
+        if username not in self.users:
+            raise NotFound("Account not found!")
+        if self.users[username]["time"] <= 0:
+            raise NoPlaytime("You have no playtime left. Please top up at the counter.")
+        if self.users[username]["slot"]:
+            raise PCUnavailable(f"You are already using PC {self.users[username]['slot']}!")
+
+    @timed("service.assign_pc")
+    def assign_pc(self, username, pc_num):
+        self.check_can_play(username)
+        if pc_num not in self.slots:
+            raise NotFound("No such PC!")
+        if not self.allocator.try_claim(pc_num, username):
+            raise PCUnavailable("PC is no longer available!")
+        self.started(username, pc_num)
+
+    @timed("service.assign_any_pc")
+    def assign_any_pc(self, username, zone=None):
+        """Claim the first free PC (in ``zone`` if given); returns its number"""
+        self.check_can_play(username)
+        pc = self.allocator.claim_any(username, zone)
+        if pc is None:
+            raise PCUnavailable(f"No {zone + ' ' if zone else ''}PCs are free right now!")
+        self.started(username, pc)
+        return pc
+
+    def started(self, username, pc):
+        self.commit("assign_pc", users=[username], slots=[pc])
+        if self.sessions:
+            self.sessions.start(username, self.users[username]["time"])
+
+    @timed("service.end_pc_session")
+    def end_pc_session(self, username):
+        """Free the member's PC; returns its number or None if they had none"""
+        since = self.users[username].get("since") if username in self.users else None
+        pc = self.allocator.release(username)
+        if not pc:
+            return None
+        history = {}
+        if since:
+            session = {"id": next(self.session_ids), "username": username, "pc": pc,
+                       "start": since, "end": round(time.time(), 3)}
+            history["session_history"] = [session]
+            if self.analytics:
+                self.analytics.add_session(session)
+        # The minutes were taken off the balance as they were used
+        used = self.users[username].get("session_minutes")
+        if used:
+            self.users[username]["session_minutes"] = 0
+            history["ledger"] = [ledger_entry(next(self.ledger_ids), username, "play", minutes=-used, pc=pc)]
+        self.commit("end_pc_session", users=[username], slots=[pc], history=history)
+        if self.sessions:
+            self.sessions.stop(username)
+        return pc
+
+    @timed("service.charge_minute")
+    def charge_minute(self, username):
+        """Take one minute off a running session; returns the minutes left"""
+        info = self.users.get(username)
+        if info is None or not info["slot"]:
+            return 0
+        if info["time"] > 0:
+            info["time"] -= 1
+            info["session_minutes"] = (info.get("session_minutes") or 0) + 1
+        self.commit("session_minute", users=[username])
+        return info["time"]
+
+    # Points and minutes
+
+    def post(self, username, kind, points=0, minutes=0, **details):
+        """Credit (positive) or debit (negative) a member's running totals.
+
+        Returns the ledger entry, which the caller commits together with
+        the member (history={"ledger": [...]}).
+        """
+        info = self.users[username]
+        if points:
+            info["points"] += points
+        if minutes:
+            info["time"] += minutes
+        return ledger_entry(next(self.ledger_ids), username, kind, points, minutes, **details)
+
+    def close_account(self, username):
+        """Ledger entries taking a leaving member's balance to zero"""
+        info = self.users[username]
+        if not info["points"] and not info["time"]:
+            return []
+        return [self.post(username, "closed", points=-info["points"], minutes=-info["time"])]
+
+    @timed("service.redeem")
+    def redeem(self, username, code):
+        """Trade points for playtime by a REDEEM_RULES code; returns the minutes added"""
+        if username not in self.users:
+            raise NotFound("Account not found!")
+        rule = self.redeem_rules.get(code)
+        if rule is None:
+            raise NotFound("Unknown reward!")
+        # Checked and debited in one step, so two kiosks can't spend the same points
+        if self.users[username]["points"] < rule["points"]:
+            raise NotEnoughPoints(f"{rule['name']} needs {rule['points']} points, "
+                                  f"you have {self.users[username]['points']}.")
+        entry = self.post(username, "redeem", points=-rule["points"], minutes=rule["minutes"], rule=code)
+        self.commit("redeem", users=[username], history={"ledger": [entry]})
+        return rule["minutes"]
+
+    @timed("service.top_up")
+    def top_up(self, username, code, admin_id):
+        """Add playtime by a TOPUP_PACKAGES code once ``admin_id`` has taken
+        payment at the counter; returns the minutes added"""
+        if self.admins.get(admin_id, {}).get("status") != "Approved":
+            raise NotAllowed("An admin must log in to add playtime.")
+        if username not in self.users:
+            raise NotFound("Account not found!")
+        package = self.topups.get(code)
+        if package is None:
+            raise NotFound("Unknown playtime package!")
+        entry = self.post(username, "topup", minutes=package["minutes"], package=code, price=package["price"],
+                          admin=admin_id)
+        self.commit("top_up", users=[username], history={"ledger": [entry]})
+        return package["minutes"]
+
+    # Orders
+
+    @timed("service.place_order")
+    def place_order(self, username, item_code):
+        """Queue an order for the kitchen; returns its id"""
+        if username not in self.users:
+            raise NotFound("Account not found!")
+        if item_code not in self.items:
+            raise NotFound("Unknown menu item!")
+        order = self.orders.place(username, item_code, self.items[item_code])
+        entry = self.post(username, "order", points=order["points"], order=order["id"])
+        self.commit("place_order", users=[username], orders=[order["id"]], history={"ledger": [entry]})
+        return order["id"]
+
+    @timed("service.kitchen_take")
+    def kitchen_take(self, limit=None):
+        """Start preparing the next batch of waiting orders; returns their ids"""
+        ids = self.orders.take_batch(limit)
+        if ids:
+            self.commit("take_orders", orders=ids)
+        return ids
+
+    @timed("service.kitchen_ready")
+    def kitchen_ready(self, ids):
+        ids = self.orders.advance(ids, "Ready")
+        if ids:
+            self.commit("orders_ready", orders=ids)
+
+    @timed("service.kitchen_deliver")
+    def kitchen_deliver(self, ids):
+        done = self.orders.finish(ids)
+        if done:
+            self.commit("deliver_orders", orders=[r["id"] for r in done],
+                        history={"order_history": done})
+            if self.analytics:
+                for order in done:
+                    self.analytics.add_order(order)
+
+    @timed("service.sales_report")
+    def sales_report(self):
+        """Sales and utilization figures over all history"""
+        # Read the history once, then keep it current as orders and sessions finish
+        if self.analytics is None:
+            from Scripts.cafe_analytics import SalesHistory  # numpy, if installed, is slow to import
+            self.journal.flush()  # History rows still queued for the store
+            self.analytics = SalesHistory.load(self.store, self.items)
+        return self.analytics.report(len(self.slots))
+
+    # Bulk transfer (Scripts/cafe_transfer.py validates the rows)
+
+    @timed("service.add_users")
+    def add_users(self, rows):
+        """Insert checked (username, record) rows as one journaled change"""
+        self.users.add_many(rows)
+        # The imported balances open each member's ledger
+        entries = [ledger_entry(next(self.ledger_ids), username, "import", record["points"], record["time"])
+                   for username, record in rows if record["points"] or record["time"]]
+        self.commit("import_users", users=[username for username, _ in rows], history={"ledger": entries})
+
+    @timed("service.add_admins")
+    def add_admins(self, rows):
+        """Insert checked (admin_id, record) rows; "Pending" ones become admin requests"""
+        approved, pending = [], []
+        for admin_id, record in rows:
+            if record["status"] == "Pending":
+                self.pending_admins[admin_id] = record
+                pending.append(admin_id)
+            else:
+                self.admins[admin_id] = record
+                approved.append(admin_id)
+        self.commit("import_admins", admins=approved, pending_admins=pending)
+
+
+class RemoteService(CafeChecks):
+    """CafeService's operations carried out by the cafe server.
+
+    ``tables`` is the kiosk's pushed mirror, used only for the check_*
+    halves. The server hashes and verifies passwords itself, so hashed=
+    and verified= are ignored; errors arrive as the same CafeError types
+    (see CafeClient). The mirror lacks other members' phones unless an
+    admin is logged in, so check_reset asks the server.
+    """
+
+    def __init__(self, client, tables):
+        super().__init__(tables)
+        self.client = client
+
+    def check_reset(self, username, phone):
+        self.client.call("check_reset", username=username, phone=phone)
+
+    def signup(self, username, password, phone, hashed=None):
+        self.client.call("signup", username=username, password=password, phone=phone)
+
+    def login(self, username, password, verified=None):
+        return self.client.call("login", username=username, password=password)
+
+    def reset_password(self, username, phone, password, hashed=None):
+        self.client.call("reset_password", username=username, phone=phone, password=password)
+
+    def logout(self):
+        """End the member and admin logins this kiosk holds on the server"""
+        self.client.call("logout")
+
+    def update_phone(self, username, phone):
+        self.client.call("update_phone", username=username, phone=phone)
+
+    def approve_user(self, username):
+        self.client.call("approve_user", username=username)
+
+    def reject_user(self, username):
+        self.client.call("reject_user", username=username)
+
+    def verify_admin(self, admin_id, password, verified=None):
+        return self.client.call("verify_admin", admin_id=admin_id, password=password)
+
+    def request_admin(self, admin_id, password, name, hashed=None):
+        self.client.call("request_admin", admin_id=admin_id, password=password, name=name)
+
+    def approve_admin(self, admin_id):
+        self.client.call("approve_admin", admin_id=admin_id)
+
+    def reject_admin(self, admin_id):
+        self.client.call("reject_admin", admin_id=admin_id)
+
+    def approve_users(self, usernames):
+        return self.client.call("approve_users", usernames=list(usernames))
+
+    def reject_users(self, usernames):
+        return self.client.call("reject_users", usernames=list(usernames))
+
+    def approve_admins(self, admin_ids):
+        return self.client.call("approve_admins", admin_ids=list(admin_ids))
+
+    def reject_admins(self, admin_ids):
+        return self.client.call("reject_admins", admin_ids=list(admin_ids))
+
+    def assign_pc(self, username, pc_num):
+        self.client.call("assign_pc", username=username, pc_num=pc_num)
+
+    def assign_any_pc(self, username, zone=None):
+        return self.client.call("assign_any_pc", username=username, zone=zone)
+
+    def end_pc_session(self, username):
+        return self.client.call("end_pc_session", username=username)
+
+    def place_order(self, username, item_code):
+        return self.client.call("place_order", username=username, item_code=item_code)
+
+    def redeem(self, username, code):
+        return self.client.call("redeem", username=username, code=code)
+
+    def top_up(self, username, code, admin_id):
+        # The server records the admin logged in on this connection
+        return self.client.call("top_up", username=username, code=code)
+
+    def kitchen_take(self, limit=None):
+        return self.client.call("kitchen_take", limit=limit)
+
+    def kitchen_ready(self, ids):
+        self.client.call("kitchen_ready", ids=list(ids))
+
+    def kitchen_deliver(self, ids):
+        self.client.call("kitchen_deliver", ids=list(ids))
+
+    def sales_report(self):
+        return self.client.call("sales_report")
@@ -0,0 +1,75 @@
+import heapq
+import time
+
+
+class SessionClock:
+    """Counts down playtime for every occupied PC from a single after() tick.
+
+    Each active session has one entry in a min-heap keyed by the wall-clock
+    time its next minute is due, so a tick only touches sessions whose
+    minute has actually elapsed instead of scanning every member.
+
+    The owner supplies the callbacks:
+
+    - ``on_minute(username)`` charges one minute and returns the minutes left
+    - ``on_low_time(username, minutes)`` is called once at LOW_TIME minutes
+    - ``on_expired(username)`` is called when the balance reaches zero
+    """
+
+    TICK_MS = 1000
+    LOW_TIME = 5
+
+    def __init__(self, widget, on_minute, on_low_time, on_expired):
+        self.widget = widget
+        self.on_minute = on_minute
+        self.on_low_time = on_low_time
+        self.on_expired = on_expired
+        self.heap = []
+        self.active = {}  # username -> generation of its live heap entry
+        self.generation = 0
+        self.after_id = None
+
+    def start(self, username, minutes_left):
+        """Begin (or restart) counting down a session"""
+        self.generation += 1
+        self.active[username] = self.generation
+        now = time.time()
+        due = now + 60 if minutes_left > 0 else now
+        heapq.heappush(self.heap, (due, self.generation, username))
+
+    def stop(self, username):
+        # The heap entry is left behind and skipped when it comes due
+        self.active.pop(username, None)
+
+    def run(self):
+        if self.after_id is None:
+            self.after_id = self.widget.after(self.TICK_MS, self.tick)
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+
+    def tick(self):
+        now = time.time()
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            due, generation, username = heapq.heappop(heap)
+            if self.active.get(username) != generation:
+                continue  # Session ended or was restarted
+
+            minutes_left = self.on_minute(username)
+            if minutes_left <= 0:
+                self.active.pop(username, None)
+                self.on_expired(username)
+                continue
+            if minutes_left == self.LOW_TIME:
+                self.on_low_time(username, minutes_left)
+            heapq.heappush(heap, (due + 60, generation, username))
+
+        # Drop dead entries once they outnumber live ones
+        if len(heap) > 64 and len(heap) > 2 * len(self.active):
+            self.heap = [e for e in heap if self.active.get(e[2]) == e[1]]
+            heapq.heapify(self.heap)
+
+        self.after_id = self.widget.after(self.TICK_MS, self.tick)
@@ -0,0 +1,178 @@
+import argparse
+import random
+import threading
+import time
+
+from Scripts.cafe_config import PC_ZONES
+
+
+class SlotAllocator:
+    """Hands out PCs so that no two members can ever hold the same one.
+
+    Free PCs are kept as bits in one integer (bit n set = PC n free) next to
+    a mask per zone, so finding a free PC is a single lowest-set-bit lookup
+    instead of a scan. Every claim and release happens under one lock and
+    updates the bitmap, the ``slots`` dict ("Vacant"/"Occupied"), the
+    member's "slot" and "since" (session start) fields and the PC ->
+    member map together.
+
+    ``slots`` and ``users`` are the live tables; the caller journals the
+    change after a successful claim or release.
+    """
+
+    def __init__(self, slots, users, zones=PC_ZONES):
+        self.slots = slots
+        self.users = users
+        self.lock = threading.Lock()
+        self.holders = {}  # pc -> username
+        self.free = 0
+        self.zone_masks = {name: self.mask(pcs) for name, pcs in zones.items()}
+        self.rebuild()
+
+    @staticmethod
+    def mask(pcs):
+        bits = 0
+        for pc in pcs:
+            bits |= 1 << pc
+        return bits
+
+    def rebuild(self):
+        """Recompute the bitmap and holder map from the tables.
+
+        Members are the source of truth: a PC marked Occupied that nobody
+        holds (e.g. left over from a crash) is freed again.
+        """
+        with self.lock:
+            self.holders = {}
+            for username, info in self.users.items():
+                pc = info.get("slot")
+                if pc in self.slots and pc not in self.holders:
+                    self.holders[pc] = username
+                elif pc:
+                    info["slot"] = None  # Unknown or double-booked PC
+            self.free = 0
+            for pc in self.slots:
+                if pc in self.holders:
+                    self.slots[pc] = "Occupied"
+                else:
+                    self.slots[pc] = "Vacant"
+                    self.free |= 1 << pc
+
+    def is_free(self, pc):
+        return bool(self.free >> pc & 1)
+
+    def holder(self, pc):
+        return self.holders.get(pc)
+
+    def free_count(self, zone=None):
+        free = self.free & self.zone_masks[zone] if zone else self.free
+        return bin(free).count("1")
+
+    def try_claim(self, pc, username):
+        """Claim ``pc`` only if it is still free; returns True on success"""
+        bit = 1 << pc
+        with self.lock:
+            if not self.free & bit or self.users[username].get("slot"):
+                return False
+            self.take(pc, bit, username)
+            return True
+
+    def claim_any(self, username, zone=None):
+        """Claim the lowest-numbered free PC (in ``zone`` if given); returns it or None"""
+        with self.lock:
+            free = self.free & self.zone_masks[zone] if zone else self.free
+            if not free or self.users[username].get("slot"):
+                return None
+            bit = free & -free
+            pc = bit.bit_length() - 1
+            self.take(pc, bit, username)
+            return pc
+
+    def take(self, pc, bit, username):
+        self.free &= ~bit
+        self.holders[pc] = username
+        self.slots[pc] = "Occupied"
+        self.users[username]["slot"] = pc
+        self.users[username]["since"] = round(time.time(), 3)
+
+    def release(self, username):
+        """Free the member's PC; returns the PC number or None if they had none"""
+        with self.lock:
+            info = self.users.get(username)
+            pc = info.get("slot") if info else None
+            if not pc:
+                return None
+            info["slot"] = None
+            info["since"] = None
+            if self.holders.get(pc) == username:
+                del self.holders[pc]
+                self.slots[pc] = "Vacant"
+                self.free |= 1 << pc
+            return pc
+
+    def check(self):
+        """Raise AssertionError if the bitmap, slots and members disagree"""
+        with self.lock:
+            held = {}
+            for username, info in self.users.items():
+                pc = info.get("slot")
+                if pc:
+                    assert pc not in held, f"PC {pc} held by {held.get(pc)} and {username}"
+                    held[pc] = username
+            assert held == self.holders, "PC -> member map is out of date"
+            for pc, status in self.slots.items():
+                free = self.is_free(pc)
+                assert free == (status == "Vacant"), f"PC {pc} bitmap says free={free}, slot is {status}"
+                assert free == (pc not in held), f"PC {pc} free={free} but held by {held.get(pc)}"
+
+
+def stress(workers, claims, pcs):
+    """Hammer one allocator from many threads and check it stays consistent"""
+    slots = {pc: "Vacant" for pc in range(1, pcs + 1)}
+    users = {f"member{i}": {"slot": None} for i in range(workers * 4)}
+    zones = {"A": range(1, pcs // 2 + 1), "B": range(pcs // 2 + 1, pcs + 1)}
+    allocator = SlotAllocator(slots, users, zones)
+    names = list(users)
+    wins = [0] * workers
+    barrier = threading.Barrier(workers)
+
+    def worker(w):
+        rng = random.Random(w)
+        mine = names[w::workers]
+        barrier.wait()
+        for _ in range(claims):
+            username = rng.choice(mine)
+            roll = rng.random()
+            if roll < 0.4:
+                wins[w] += allocator.try_claim(rng.randint(1, pcs), username)
+            elif roll < 0.7:
+                wins[w] += allocator.claim_any(username, rng.choice((None, "A", "B"))) is not None
+            else:
+                allocator.release(username)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    allocator.check()
+    total = workers * claims
+    print(f"{workers} threads, {total} operations on {pcs} PCs in {elapsed:.2f}s "
+          f"({total / elapsed:,.0f} ops/s), {sum(wins)} successful claims")
+    print(f"{pcs - allocator.free_count()} PCs held at the end; allocator is consistent")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress test the PC slot allocator")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--claims", type=int, default=5000, help="Operations per thread")
+    parser.add_argument("--pcs", type=int, default=40)
+    args = parser.parse_args()
+    stress(args.threads, args.claims, args.pcs)
+
+
+if __name__ == "__main__":
+    main()
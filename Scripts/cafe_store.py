@@ -0,0 +1,147 @@
+import json
+import sqlite3
+import threading
+import time
+
+# Tables mirrored from MainApp's dictionaries. Each record is kept as a JSON
+# blob keyed by its id so new fields don't need a schema migration.
+# The history tables are append-only: delivered orders, finished PC
+# sessions and every change to a member's points and minutes (the ledger)
+# land there and are only read back column-wise for reports and checks.
+TABLES = ("users", "admins", "pending_admins", "slots", "orders", "order_history", "session_history", "ledger")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (key TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS admins (key TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS pending_admins (key TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS slots (key INTEGER PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS orders (key INTEGER PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS order_history (key INTEGER PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS session_history (key INTEGER PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS ledger (key INTEGER PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+# Statements are built once so sqlite3's statement cache reuses the
+# prepared versions for every batch.
+UPSERT_SQL = {t: f"INSERT OR REPLACE INTO {t} (key, data) VALUES (?, ?)" for t in TABLES}
+DELETE_SQL = {t: f"DELETE FROM {t} WHERE key = ?" for t in TABLES}
+SELECT_SQL = {t: f"SELECT key, data FROM {t}" for t in TABLES}
+
+
+class CafeStore:
+    """SQLite storage for users, admins, PC slots and orders"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, cached_statements=64)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def load(self, table):
+        """Return a whole table as a dict"""
+        with self.lock:
+            rows = self.conn.execute(SELECT_SQL[table]).fetchall()
+        return {key: json.loads(data) for key, data in rows}
+
+    def columns(self, table, fields, order_by):
+        """Selected fields of every record as rows of tuples, sorted by one field.
+
+        SQLite pulls the fields out of the JSON, so no Python dicts are built.
+        The field "key" is the row's key.
+        """
+        column = lambda f: "key" if f == "key" else f"json_extract(data, '$.{f}')"
+        select = ", ".join(map(column, fields))
+        with self.lock:
+            return self.conn.execute(f"SELECT {select} FROM {table} ORDER BY {column(order_by)}").fetchall()
+
+    def max_key(self, table):
+        """Largest key in an integer-keyed table (0 if empty)"""
+        with self.lock:
+            row = self.conn.execute(f"SELECT MAX(key) FROM {table}").fetchone()
+        return row[0] or 0
+
+    def last_seq(self):
+        """Sequence number of the last journal event written to the database"""
+        return self.meta("seq")
+
+    def meta(self, key):
+        """A counter kept in the meta table (0 if never set)"""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def open_ledger(self):
+        """Give each member an "opening" ledger entry for the points and
+        minutes they had before there was a ledger; returns how many.
+
+        Runs once per database, in one transaction, entirely in SQLite.
+        """
+        with self.lock:
+            if self.conn.execute("SELECT value FROM meta WHERE key = 'ledger'").fetchone():
+                return 0
+            points = "COALESCE(json_extract(data, '$.points'), 0)"
+            minutes = "COALESCE(json_extract(data, '$.time'), 0)"
+            with self.conn:
+                start = self.conn.execute("SELECT COALESCE(MAX(key), 0) FROM ledger").fetchone()[0]
+                opened = self.conn.execute(
+                    f"INSERT INTO ledger (key, data) "
+                    f"SELECT :start + n, json_object('id', :start + n, 'username', key, 'kind', 'opening', "
+                    f"'points', points, 'minutes', minutes, 'at', :at) "
+                    f"FROM (SELECT key, {points} AS points, {minutes} AS minutes, "
+                    f"ROW_NUMBER() OVER (ORDER BY key) AS n FROM users WHERE {points} != 0 OR {minutes} != 0)",
+                    {"start": start, "at": round(time.time(), 3)}).rowcount
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('ledger', 1)")
+            return opened
+
+    def apply_batch(self, batch, seq=None):
+        """Write a list of change sets in a single transaction.
+
+        A change set maps table name -> [(key, record), ...]; a record of
+        None deletes the row. The "meta" table takes [(key, integer), ...].
+        ``seq`` records the last journal event the batch covers.
+        """
+        upserts = {t: {} for t in TABLES}
+        deletes = {t: set() for t in TABLES}
+        meta = {}
+        # Later changes win, so only the final value of each row is written
+        for changes in batch:
+            for table, rows in changes.items():
+                if table == "meta":
+                    meta.update(rows)
+                    continue
+                for key, record in rows:
+                    if record is None:
+                        upserts[table].pop(key, None)
+                        deletes[table].add(key)
+                    else:
+                        deletes[table].discard(key)
+                        upserts[table][key] = record
+
+        with self.lock:
+            with self.conn:
+                for table in TABLES:
+                    if deletes[table]:
+                        self.conn.executemany(DELETE_SQL[table],
+                                              [(k,) for k in deletes[table]])
+                    if upserts[table]:
+                        self.conn.executemany(UPSERT_SQL[table],
+                                              [(k, json.dumps(r)) for k, r in upserts[table].items()])
+                if seq is not None:
+                    meta["seq"] = seq
+                if meta:
+                    self.conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                          list(meta.items()))
+
+    def checkpoint(self):
+        """Fold the WAL into the main database file and fsync it"""
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
@@ -0,0 +1,277 @@
+import argparse
+import csv
+import gc
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from Scripts.cafe_auth import hash_password, is_hashed
+from Scripts.cafe_errors import AlreadyExists, CafeError, InvalidInput, error_name
+from Scripts.cafe_model import ChangeHub, normalize_phone
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Columns, in file order. "password" holds the stored scrypt hash on export;
+# on import a hash is kept as is and anything else is taken as a plain
+# password, checked like a sign-up and hashed.
+FIELDS = {
+    "users": ("username", "password", "phone", "time", "points", "streak", "last_login", "status"),
+    "admins": ("admin_id", "password", "name", "status"),
+}
+STATUSES = ("Approved", "Pending")
+BATCH_SIZE = 5000  # Rows per journaled change, and so per store transaction
+HASH_WORKERS = 4
+
+
+def file_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    raise InvalidInput(f"Unknown file type '{ext}', use .csv or .jsonl")
+
+
+def export_rows(service, table):
+    """Rows of ``table`` as dicts keyed by FIELDS[table], generated lazily"""
+    if table == "users":
+        for username, info in service.users.items():
+            yield {"username": username, **{f: info.get(f) for f in FIELDS["users"][1:]}}
+    else:
+        for source in (service.admins, service.pending_admins):
+            for admin_id, info in source.items():
+                yield {"admin_id": admin_id, "password": info["password"], "name": info.get("name", ""),
+                       "status": info.get("status", "Approved")}
+
+
+def export_table(service, table, path):
+    """Write ``table`` ("users" or "admins") to a .csv or .jsonl file; returns the row count"""
+    fmt = file_format(path)
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(FIELDS[table])
+            for row in export_rows(service, table):
+                writer.writerow(["" if v is None else v for v in row.values()])
+                count += 1
+        else:
+            for row in export_rows(service, table):
+                f.write(json.dumps(row) + "\n")
+                count += 1
+    return count
+
+
+def read_rows(path):
+    """Yield (line number, row dict or None if unreadable) from a .csv or .jsonl file"""
+    with open(path, encoding="utf-8", newline="") as f:
+        if file_format(path) == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield line_num, row if isinstance(row, dict) else None
+
+
+def text(row, field):
+    value = row.get(field)
+    if value.__class__ is str:
+        return value.strip()
+    return "" if value is None else str(value).strip()
+
+
+def whole_number(row, field):
+    value = text(row, field) or "0"
+    if not value.isdigit():
+        raise InvalidInput(f"{field.capitalize()} must be a whole number, got '{value}'!")
+    return int(value)
+
+
+def day_of(row, field):
+    """A "2026-10-18" date field, as the streak rollover compares it; None if empty"""
+    value = text(row, field)
+    if not value:
+        return None
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        day = None
+    if day is None or day.isoformat() != value:
+        raise InvalidInput(f"{field.capitalize()} must be a date like 2026-10-18, got '{value}'!")
+    if day > date.today():
+        raise InvalidInput(f"{field.capitalize()} can't be in the future, got '{value}'!")
+    return value
+
+
+def status_of(row, default):
+    status = text(row, "status") or default
+    if status not in STATUSES:
+        raise InvalidInput(f"Unknown status '{status}'!")
+    return status
+
+
+class Importer:
+    """Validates rows one at a time and adds them to the service in batches.
+
+    Rows are checked with the same CafeChecks rules a sign-up or admin
+    request goes through, plus against the rest of the batch not yet
+    added. Plain passwords are hashed on a thread pool per batch; rows
+    that already carry a hash (an export from another cafe) skip that,
+    which is what makes a large move fast. Memory stays bounded by the
+    batch size however long the file is.
+    """
+
+    def __init__(self, service, table, batch_size=BATCH_SIZE, hash_workers=HASH_WORKERS):
+        if table not in FIELDS:
+            raise InvalidInput(f"Can only import {' or '.join(FIELDS)}")
+        self.service = service
+        self.table = table
+        self.batch_size = batch_size
+        self.hasher = ThreadPoolExecutor(max_workers=hash_workers, thread_name_prefix="CafeImportHash")
+        self.batch = []
+        self.keys = set()    # Keys in the current batch
+        self.phones = set()  # Normalized phones in the current batch
+        self.imported = 0
+
+    def check_user(self, row):
+        username, password, phone = text(row, "username"), text(row, "password"), text(row, "phone")
+        self.service.check_signup(username, password, phone)
+        if username in self.keys:
+            raise AlreadyExists("Username already exists!")
+        phone_key = normalize_phone(phone)
+        if phone_key in self.phones:
+            raise AlreadyExists("Phone number is already registered!")
+        record = {
+            "password": password,
+            "phone": phone,
+            "time": whole_number(row, "time"),
+            "points": whole_number(row, "points"),
+            "streak": whole_number(row, "streak"),
+            "last_login": day_of(row, "last_login"),
+            "status": status_of(row, "Pending"),
+            "slot": None  # PC sessions don't move between cafes
+        }
+        self.phones.add(phone_key)
+        return username, record
+
+    def check_admin(self, row):
+        admin_id, password, name = text(row, "admin_id"), text(row, "password"), text(row, "name")
+        self.service.check_admin_request(admin_id, password, name)
+        if admin_id in self.keys:
+            raise AlreadyExists("Admin ID already exists!")
+        return admin_id, {"password": password, "name": name, "status": status_of(row, "Pending")}
+
+    def add(self, row):
+        """Queue one row; raises the CafeError explaining why it was refused"""
+        if row is None:
+            raise InvalidInput("Not a valid row!")
+        key, record = self.check_user(row) if self.table == "users" else self.check_admin(row)
+        self.keys.add(key)
+        self.batch.append((key, record))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Hash plain passwords and hand the batch to the service"""
+        plain = [record for _, record in self.batch if not is_hashed(record["password"])]
+        for record, hashed in zip(plain, self.hasher.map(hash_password, [r["password"] for r in plain])):
+            record["password"] = hashed
+        if self.batch:
+            add = self.service.add_users if self.table == "users" else self.service.add_admins
+            add(self.batch)
+            self.imported += len(self.batch)
+        self.batch = []
+        self.keys = set()
+        self.phones = set()
+
+    def close(self):
+        """Stop the hashing threads; flush() first to keep the last batch"""
+        self.hasher.shutdown()
+
+
+def import_table(service, table, path, report_path=None, batch_size=BATCH_SIZE):
+    """Import a .csv or .jsonl file of members ("users") or admins ("admins").
+
+    Bad rows are skipped, not fatal; each one is written to ``report_path``
+    (a CSV of line, key, error type and message) if given. Returns
+    {"read", "imported", "rejected", "seconds"}.
+    """
+    started = time.perf_counter()
+    importer = Importer(service, table, batch_size)
+    key_field = FIELDS[table][0]
+    read = rejected = 0
+    report = None
+    # Every imported record is a new container object; left on, the cyclic
+    # collector would rescan the whole growing table again and again
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        for line_num, row in read_rows(path):
+            read += 1
+            try:
+                importer.add(row)
+            except CafeError as e:
+                rejected += 1
+                if report_path:
+                    if report is None:
+                        report_file = open(report_path, "w", encoding="utf-8", newline="")
+                        report = csv.writer(report_file)
+                        report.writerow(("line", key_field, "error", "message"))
+                    report.writerow((line_num, text(row or {}, key_field), error_name(e), str(e)))
+        importer.flush()
+    finally:
+        importer.close()
+        if collecting:
+            gc.enable()
+        if report is not None:
+            report_file.close()
+    return {"read": read, "imported": importer.imported, "rejected": rejected,
+            "seconds": round(time.perf_counter() - started, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export or import members and admins as CSV or JSON lines. "
+                    "Stop the kiosk or cafe server using the database first.")
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("table", choices=tuple(FIELDS))
+    parser.add_argument("path", help="A .csv or .jsonl file")
+    parser.add_argument("--db", default=os.path.join(DATA_DIR, "cafe.db"))
+    parser.add_argument("--journal", default=os.path.join(DATA_DIR, "cafe_journal.jsonl"))
+    parser.add_argument("--report", help="Write refused rows and why to this CSV (import only)")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="Rows per transaction")
+    args = parser.parse_args()
+
+    from Scripts.cafe_journal import open_state
+    from Scripts.cafe_service import CafeService
+
+    store, journal, tables = open_state(args.db, args.journal, ChangeHub(None))
+    service = CafeService(tables, journal, store)
+    try:
+        if args.action == "export":
+            count = export_table(service, args.table, args.path)
+            print(f"Exported {count:,} {args.table} to {args.path}")
+        else:
+            result = import_table(service, args.table, args.path, args.report, args.batch)
+            print(f"Read {result['read']:,} rows in {result['seconds']}s: "
+                  f"{result['imported']:,} imported, {result['rejected']:,} refused")
+            if result["rejected"] and args.report:
+                print(f"Refused rows are listed in {args.report}")
+    except (CafeError, OSError) as e:
+        parser.error(str(e))
+    finally:
+        journal.close(snapshot=True)
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+from Scripts.cafe_metrics import ENABLED as METRICS_ENABLED, METRICS, append_line
+
+STALL_MS = int(os.environ.get("CAFE_STALL_MS", 100))
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Wrappers that sit between Tk and the handler, not worth naming
+WRAPPERS = ("cafe_metrics.py", "cafe_watchdog.py")
+
+
+def running_handler(frame):
+    """(handler, innermost function of ours) for the main thread's ``frame``.
+
+    The handler is the function Tk called back into or, outside any
+    callback (startup), the outermost function of ours below module level.
+    """
+    ours = at = None
+    callback = None
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.startswith(APP_DIR) and "site-packages" not in code.co_filename:
+            if code.co_name != "<module>" and not code.co_filename.endswith(WRAPPERS):
+                ours = getattr(code, "co_qualname", code.co_name)
+                at = at or ours
+        elif code.co_name == "__call__" and "tkinter" in code.co_filename:
+            callback = callback or ours  # Innermost Tk callback wins
+        frame = frame.f_back
+    return callback or ours or "?", at or "?"
+
+
+class StallWatchdog:
+    """Reports each time the Tk thread stops answering for more than ``threshold_ms``.
+
+    The Tk thread stamps a heartbeat from an after() callback every
+    ``interval_ms``; a helper thread notices when the stamp gets stale and
+    grabs the Tk thread's Python stack while it is still stuck. The stall
+    (handler and stack) is logged right away, so a freeze that never ends
+    still leaves its stack behind; when the heartbeat resumes a second
+    line with the same id adds the duration and running totals for that
+    handler. The JSON-lines log rolls over like the metrics log.
+    """
+
+    def __init__(self, root, path, threshold_ms=STALL_MS, interval_ms=50, max_bytes=1_000_000, backups=3):
+        self.root = root
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.stalls = 0
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.main_id = threading.get_ident()
+        self.last_beat = time.perf_counter()
+        self.stall = None  # {"id", "beat", "handler", "at"} while the Tk thread is stuck
+        self.totals = {}   # handler -> [count, total_ms, max_ms]
+        self.stopped = threading.Event()
+        self.after_id = None
+
+    def start(self):
+        self.beat()
+        threading.Thread(target=self.watch, name="CafeStallWatchdog", daemon=True).start()
+        return self
+
+    def beat(self):
+        self.last_beat = time.perf_counter()
+        self.after_id = self.root.after(int(self.interval * 1000), self.beat)
+
+    def watch(self):
+        while not self.stopped.wait(self.threshold / 4):
+            beat = self.last_beat
+            if self.stall is None:
+                if time.perf_counter() - beat - self.interval > self.threshold:
+                    self.capture(beat)
+            elif beat != self.stall["beat"]:
+                self.record(self.stall, beat - self.stall["beat"] - self.interval)
+                self.stall = None
+
+    def capture(self, beat):
+        frame = sys._current_frames().get(self.main_id)
+        if frame is None:
+            return
+        handler, at = running_handler(frame)
+        self.stalls += 1
+        self.stall = {"id": f"{os.getpid()}.{self.stalls}", "beat": beat, "handler": handler, "at": at}
+        self.write({"time": round(time.time(), 3), "id": self.stall["id"], "handler": handler, "at": at,
+                    "stuck_ms": round((time.perf_counter() - beat - self.interval) * 1000, 1),
+                    "stack": [line.rstrip() for line in traceback.format_stack(frame)]})
+
+    def record(self, stall, seconds):
+        ms = round(seconds * 1000, 1)
+        totals = self.totals.setdefault(stall["handler"], [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += ms
+        totals[2] = max(totals[2], ms)
+        if METRICS_ENABLED:
+            METRICS.histogram("ui.stall").observe(int(seconds * 1e9))
+        self.write({"time": round(time.time(), 3), "id": stall["id"], "handler": stall["handler"],
+                    "at": stall["at"], "duration_ms": ms, "count": totals[0], "total_ms": round(totals[1], 1)})
+
+    def write(self, entry):
+        try:
+            append_line(self.path, json.dumps(entry) + "\n", self.max_bytes, self.backups)
+        except OSError as e:
+            print(f"Could not write stall report: {e}")
+
+    def stop(self):
+        self.stopped.set()
+        if self.after_id is not None:
+            try:
+                self.root.after_cancel(self.after_id)
+            except Exception:
+                pass  # The window is already gone
+            self.after_id = None
+
+
+def read_stalls(path, backups=3):
+    """Every stall in a log and its rolled-over files, oldest first.
+
+    Detection and recovery lines are joined by id into one dict; a stall
+    the kiosk never came back from has no "duration_ms", only "stuck_ms".
+    """
+    stalls = {}
+    for name in [f"{path}.{i}" for i in range(backups, 0, -1)] + [path]:
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                # Logs from before stalls had ids hold one whole stall per line
+                stalls.setdefault(entry.get("id", len(stalls)), {}).update(entry)
+    return [s for s in stalls.values() if "handler" in s]
+
+
+def summarize(stalls):
+    """handler -> [count, total_ms, max_ms, unrecovered] over read_stalls()"""
+    totals = {}
+    for stall in stalls:
+        t = totals.setdefault(stall["handler"], [0, 0.0, 0.0, 0])
+        ms = stall.get("duration_ms", stall.get("stuck_ms", 0.0))
+        t[0] += 1
+        t[1] += ms
+        t[2] = max(t[2], ms)
+        t[3] += "duration_ms" not in stall
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a kiosk stall log by handler")
+    parser.add_argument("log", nargs="?", default=os.path.join(APP_DIR, "cafe_stalls.jsonl"))
+    parser.add_argument("--stacks", action="store_true", help="Also print the longest stall's stack")
+    args = parser.parse_args()
+
+    stalls = read_stalls(args.log)
+    if not stalls:
+        print(f"No stalls recorded in {args.log}")
+        return
+    totals = summarize(stalls)
+    print(f"{'handler':40} {'stalls':>7} {'total ms':>10} {'max ms':>9} {'frozen':>7}")
+    for handler, (count, total, longest, frozen) in sorted(totals.items(), key=lambda kv: -kv[1][1]):
+        print(f"{handler:40} {count:>7} {total:>10.1f} {longest:>9.1f} {frozen:>7}")
+    print("(frozen: never recovered, timed up to detection)")
+    if args.stacks:
+        worst = max(stalls, key=lambda e: ("duration_ms" not in e, e.get("duration_ms", 0)))
+        duration = f"{worst['duration_ms']} ms" if "duration_ms" in worst else "never recovered"
+        print(f"\nLongest stall: {worst['handler']} (in {worst['at']}), {duration}")
+        print("\n".join(worst.get("stack", ["(stack rolled out of the log)"])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import tkinter as tk
+
+from Scripts.cafe_config import PC_ZONES
+from Scripts.cafe_metrics import timed
+
+
+class FloorMap(tk.Frame):
+    """Every PC in the hall drawn on one canvas, grouped by zone.
+
+    Stations are two canvas items each (box and number) instead of a
+    widget per PC, so hundreds of seats draw at once. Slot changes arrive
+    through ``controller.slot_hub`` and only recolour the stations that
+    moved. Wheel zooms around the pointer, dragging pans and clicking a
+    free station calls ``on_pick(pc)``.
+    """
+
+    COLUMNS = 12
+    WIDTH = 60
+    HEIGHT = 46
+    GAP = 10
+    HEADER = 34
+
+    COLORS = {"Vacant": "#27ae60", "Occupied": "#95a5a6", "mine": "#3498db"}
+
+    MIN_ZOOM = 0.4
+    MAX_ZOOM = 3.0
+
+    @timed("page.floor_map")
+    def __init__(self, parent, controller, username, on_pick):
+        super().__init__(parent, bg="white")
+        self.controller = controller
+        self.username = username
+        self.on_pick = on_pick
+
+        # Free seats per zone, kept up to date as stations change colour
+        self.counts_frame = tk.Frame(self, bg="white")
+        self.counts_frame.pack(fill="x", padx=10, pady=(0, 5))
+        tk.Button(self.counts_frame, text="−", width=3, relief="flat", bg="#ecf0f1",
+                  command=lambda: self.zoom(1 / 1.25)).pack(side="right")
+        tk.Button(self.counts_frame, text="+", width=3, relief="flat", bg="#ecf0f1",
+                  command=lambda: self.zoom(1.25)).pack(side="right", padx=(0, 5))
+
+        self.canvas = tk.Canvas(self, bg="white", highlightthickness=0)
+        x_scroll = tk.Scrollbar(self, orient="horizontal", command=self.canvas.xview)
+        y_scroll = tk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(xscrollcommand=x_scroll.set, yscrollcommand=y_scroll.set)
+        x_scroll.pack(side="bottom", fill="x")
+        y_scroll.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.scale = 1.0
+        self.items = {}     # pc -> (box, number)
+        self.pc_at = {}     # canvas item -> pc
+        self.shown = {}     # pc -> colour key currently drawn
+        self.zone_of = {}   # pc -> zone name
+        self.free = {}      # zone -> free stations
+        self.count_vars = {}
+        self.draw()
+
+        self.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Button-4>", self.on_wheel)
+        self.canvas.bind("<Button-5>", self.on_wheel)
+
+        self.subscription = controller.slot_hub.subscribe(None, self.on_slot_changed)
+
+    def zones(self):
+        """(zone, pcs) in drawing order; PCs outside every zone go last"""
+        slots = self.controller.get_pc_slots()
+        zoned = set()
+        for zone, pcs in PC_ZONES.items():
+            pcs = [pc for pc in pcs if pc in slots]
+            zoned.update(pcs)
+            yield zone, pcs
+        yield "Other", sorted(pc for pc in slots if pc not in zoned)
+
+    def draw(self):
+        step_x = self.WIDTH + self.GAP
+        step_y = self.HEIGHT + self.GAP
+        y = 0
+        for zone, pcs in self.zones():
+            if not pcs:
+                continue
+            self.canvas.create_text(0, y + self.HEADER / 2, text=zone, anchor="w",
+                                    font=("Arial", 13, "bold"), fill="#2c3e50", tags=("header",))
+            y += self.HEADER
+            for i, pc in enumerate(pcs):
+                x0 = (i % self.COLUMNS) * step_x
+                y0 = y + (i // self.COLUMNS) * step_y
+                box = self.canvas.create_rectangle(x0, y0, x0 + self.WIDTH, y0 + self.HEIGHT,
+                                                   outline="white", tags=("station",))
+                number = self.canvas.create_text(x0 + self.WIDTH / 2, y0 + self.HEIGHT / 2,
+                                                 text=str(pc), fill="white",
+                                                 font=("Arial", 11, "bold"), tags=("number",))
+                self.items[pc] = (box, number)
+                self.pc_at[box] = self.pc_at[number] = pc
+                self.zone_of[pc] = zone
+            y += -(-len(pcs) // self.COLUMNS) * step_y + self.GAP
+
+            self.free[zone] = 0
+            self.count_vars[zone] = tk.StringVar()
+            tk.Label(self.counts_frame, textvariable=self.count_vars[zone], bg="white",
+                     font=("Arial", 10)).pack(side="left", padx=(0, 15))
+            for pc in pcs:
+                self.recolour(pc)
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
+    def colour_key(self, pc):
+        if self.controller.get_user_data(self.username).get("slot") == pc:
+            return "mine"
+        return self.controller.get_pc_slots().get(pc)
+
+    def recolour(self, pc):
+        key = self.colour_key(pc)
+        old = self.shown.get(pc)
+        if key == old:
+            return
+        self.shown[pc] = key
+        self.canvas.itemconfigure(self.items[pc][0], fill=self.COLORS.get(key, "#95a5a6"))
+
+        zone = self.zone_of[pc]
+        self.free[zone] += (key == "Vacant") - (old == "Vacant")
+        self.count_vars[zone].set(f"{zone}: {self.free[zone]} free")
+
+    def on_slot_changed(self, pc, fields):
+        if pc in self.items:
+            self.recolour(pc)
+
+    # Zoom and pan
+
+    def zoom(self, factor, x=None, y=None):
+        scale = min(self.MAX_ZOOM, max(self.MIN_ZOOM, self.scale * factor))
+        if scale == self.scale:
+            return
+        if x is None:
+            x = self.canvas.canvasx(self.canvas.winfo_width() / 2)
+            y = self.canvas.canvasy(self.canvas.winfo_height() / 2)
+        ratio = scale / self.scale
+        self.scale = scale
+        self.canvas.scale("all", x, y, ratio, ratio)
+        self.canvas.itemconfigure("number", font=("Arial", max(6, round(11 * scale)), "bold"))
+        self.canvas.itemconfigure("header", font=("Arial", max(7, round(13 * scale)), "bold"))
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
+    def on_wheel(self, event):
+        factor = 1.1 if event.num == 4 or event.delta > 0 else 1 / 1.1
+        self.zoom(factor, self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+
+    def on_press(self, event):
+        self.press = (event.x, event.y)
+        self.dragged = False
+        self.canvas.scan_mark(event.x, event.y)
+
+    def on_drag(self, event):
+        if abs(event.x - self.press[0]) + abs(event.y - self.press[1]) > 4:
+            self.dragged = True
+        if self.dragged:
+            self.canvas.scan_dragto(event.x, event.y, gain=1)
+
+    def on_release(self, event):
+        if self.dragged:
+            return
+        hit = self.canvas.find_withtag("current")
+        pc = self.pc_at.get(hit[0]) if hit else None
+        if pc is not None and self.shown.get(pc) == "Vacant":
+            self.on_pick(pc)
+
+    def destroy(self):
+        self.controller.slot_hub.unsubscribe(self.subscription)
+        super().destroy()
@@ -0,0 +1,127 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from Scripts.cafe_errors import CafeError
+from Scripts.cafe_metrics import timed
+
+
+class KitchenDisplay(tk.Toplevel):
+    """Kitchen screen: takes waiting orders in batches and sends status back.
+
+    The list holds only orders being prepared or waiting for pickup and is
+    redrawn when the order book reports a change, so updates from other
+    kiosks (or the cafe server) show up without polling.
+    """
+
+    AUTO_MS = 5000
+
+    COLUMNS = (
+        ("id", "Order", 70),
+        ("name", "Item", 140),
+        ("username", "Member", 140),
+        ("status", "Status", 100),
+        ("placed", "Placed", 90),
+    )
+
+    @timed("page.kitchen_display")
+    def __init__(self, controller):
+        super().__init__(controller)
+        self.controller = controller
+        self.title("Kitchen Display")
+        self.geometry("620x480")
+        self.attributes('-topmost', True)
+        self.protocol("WM_DELETE_WINDOW", self.destroy)
+
+        tk.Label(self, text="🍳 Kitchen Orders", font=("Arial", 18, "bold")).pack(pady=(15, 5))
+
+        bar = tk.Frame(self)
+        bar.pack(fill="x", padx=20, pady=5)
+        self.waiting_var = tk.StringVar()
+        tk.Label(bar, textvariable=self.waiting_var, font=("Arial", 12, "bold"),
+                 fg="#e67e22").pack(side="left")
+        self.auto_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(bar, text="Auto-accept", variable=self.auto_var,
+                       command=self.toggle_auto).pack(side="right")
+        tk.Button(bar, text="Take Next Batch", command=self.take_batch,
+                  bg="#3498db", fg="white", font=("Arial", 10, "bold"),
+                  relief="flat", cursor="hand2").pack(side="right", padx=10)
+
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in self.COLUMNS],
+                                 show="headings", selectmode="extended")
+        for column, heading, width in self.COLUMNS:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor="w")
+        self.tree.tag_configure("Ready", foreground="#27ae60")
+        self.tree.pack(fill="both", expand=True, padx=20, pady=10)
+
+        buttons = tk.Frame(self)
+        buttons.pack(pady=(0, 15))
+        tk.Button(buttons, text="✓ Mark Ready", command=self.mark_ready,
+                  bg="#27ae60", fg="white", font=("Arial", 10, "bold"),
+                  width=14, cursor="hand2").pack(side="left", padx=5)
+        tk.Button(buttons, text="🛎️ Delivered", command=self.mark_delivered,
+                  bg="#8e44ad", fg="white", font=("Arial", 10, "bold"),
+                  width=14, cursor="hand2").pack(side="left", padx=5)
+
+        self.auto_id = None
+        self.refresh()
+        self.subscription = controller.hub.subscribe(None, self.on_user_changed)
+
+    def on_user_changed(self, username, fields):
+        if "orders" in fields:
+            self.refresh()
+
+    def refresh(self):
+        orders = self.controller.orders
+        self.waiting_var.set(f"Waiting: {len(orders.waiting)}")
+        selected = set(self.tree.selection())
+        self.tree.delete(*self.tree.get_children())
+        for order in orders.in_kitchen():
+            iid = str(order["id"])
+            placed = time.strftime("%H:%M:%S", time.localtime(order["placed"]))
+            self.tree.insert("", "end", iid=iid, tags=(order["status"],),
+                             values=(f"#{order['id']}", order["name"], order["username"],
+                                     order["status"], placed))
+        keep = [iid for iid in selected if self.tree.exists(iid)]
+        if keep:
+            self.tree.selection_set(keep)
+
+    def selected_ids(self):
+        return [int(iid) for iid in self.tree.selection()]
+
+    def call_service(self, op, *args):
+        """Call a kitchen operation on the service, showing any refusal"""
+        try:
+            return getattr(self.controller.service, op)(*args)
+        except CafeError as e:
+            self.controller.show_error(e, self)
+
+    def take_batch(self):
+        self.call_service("kitchen_take")
+
+    def mark_ready(self):
+        ids = self.selected_ids()
+        if ids:
+            self.call_service("kitchen_ready", ids)
+
+    def mark_delivered(self):
+        ids = self.selected_ids()
+        if ids:
+            self.call_service("kitchen_deliver", ids)
+
+    def toggle_auto(self):
+        if self.auto_var.get():
+            self.auto_take()
+        elif self.auto_id is not None:
+            self.after_cancel(self.auto_id)
+            self.auto_id = None
+
+    def auto_take(self):
+        if self.controller.orders.waiting:
+            self.call_service("kitchen_take")
+        self.auto_id = self.after(self.AUTO_MS, self.auto_take)
+
+    def destroy(self):
+        self.controller.hub.unsubscribe(self.subscription)
+        super().destroy()
@@ -1,7 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from Scripts.cafe_errors import CafeError
+from Scripts.cafe_metrics import timed
+from Scripts.cafe_model import changed, set_if_changed
+
 class AccountPage(tk.Frame):
+    @timed("page.account")
     def __init__(self, parent, controller, username):
         super().__init__(parent)
         self.controller = controller
@@ -15,7 +20,8 @@ class AccountPage(tk.Frame):
         info_frame = tk.Frame(self, bg="#ecf0f1", relief="ridge", bd=2)
         info_frame.pack(pady=20, padx=80, fill="both", expand=True)
         
-        user_data = controller.get_user_data(username)
+        self.phone_var = tk.StringVar()
+        self.status_var = tk.StringVar()
         
         # Username
         tk.Label(info_frame, text="Username", font=("Arial", 12, "bold"), 
@@ -26,16 +32,16 @@ class AccountPage(tk.Frame):
         # Phone
         tk.Label(info_frame, text="Phone Number", font=("Arial", 12, "bold"), 
                 bg="#ecf0f1", fg="#7f8c8d").pack(pady=(20, 5))
-        tk.Label(info_frame, text=user_data['phone'], font=("Arial", 18), 
+        tk.Label(info_frame, textvariable=self.phone_var, font=("Arial", 18), 
                 bg="#ecf0f1", fg="#2c3e50").pack()
         
         # Status
         tk.Label(info_frame, text="Account Status", font=("Arial", 12, "bold"), 
                 bg="#ecf0f1", fg="#7f8c8d").pack(pady=(20, 5))
         
-        status_color = "#27ae60" if user_data['status'] == "Approved" else "#e67e22"
-        tk.Label(info_frame, text=user_data['status'], font=("Arial", 18, "bold"), 
-                bg="#ecf0f1", fg=status_color).pack()
+        self.status_label = tk.Label(info_frame, textvariable=self.status_var, font=("Arial", 18, "bold"), 
+                                     bg="#ecf0f1")
+        self.status_label.pack()
         
         # Member since (placeholder)
         tk.Label(info_frame, text="Member Since", font=("Arial", 12, "bold"), 
@@ -60,6 +66,27 @@ class AccountPage(tk.Frame):
                               bg="#e74c3c", fg="white", font=("Arial", 11, "bold"),
                               width=18, cursor="hand2", relief="flat", pady=8)
         logout_btn.grid(row=0, column=1, padx=10)
+        
+        self.refresh()
+        self.subscription = controller.hub.subscribe(username, self.on_user_changed)
+    
+    def on_user_changed(self, username, fields):
+        self.refresh(fields)
+    
+    def refresh(self, fields=None):
+        user_data = self.controller.get_user_data(self.username)
+        if not user_data:
+            return
+        if changed(fields, "phone"):
+            set_if_changed(self.phone_var, user_data.get('phone', ''))
+        if changed(fields, "status") and self.status_var.get() != user_data['status']:
+            self.status_var.set(user_data['status'])
+            status_color = "#27ae60" if user_data['status'] == "Approved" else "#e67e22"
+            self.status_label.config(fg=status_color)
+    
+    def destroy(self):
+        self.controller.hub.unsubscribe(self.subscription)
+        super().destroy()
     
     def edit_phone(self):
         # Create popup for editing phone
@@ -76,14 +103,13 @@ class AccountPage(tk.Frame):
         
         def save_phone():
             new_phone = phone_entry.get().strip()
-            if not new_phone:
-                messagebox.showerror("Error", "Phone number cannot be empty!")
+            try:
+                self.controller.service.update_phone(self.username, new_phone)
+            except CafeError as e:
+                self.controller.show_error(e, popup)
                 return
-            
-            self.controller.update_phone(self.username, new_phone)
             messagebox.showinfo("Success", "Phone number updated!")
             popup.destroy()
-            self.controller.refresh_page()
         
         tk.Button(popup, text="Save", command=save_phone,
                  bg="#27ae60", fg="white", font=("Arial", 10, "bold"),
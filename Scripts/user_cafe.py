@@ -1,7 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from Scripts.cafe_config import PC_ZONES
+from Scripts.cafe_errors import CafeError
+from Scripts.cafe_metrics import timed
+from Scripts.cafe_model import changed, set_if_changed
+from Scripts.floor_map import FloorMap
+
 class CafePage(tk.Frame):
+    @timed("page.cafe")
     def __init__(self, parent, controller, username):
         super().__init__(parent)
         self.controller = controller
@@ -16,26 +23,17 @@ class CafePage(tk.Frame):
                                  bg="#ecf0f1", relief="ridge", bd=2, fg="#2c3e50")
         pc_frame.pack(pady=10, padx=80, fill="x")
         
-        user_data = controller.get_user_data(username)
+        # One label and one button, switched between "in session" and "no session"
+        self.pc_var = tk.StringVar()
+        self.pc_label = tk.Label(pc_frame, textvariable=self.pc_var, 
+                                 font=("Arial", 12), bg="#ecf0f1")
+        self.pc_label.pack(pady=15)
         
-        if user_data['slot']:
-            tk.Label(pc_frame, text=f"Currently using PC {user_data['slot']}", 
-                    font=("Arial", 12), bg="#ecf0f1", fg="#27ae60").pack(pady=15)
-            
-            end_btn = tk.Button(pc_frame, text="End Session", 
-                               command=self.end_session,
-                               bg="#e74c3c", fg="white", font=("Arial", 11, "bold"),
-                               width=15, cursor="hand2", relief="flat", pady=8)
-            end_btn.pack(pady=(0, 15))
-        else:
-            tk.Label(pc_frame, text="No active PC session", 
-                    font=("Arial", 12), bg="#ecf0f1", fg="#e67e22").pack(pady=15)
-            
-            select_btn = tk.Button(pc_frame, text="Select PC", 
-                                  command=self.select_pc,
-                                  bg="#3498db", fg="white", font=("Arial", 11, "bold"),
-                                  width=15, cursor="hand2", relief="flat", pady=8)
-            select_btn.pack(pady=(0, 15))
+        self.pc_btn = tk.Button(pc_frame, fg="white", font=("Arial", 11, "bold"),
+                                width=15, cursor="hand2", relief="flat", pady=8)
+        self.pc_btn.pack(pady=(0, 15))
+        self.pc_slot = object()  # Forces the first refresh to configure both
+        self.pc_popup = None
         
         # Food menu section
         food_frame = tk.LabelFrame(self, text="🍔 Food & Drinks", font=("Arial", 14, "bold"),
@@ -75,55 +73,120 @@ class CafePage(tk.Frame):
             if col > 1:  # 2 columns
                 col = 0
                 row += 1
+        
+        # Status of this member's open orders, pushed by the kitchen display
+        self.orders_var = tk.StringVar()
+        tk.Label(food_frame, textvariable=self.orders_var, font=("Arial", 11),
+                 bg="#ecf0f1", fg="#8e44ad").pack(pady=(0, 15))
+        
+        self.refresh()
+        self.subscription = controller.hub.subscribe(username, self.on_user_changed)
+    
+    def on_user_changed(self, username, fields):
+        self.refresh(fields)
+    
+    def refresh(self, fields=None):
+        user_data = self.controller.get_user_data(self.username)
+        if not user_data:
+            return
+        if changed(fields, "orders"):
+            self.refresh_orders()
+        if not changed(fields, "slot"):
+            return
+        slot = user_data['slot']
+        if slot == self.pc_slot:
+            return
+        self.pc_slot = slot
+        if slot:
+            set_if_changed(self.pc_var, f"Currently using PC {slot}")
+            self.pc_label.config(fg="#27ae60")
+            self.pc_btn.config(text="End Session", command=self.end_session, bg="#e74c3c")
+        else:
+            set_if_changed(self.pc_var, "No active PC session")
+            self.pc_label.config(fg="#e67e22")
+            self.pc_btn.config(text="Select PC", command=self.select_pc, bg="#3498db")
     
+    def refresh_orders(self):
+        orders = self.controller.orders.for_user(self.username)
+        text = "   ·   ".join(f"#{o['id']} {o['name']}: {o['status']}" for o in orders[-4:])
+        set_if_changed(self.orders_var, f"Your orders — {text}" if text else "")
+    
+    def destroy(self):
+        self.controller.hub.unsubscribe(self.subscription)
+        super().destroy()
+    
+    @timed("ui.select_pc")
     def select_pc(self):
-        # Create PC selection popup
+        # The floor map is built once and kept live; later opens just show it
+        if self.pc_popup is not None:
+            self.pc_popup.deiconify()
+            self.pc_popup.lift()
+            self.pc_popup.grab_set()
+            return
+        
         popup = tk.Toplevel(self)
         popup.title("Select PC")
-        popup.geometry("400x450")
-        popup.resizable(False, False)
+        popup.geometry("820x620")
+        popup.protocol("WM_DELETE_WINDOW", self.hide_pc_popup)
         popup.grab_set()
+        self.pc_popup = popup
         
-        tk.Label(popup, text="Available PCs", font=("Arial", 16, "bold")).pack(pady=20)
+        tk.Label(popup, text="Available PCs", font=("Arial", 16, "bold")).pack(pady=(20, 5))
+        tk.Label(popup, text="Click a green PC to use it · scroll to zoom · drag to move",
+                 font=("Arial", 10), fg="#7f8c8d").pack(pady=(0, 10))
         
-        slots = self.controller.get_pc_slots()
+        # Or let the cafe pick the first free PC
+        any_frame = tk.Frame(popup)
+        any_frame.pack(side="bottom", pady=10)
+        for zone in (None, *PC_ZONES):
+            tk.Button(any_frame, text=f"First free {zone or 'PC'}",
+                      command=lambda z=zone: self.confirm_any_pc(z),
+                      bg="#3498db", fg="white", font=("Arial", 10, "bold"),
+                      cursor="hand2", relief="flat", padx=8).pack(side="left", padx=5)
         
-        # Grid for PC slots
-        grid_frame = tk.Frame(popup)
-        grid_frame.pack(pady=10)
-        
-        for i, (pc, status) in enumerate(slots.items()):
-            row = i // 2
-            col = i % 2
-            
-            is_vacant = status == "Vacant"
-            bg_color = "#27ae60" if is_vacant else "#95a5a6"
-            
-            pc_btn = tk.Button(grid_frame, text=f"PC {pc}\n{status}", 
-                              command=lambda p=pc: self.confirm_pc(p, popup) if is_vacant else None,
-                              bg=bg_color, fg="white", font=("Arial", 12, "bold"),
-                              width=12, height=3, cursor="hand2" if is_vacant else "arrow",
-                              relief="flat", state="normal" if is_vacant else "disabled")
-            pc_btn.grid(row=row, column=col, padx=10, pady=10)
+        FloorMap(popup, self.controller, self.username,
+                 on_pick=self.confirm_pc).pack(fill="both", expand=True, padx=10)
     
-    def confirm_pc(self, pc_num, popup):
-        if self.controller.assign_pc(self.username, pc_num):
-            messagebox.showinfo("Success", f"You are now using PC {pc_num}!")
-            popup.destroy()
-            self.controller.refresh_page()
-        else:
-            messagebox.showerror("Error", "PC is no longer available!")
+    def hide_pc_popup(self):
+        self.pc_popup.grab_release()
+        self.pc_popup.withdraw()
+    
+    def confirm_pc(self, pc_num):
+        try:
+            self.controller.service.assign_pc(self.username, pc_num)
+        except CafeError as e:
+            self.controller.show_error(e, self.pc_popup)
+            return
+        self.hide_pc_popup()
+        messagebox.showinfo("Success", f"You are now using PC {pc_num}!")
+    
+    def confirm_any_pc(self, zone):
+        try:
+            pc_num = self.controller.service.assign_any_pc(self.username, zone)
+        except CafeError as e:
+            self.controller.show_error(e, self.pc_popup)
+            return
+        self.hide_pc_popup()
+        messagebox.showinfo("Success", f"You are now using PC {pc_num}!")
     
     def end_session(self):
         if messagebox.askyesno("End Session", "Are you sure you want to end your session?"):
-            self.controller.end_pc_session(self.username)
+            try:
+                self.controller.service.end_pc_session(self.username)
+            except CafeError as e:
+                self.controller.show_error(e)
+                return
             messagebox.showinfo("Session Ended", "Your PC session has ended.")
-            self.controller.refresh_page()
     
     def order_item(self, item_code):
         item = self.controller.get_food_menu()[item_code]
         if messagebox.askyesno("Confirm Order", 
                                f"Order {item['name']} for ₱{item['price']}?\n+{item['points']} points"):
-            self.controller.place_order(self.username, item_code)
+            try:
+                order_id = self.controller.service.place_order(self.username, item_code)
+            except CafeError as e:
+                self.controller.show_error(e)
+                return
             messagebox.showinfo("Order Placed", 
-                              f"Your {item['name']} has been ordered!\n+{item['points']} points added!")
+                              f"Your {item['name']} has been ordered (order #{order_id})!\n"
+                              f"+{item['points']} points added!")
@@ -1,7 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from Scripts.cafe_config import REDEEM_RULES
+from Scripts.cafe_errors import CafeError
+from Scripts.cafe_metrics import timed
+from Scripts.cafe_model import changed, set_if_changed
+
 class HomePage(tk.Frame):
+    @timed("page.home")
     def __init__(self, parent, controller, username):
         super().__init__(parent)
         self.controller = controller
@@ -20,14 +26,18 @@ class HomePage(tk.Frame):
         stats_frame = tk.Frame(self, bg="#ecf0f1", relief="ridge", bd=2)
         stats_frame.pack(pady=20, padx=50, fill="both", expand=True)
         
-        user_data = controller.get_user_data(username)
+        # Values are bound to variables and only change in refresh()
+        self.time_var = tk.StringVar()
+        self.points_var = tk.StringVar()
+        self.streak_var = tk.StringVar()
+        self.pc_var = tk.StringVar()
         
         # Time remaining
         time_label = tk.Label(stats_frame, text=f"⏱️ Time Remaining", 
                              font=("Arial", 14, "bold"), bg="#ecf0f1")
         time_label.pack(pady=15)
         
-        time_value = tk.Label(stats_frame, text=f"{user_data['time']} minutes", 
+        time_value = tk.Label(stats_frame, textvariable=self.time_var, 
                              font=("Arial", 28, "bold"), fg="#27ae60", bg="#ecf0f1")
         time_value.pack()
         
@@ -36,21 +46,70 @@ class HomePage(tk.Frame):
                                font=("Arial", 14, "bold"), bg="#ecf0f1")
         points_label.pack(pady=(30, 5))
         
-        points_value = tk.Label(stats_frame, text=f"{user_data['points']} pts", 
+        points_value = tk.Label(stats_frame, textvariable=self.points_var, 
                                font=("Arial", 28, "bold"), fg="#3498db", bg="#ecf0f1")
         points_value.pack()
         
+        # Trade points for playtime; buttons are enabled once affordable
+        redeem_frame = tk.Frame(stats_frame, bg="#ecf0f1")
+        redeem_frame.pack(pady=(8, 0))
+        self.redeem_buttons = {}
+        for code, rule in REDEEM_RULES.items():
+            button = tk.Button(redeem_frame, text=f"{rule['points']} pts → {rule['name']}",
+                               command=lambda c=code: self.redeem(c), bg="#3498db", fg="white",
+                               font=("Arial", 9, "bold"), cursor="hand2", relief="flat", padx=6)
+            button.pack(side="left", padx=4)
+            self.redeem_buttons[code] = button
+        
         # Streak
         streak_label = tk.Label(stats_frame, text=f"🔥 Login Streak", 
                                font=("Arial", 14, "bold"), bg="#ecf0f1")
         streak_label.pack(pady=(30, 5))
         
-        streak_value = tk.Label(stats_frame, text=f"{user_data['streak']} days", 
+        streak_value = tk.Label(stats_frame, textvariable=self.streak_var, 
                                font=("Arial", 28, "bold"), fg="#e74c3c", bg="#ecf0f1")
         streak_value.pack(pady=(0, 20))
         
         # PC Status
-        if user_data['slot']:
-            pc_label = tk.Label(stats_frame, text=f"💻 Currently using PC {user_data['slot']}", 
-                               font=("Arial", 12), fg="#16a085", bg="#ecf0f1")
-            pc_label.pack(pady=10)
\ No newline at end of file
+        pc_label = tk.Label(stats_frame, textvariable=self.pc_var, 
+                           font=("Arial", 12), fg="#16a085", bg="#ecf0f1")
+        pc_label.pack(pady=10)
+        
+        self.refresh()
+        self.subscription = controller.hub.subscribe(username, self.on_user_changed)
+    
+    def on_user_changed(self, username, fields):
+        self.refresh(fields)
+    
+    def refresh(self, fields=None):
+        user_data = self.controller.get_user_data(self.username)
+        if not user_data:
+            return
+        if changed(fields, "time"):
+            set_if_changed(self.time_var, f"{user_data['time']} minutes")
+        if changed(fields, "points"):
+            set_if_changed(self.points_var, f"{user_data['points']} pts")
+            for code, button in self.redeem_buttons.items():
+                state = "normal" if user_data["points"] >= REDEEM_RULES[code]["points"] else "disabled"
+                if button["state"] != state:
+                    button.config(state=state)
+        if changed(fields, "streak"):
+            set_if_changed(self.streak_var, f"{user_data['streak']} days")
+        if changed(fields, "slot"):
+            set_if_changed(self.pc_var, f"💻 Currently using PC {user_data['slot']}" if user_data['slot'] else "")
+    
+    def redeem(self, code):
+        rule = REDEEM_RULES[code]
+        if not messagebox.askyesno("Redeem Points",
+                                   f"Trade {rule['points']} points for {rule['name']} of playtime?"):
+            return
+        try:
+            self.controller.service.redeem(self.username, code)
+        except CafeError as e:
+            self.controller.show_error(e)
+            return
+        messagebox.showinfo("Points Redeemed", f"{rule['name']} of playtime added!")
+    
+    def destroy(self):
+        self.controller.hub.unsubscribe(self.subscription)
+        super().destroy()
@@ -1,72 +1,219 @@
+import time
+STARTED = time.perf_counter()  # Before any other import, for --startup-timing
+
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import messagebox
 import sys
 import os
+import logging
+from types import MappingProxyType
+
+# Only what the lock screen needs is imported up front. Storage, hashing,
+# the pages, the admin panel and pywin32 are imported once the screen is
+# locked (see MainApp.finish_startup) or on first use.
+from Scripts.cafe_model import ChangeHub
+from Scripts.cafe_config import FOOD_ITEMS
+from Scripts.cafe_errors import CafeError, NotApproved, attempt
+from Scripts.cafe_metrics import timed
+
+log = logging.getLogger("cafe")
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(DATA_DIR, "cafe.db")
+JOURNAL_PATH = os.path.join(DATA_DIR, "cafe_journal.jsonl")
+METRICS_PATH = os.path.join(DATA_DIR, "cafe_metrics.jsonl")
+STALLS_PATH = os.path.join(DATA_DIR, "cafe_stalls.jsonl")
+
+# "host:port" of a central cafe server; unset runs the kiosk standalone
+CAFE_SERVER = os.environ.get("CAFE_SERVER")
+
+# Time from launch to a painted, locked login screen we aim for
+STARTUP_TARGET_MS = 150
 
-# For PC lock functionality
-try:
-    import ctypes
-    import win32con
-    import win32gui
+# For PC lock functionality; set by load_lock_hooks()
+PC_LOCK_ENABLED = False
+ctypes = win32con = None
+
+
+def load_lock_hooks():
+    """Import pywin32 for the Windows key / Alt+Tab hooks; returns PC_LOCK_ENABLED"""
+    global PC_LOCK_ENABLED, ctypes, win32con
+    if PC_LOCK_ENABLED:
+        return True
+    try:
+        import ctypes as ctypes_module
+        import win32con as win32con_module
+        import win32gui  # noqa: F401  (checks the whole pywin32 install)
+    except ImportError:
+        print("Note: PC Lock features disabled. Install pywin32 for full lock functionality:")
+        print("pip install pywin32")
+        return False
+    ctypes, win32con = ctypes_module, win32con_module
     PC_LOCK_ENABLED = True
-except ImportError:
-    PC_LOCK_ENABLED = False
-    print("PC Lock features require pywin32: pip install pywin32")
+    return True
+
+
+PAGES = None
+
+
+def page_classes():
+    """page id -> page class, imported the first time they are needed"""
+    global PAGES
+    if PAGES is not None:
+        return PAGES
+    try:
+        from Scripts.user_home import HomePage
+        from Scripts.user_account import AccountPage
+        from Scripts.user_cafe import CafePage
+    except ImportError:
+        # Create dummy classes for testing
+        class HomePage:
+            def __init__(self, parent, app, username):
+                self.frame = tk.Frame(parent, bg="white")
+                tk.Label(self.frame, text="Home Page", font=("Arial", 24)).pack(pady=50)
+                self.frame.pack(fill="both", expand=True)
+        
+        class AccountPage:
+            def __init__(self, parent, app, username):
+                self.frame = tk.Frame(parent, bg="white")
+                tk.Label(self.frame, text="Account Page", font=("Arial", 24)).pack(pady=50)
+                self.frame.pack(fill="both", expand=True)
+        
+        class CafePage:
+            def __init__(self, parent, app, username):
+                self.frame = tk.Frame(parent, bg="white")
+                tk.Label(self.frame, text="Cafe Page", font=("Arial", 24)).pack(pady=50)
+                self.frame.pack(fill="both", expand=True)
+    PAGES = {"home": HomePage, "account": AccountPage, "cafe": CafePage}
+    return PAGES
 
-# Import your pages
-try:
-    from Scripts.user_home import HomePage
-    from Scripts.user_account import AccountPage
-    from Scripts.user_cafe import CafePage
-except ImportError:
-    # Create dummy classes for testing
-    class HomePage:
-        def __init__(self, parent, app, username):
-            self.frame = tk.Frame(parent, bg="white")
-            tk.Label(self.frame, text="Home Page", font=("Arial", 24)).pack(pady=50)
-            self.frame.pack(fill="both", expand=True)
-    
-    class AccountPage:
-        def __init__(self, parent, app, username):
-            self.frame = tk.Frame(parent, bg="white")
-            tk.Label(self.frame, text="Account Page", font=("Arial", 24)).pack(pady=50)
-            self.frame.pack(fill="both", expand=True)
-    
-    class CafePage:
-        def __init__(self, parent, app, username):
-            self.frame = tk.Frame(parent, bg="white")
-            tk.Label(self.frame, text="Cafe Page", font=("Arial", 24)).pack(pady=50)
-            self.frame.pack(fill="both", expand=True)
 
 class MainApp(tk.Tk):
     def __init__(self):
+        self.startup_times = {"imports": time.perf_counter() - STARTED}
         super().__init__()
         
-        # Initialize variables first
-        self.users = {}
-        self.admins = {
-            "admin": {"password": "admin123", "status": "Approved"}  # Default admin
-        }
-        self.pending_admins = {}
-        self.food_items = {
-            "C1": {"name": "Coffee", "price": 50, "points": 1},
-            "S1": {"name": "Softdrink", "price": 30, "points": 1},
-            "B1": {"name": "Burger", "price": 80, "points": 2},
-            "F1": {"name": "Fries", "price": 40, "points": 1},
-        }
-        self.slots = {i: "Vacant" for i in range(1, 11)}
+        self.hub = ChangeHub(self)
+        self.slot_hub = ChangeHub(self)  # pc -> {"status"} for the floor map
+        self.remote = None
+        self.service = None
+        self.food_items = FOOD_ITEMS
         
         self.current_user = None
+        self.admin_id = None  # Admin logged in for the admin panel
         self.system_locked = True
-        
-        # Setup window
+        self.admin_panel = None
+        self.kitchen_display = None
+        self.login_pending = False
+        self.metrics = None
+        self.rollover = None
+        self.started = False  # Set by finish_startup; input handled before it is dropped
+        
+        # Lock the screen first; everything slow happens behind it. Painting
+        # also handles input already queued, which the handlers ignore until
+        # started is set.
         self.setup_window()
-        
-        # Bind keys
         self.bind_keys()
-        
-        # Show login
         self.show_login()
+        self.update()
+        self.startup_times["first_paint"] = time.perf_counter() - STARTED
+        
+        # From here on, anything that blocks the Tk thread for long is logged
+        # with its stack, startup loading included
+        from Scripts.cafe_watchdog import StallWatchdog
+        self.watchdog = StallWatchdog(self, STALLS_PATH).start()
+        self.finish_startup()
+    
+    def finish_startup(self):
+        """Load data and the lock hooks while the locked login screen is showing.
+        
+        Runs on the Tk thread before any event is handled, so a Login click
+        made meanwhile waits until the data is there.
+        """
+        from Scripts.cafe_auth import AuthWorker
+        from Scripts.cafe_loyalty import StreakRollover
+        from Scripts.cafe_sessions import SessionClock
+        
+        if load_lock_hooks():
+            self.block_windows_key()
+        self.startup_times["lock_hooks"] = time.perf_counter() - STARTED
+        
+        if CAFE_SERVER:
+            # Thin kiosk: the server owns the data, we keep a pushed mirror
+            import queue
+            from Scripts.cafe_client import CafeClient
+            from Scripts.cafe_model import SlotTable, UserTable
+            from Scripts.cafe_orders import OrderBook
+            from Scripts.cafe_service import RemoteService
+            
+            host, port = CAFE_SERVER.rsplit(":", 1)
+            self.remote_changes = queue.Queue()
+            self.remote_events = queue.Queue()
+            self.remote = CafeClient(host, int(port), on_push=self.remote_changes.put,
+                                     on_event=self.remote_events.put)
+            fetch = self.remote.fetch
+            self.users = UserTable(self.hub, dict(fetch("users")))
+            self.admins = dict(fetch("admins"))
+            self.pending_admins = dict(fetch("pending_admins"))
+            self.slots = SlotTable(self.slot_hub, dict(fetch("slots")))
+            self.orders = OrderBook(self.hub, dict(fetch("orders")))
+            self.service = RemoteService(self.remote, {"users": self.users, "admins": self.admins,
+                                                       "pending_admins": self.pending_admins})
+            self.after(50, self.apply_remote_changes)
+        else:
+            from Scripts.cafe_journal import open_state
+            from Scripts.cafe_service import CafeService
+            
+            # Load the last snapshot and replay the journal tail on top of it
+            self.store, self.journal, tables = open_state(DB_PATH, JOURNAL_PATH, self.hub, self.slot_hub)
+            self.service = CafeService(tables, self.journal, self.store, FOOD_ITEMS)
+            self.users = tables["users"]
+            self.admins = tables["admins"]
+            self.pending_admins = tables["pending_admins"]
+            self.slots = tables["slots"]
+            self.orders = tables["orders"]
+        
+        # Password hashing runs here so the lock screen never freezes
+        self.auth = AuthWorker(self)
+        
+        # Playtime countdown; sessions that were running before a restart resume.
+        # With a cafe server the server runs the clock (its warnings arrive as
+        # events, see apply_remote_changes) and the nightly streak rollover.
+        if not self.remote:
+            self.sessions = SessionClock(self, self.service.charge_minute, self.warn_low_time,
+                                         self.expire_session)
+            self.service.sessions = self.sessions
+            for username, info in self.users.items():
+                if info["slot"]:
+                    self.sessions.start(username, info["time"])
+            self.sessions.run()
+            self.rollover = StreakRollover(self, self.service)
+            self.rollover.run()
+        self.startup_times["data"] = time.perf_counter() - STARTED
+        
+        self.started = True
+        
+        # Pages are only needed after a login; import them when the kiosk is idle
+        self.after(200, page_classes)
+        self.after(250, self.start_metrics)
+    
+    def start_metrics(self):
+        """Export handler timings to METRICS_PATH and http://127.0.0.1:<port>/metrics"""
+        from Scripts.cafe_metrics import DEFAULT_PORT, MetricsExporter
+        self.metrics = MetricsExporter(METRICS_PATH, DEFAULT_PORT).start()
+    
+    def startup_report(self, target_ms=STARTUP_TARGET_MS):
+        """Startup timings as text and whether the locked screen beat ``target_ms``"""
+        ms = {step: seconds * 1000 for step, seconds in self.startup_times.items()}
+        lines = [f"  {label:<26}{ms[step]:>8.1f} ms"
+                 for step, label in (("imports", "imports done"),
+                                     ("first_paint", "locked login screen"),
+                                     ("lock_hooks", "lock hooks installed"),
+                                     ("data", "data loaded"))
+                 if step in ms]
+        ok = ms["first_paint"] <= target_ms
+        lines.append(f"  Target {target_ms} ms to the locked login screen: {'met' if ok else 'MISSED'}")
+        return "\n".join(lines), ok
     
     def setup_window(self):
         """Setup window properties"""
@@ -84,24 +231,23 @@ class MainApp(tk.Tk):
         self.bind_all("<Tab>", self.disable_keys)
         self.bind_all("<Escape>", self.show_escape_dialog)
         
-        # Enable Windows key blocking if available
-        if PC_LOCK_ENABLED:
-            self.block_windows_key()
+        # Windows key blocking is installed by finish_startup once pywin32 loads
     
     def disable_keys(self, event):
         """Disable Alt, Ctrl, Tab keys"""
         return "break"
     
     def show_escape_dialog(self, event=None):
-        """Show password dialog for escaping - ALWAYS works"""
-        self.show_unlock_dialog()
+        """Show password dialog for escaping - ALWAYS works once started"""
+        if self.started:
+            self.show_unlock_dialog()
         return "break"
     
     def show_unlock_dialog(self):
         """Dialog for unlocking system"""
         popup = tk.Toplevel(self)
         popup.title("System Unlock")
-        popup.geometry("350x200")
+        popup.geometry("350x270")
         popup.resizable(False, False)
         popup.attributes('-topmost', True)
         popup.grab_set()
@@ -113,49 +259,64 @@ class MainApp(tk.Tk):
         popup.geometry(f"+{x}+{y}")
         
         tk.Label(popup, text="🔒 System Unlock", font=("Arial", 16, "bold"), fg="#e74c3c").pack(pady=15)
-        tk.Label(popup, text="Admin password required", font=("Arial", 10)).pack(pady=5)
+        tk.Label(popup, text="Admin credentials required", font=("Arial", 10)).pack(pady=5)
         
-        tk.Label(popup, text="Admin Password:", font=("Arial", 11)).pack(pady=(10, 0))
+        tk.Label(popup, text="Admin ID:", font=("Arial", 11)).pack(pady=(5, 0))
+        admin_id_entry = tk.Entry(popup, font=("Arial", 12), width=20)
+        admin_id_entry.pack(pady=5)
+        admin_id_entry.focus()
+        
+        tk.Label(popup, text="Admin Password:", font=("Arial", 11)).pack(pady=(5, 0))
         password_entry = tk.Entry(popup, font=("Arial", 12), width=20, show="*")
-        password_entry.pack(pady=10)
-        password_entry.focus()
+        password_entry.pack(pady=5)
         
         def unlock_system():
+            admin_id = admin_id_entry.get().strip()
             password = password_entry.get().strip()
             
-            # Check admin passwords
-            for admin_info in self.admins.values():
-                if admin_info["password"] == password:
-                    popup.destroy()
-                    self.system_locked = False
-                    
-                    # Ask what to do
-                    choice = messagebox.askyesno("Unlocked", 
-                        "System unlocked!\n\nDo you want to exit the application?", 
-                        parent=self)
-                    
-                    if choice:
-                        if PC_LOCK_ENABLED:
-                            self.enable_windows_key()
-                        self.quit()
-                    else:
-                        # Continue with unlocked system
-                        if PC_LOCK_ENABLED:
-                            self.enable_windows_key()
-                        # Remove topmost attribute to allow minimizing
-                        self.attributes('-topmost', False)
-                        # Restore window decorations for minimizing
-                        self.overrideredirect(False)
-                        self.title("Cafe PC System - Unlocked")
-                        # If user is logged in, show their interface
-                        if self.current_user:
-                            self.show_main_interface()
-                        else:
-                            self.show_login()
-                    return
+            # Look the admin up by ID and verify only that one hash
+            unlock_btn.config(state="disabled")
+            self.call_with_password("verify_admin", admin_id, password, password=password,
+                                    check=lambda: self.service.check_admin_login(admin_id, password),
+                                    verify=("admins", admin_id), parent=popup,
+                                    on_done=lambda status: finish_unlock(admin_id, password),
+                                    on_error=unlock_failed)
+        
+        def unlock_failed():
+            if popup.winfo_exists():
+                unlock_btn.config(state="normal")
+                password_entry.delete(0, tk.END)
+        
+        def finish_unlock(admin_id, password):
+            self.upgrade_password("admins", admin_id, password)
+            if not popup.winfo_exists():
+                return
+            popup.destroy()
+            self.system_locked = False
+            
+            # Ask what to do
+            choice = messagebox.askyesno("Unlocked", 
+                "System unlocked!\n\nDo you want to exit the application?", 
+                parent=self)
             
-            messagebox.showerror("Error", "Incorrect password!", parent=popup)
-            password_entry.delete(0, tk.END)
+            if choice:
+                if PC_LOCK_ENABLED:
+                    self.enable_windows_key()
+                self.quit()
+            else:
+                # Continue with unlocked system
+                if PC_LOCK_ENABLED:
+                    self.enable_windows_key()
+                # Remove topmost attribute to allow minimizing
+                self.attributes('-topmost', False)
+                # Restore window decorations for minimizing
+                self.overrideredirect(False)
+                self.title("Cafe PC System - Unlocked")
+                # If user is logged in, show their interface
+                if self.current_user:
+                    self.show_main_interface()
+                else:
+                    self.show_login()
         
         def cancel():
             popup.destroy()
@@ -163,9 +324,10 @@ class MainApp(tk.Tk):
         btn_frame = tk.Frame(popup)
         btn_frame.pack(pady=20)
         
-        tk.Button(btn_frame, text="Unlock", command=unlock_system,
-                 bg="#27ae60", fg="white", font=("Arial", 10, "bold"),
-                 width=10, cursor="hand2").pack(side="left", padx=10)
+        unlock_btn = tk.Button(btn_frame, text="Unlock", command=unlock_system,
+                               bg="#27ae60", fg="white", font=("Arial", 10, "bold"),
+                               width=10, cursor="hand2")
+        unlock_btn.pack(side="left", padx=10)
         
         tk.Button(btn_frame, text="Cancel", command=cancel,
                  bg="#95a5a6", fg="white", font=("Arial", 10),
@@ -238,38 +400,30 @@ class MainApp(tk.Tk):
                 confirm_password = confirm_password_entry.get().strip()
                 name = name_entry.get().strip()
                 
-                if not admin_id or not password or not name:
-                    messagebox.showerror("Error", "All fields are required!")
-                    return
-                
                 if password != confirm_password:
                     messagebox.showerror("Error", "Passwords do not match!")
                     return
                 
-                if len(password) < 6:
-                    messagebox.showerror("Error", "Password must be at least 6 characters!")
-                    return
-                
-                if admin_id in self.admins or admin_id in self.pending_admins:
-                    messagebox.showerror("Error", "Admin ID already exists!")
-                    return
-                
-                self.pending_admins[admin_id] = {
-                    "password": password,
-                    "name": name,
-                    "status": "Pending"
-                }
-                
-                messagebox.showinfo("Success", "Admin request submitted! Wait for approval.")
-                popup.destroy()
+                self.call_with_password("request_admin", admin_id, password, name, password=password,
+                                        check=lambda: self.service.check_admin_request(admin_id, password, name),
+                                        on_done=lambda result: request_sent(admin_id))
             except Exception as e:
                 messagebox.showerror("Error", f"Request failed: {str(e)}")
         
+        def request_sent(admin_id):
+            if self.admin_panel_open():
+                self.admin_panel.admin_requested(admin_id)
+            messagebox.showinfo("Success", "Admin request submitted! Wait for approval.")
+            if popup.winfo_exists():
+                popup.destroy()
+        
         tk.Button(popup, text="Submit Request", command=request_admin,
                  bg="#3498db", fg="white", font=("Arial", 11, "bold"),
                  width=15, cursor="hand2", relief="flat", pady=8).pack(pady=15)
     
     def show_forgot_password(self):
+        if not self.started:
+            return
         popup = tk.Toplevel(self)
         popup.title("Forgot Password")
         popup.geometry("400x250")
@@ -294,21 +448,13 @@ class MainApp(tk.Tk):
                 username = username_entry.get().strip()
                 phone = phone_entry.get().strip()
                 
-                if not username or not phone:
-                    messagebox.showerror("Error", "All fields are required!")
-                    return
-                
-                if username not in self.users:
-                    messagebox.showerror("Error", "Username not found!")
-                    return
-                
-                if self.users[username]["phone"] != phone:
-                    messagebox.showerror("Error", "Phone number does not match!")
-                    return
+                self.service.check_reset(username, phone)
                 
                 # Show password reset dialog
                 popup.destroy()
-                self.show_new_password_dialog(username)
+                self.show_new_password_dialog(username, phone)
+            except CafeError as e:
+                self.show_error(e, popup)
             except Exception as e:
                 messagebox.showerror("Error", f"Reset failed: {str(e)}")
         
@@ -316,7 +462,7 @@ class MainApp(tk.Tk):
                  bg="#27ae60", fg="white", font=("Arial", 11, "bold"),
                  width=15, cursor="hand2", relief="flat", pady=8).pack(pady=15)
     
-    def show_new_password_dialog(self, username):
+    def show_new_password_dialog(self, username, phone):
         popup = tk.Toplevel(self)
         popup.title("New Password")
         popup.geometry("350x250")
@@ -340,27 +486,26 @@ class MainApp(tk.Tk):
             new_password = new_password_entry.get().strip()
             confirm_password = confirm_password_entry.get().strip()
             
-            if not new_password:
-                messagebox.showerror("Error", "Password cannot be empty!")
-                return
-            
             if new_password != confirm_password:
                 messagebox.showerror("Error", "Passwords do not match!")
                 return
             
-            if len(new_password) < 4:
-                messagebox.showerror("Error", "Password must be at least 4 characters!")
-                return
-            
-            self.users[username]["password"] = new_password
+            self.call_with_password("reset_password", username, phone, new_password, password=new_password,
+                                    check=lambda: self.service.check_new_password(new_password),
+                                    on_done=lambda result: reset_done())
+        
+        def reset_done():
             messagebox.showinfo("Success", "Password reset successfully! You can now login.")
-            popup.destroy()
+            if popup.winfo_exists():
+                popup.destroy()
         
         tk.Button(popup, text="Reset Password", command=save_new_password,
                  bg="#27ae60", fg="white", font=("Arial", 11, "bold"),
                  width=15, cursor="hand2", relief="flat", pady=8).pack(pady=15)
     
     def show_admin_login(self):
+        if not self.started:
+            return
         popup = tk.Toplevel(self)
         popup.title("Admin Login")
         popup.geometry("350x250")
@@ -383,180 +528,87 @@ class MainApp(tk.Tk):
             password = password_entry.get().strip()
             
             # Check against admin database
-            if admin_id in self.admins and self.admins[admin_id]["password"] == password:
-                if self.admins[admin_id]["status"] == "Approved":
-                    popup.destroy()
-                    # When admin logs in, unlock system partially
-                    if self.system_locked:
-                        self.system_locked = False
-                        if PC_LOCK_ENABLED:
-                            self.enable_windows_key()
-                        self.attributes('-topmost', False)
-                        self.title("Cafe PC System - Admin Mode")
-                    self.show_admin_panel()
-                else:
-                    messagebox.showwarning("Pending", "Your admin account is pending approval!")
-            else:
-                messagebox.showerror("Error", "Incorrect admin ID or password!")
+            login_btn.config(state="disabled")
+            self.call_with_password("verify_admin", admin_id, password, password=password,
+                                    check=lambda: self.service.check_admin_login(admin_id, password),
+                                    verify=("admins", admin_id),
+                                    on_done=lambda status: finish_admin_login(admin_id, password),
+                                    on_error=login_failed)
+        
+        def login_failed():
+            if popup.winfo_exists():
+                login_btn.config(state="normal")
+        
+        def finish_admin_login(admin_id, password):
+            self.upgrade_password("admins", admin_id, password)
+            if not popup.winfo_exists():
+                return
+            popup.destroy()
+            self.admin_id = admin_id
+            # When admin logs in, unlock system partially
+            if self.system_locked:
+                self.system_locked = False
+                if PC_LOCK_ENABLED:
+                    self.enable_windows_key()
+                self.attributes('-topmost', False)
+                self.title("Cafe PC System - Admin Mode")
+            self.show_admin_panel()
         
-        tk.Button(popup, text="Login", command=verify_admin,
-                 bg="#e74c3c", fg="white", font=("Arial", 11, "bold"),
-                 width=12, cursor="hand2", relief="flat", pady=8).pack(pady=15)
+        login_btn = tk.Button(popup, text="Login", command=verify_admin,
+                              bg="#e74c3c", fg="white", font=("Arial", 11, "bold"),
+                              width=12, cursor="hand2", relief="flat", pady=8)
+        login_btn.pack(pady=15)
         
         # Add new admin button (not highlighted)
         tk.Button(popup, text="Request New Admin Account", command=self.show_new_admin_request,
                  bg="#ecf0f1", fg="#7f8c8d", font=("Arial", 9),
                  width=25, cursor="hand2", relief="flat", pady=5).pack(pady=5)
     
+    @timed("ui.show_admin_panel")
     def show_admin_panel(self):
-        admin_window = tk.Toplevel(self)
-        admin_window.title("Admin Panel")
-        admin_window.geometry("700x500")
-        admin_window.resizable(False, False)
-        admin_window.attributes('-topmost', True)
-        
-        tk.Label(admin_window, text="Admin Dashboard", font=("Arial", 20, "bold")).pack(pady=20)
-        
-        # Tabs
-        tab_control = ttk.Notebook(admin_window)
-        
-        # Pending user approvals tab
-        pending_tab = tk.Frame(tab_control, bg="white")
-        tab_control.add(pending_tab, text="Pending Users")
-        
-        tk.Label(pending_tab, text="Pending User Accounts", 
-                font=("Arial", 14, "bold"), bg="white").pack(pady=15)
-        
-        pending_frame = tk.Frame(pending_tab, bg="white")
-        pending_frame.pack(pady=10, padx=20, fill="both", expand=True)
-        
-        pending_users = [u for u in self.users if self.users[u]["status"] == "Pending"]
-        
-        if not pending_users:
-            tk.Label(pending_frame, text="No pending user approvals", 
-                    font=("Arial", 12), bg="white", fg="#95a5a6").pack(pady=50)
-        else:
-            for username in pending_users:
-                user_info = self.users[username]
-                user_card = tk.Frame(pending_frame, bg="#ecf0f1", relief="ridge", bd=2)
-                user_card.pack(pady=5, padx=10, fill="x")
-                
-                info_text = f"Username: {username} | Phone: {user_info['phone']}"
-                tk.Label(user_card, text=info_text, font=("Arial", 11), 
-                        bg="#ecf0f1", anchor="w").pack(side="left", padx=15, pady=10)
-                
-                btn_frame = tk.Frame(user_card, bg="#ecf0f1")
-                btn_frame.pack(side="right", padx=10)
-                
-                tk.Button(btn_frame, text="✓ Approve", 
-                         command=lambda u=username: self.approve_user(u, admin_window),
-                         bg="#27ae60", fg="white", font=("Arial", 9, "bold"),
-                         width=10, cursor="hand2").pack(side="left", padx=5)
-                
-                tk.Button(btn_frame, text="✗ Reject", 
-                         command=lambda u=username: self.reject_user(u, admin_window),
-                         bg="#e74c3c", fg="white", font=("Arial", 9, "bold"),
-                         width=10, cursor="hand2").pack(side="left", padx=5)
-        
-        # Pending admin approvals tab
-        pending_admin_tab = tk.Frame(tab_control, bg="white")
-        tab_control.add(pending_admin_tab, text="Pending Admins")
-        
-        tk.Label(pending_admin_tab, text="Pending Admin Requests", 
-                font=("Arial", 14, "bold"), bg="white").pack(pady=15)
-        
-        pending_admin_frame = tk.Frame(pending_admin_tab, bg="white")
-        pending_admin_frame.pack(pady=10, padx=20, fill="both", expand=True)
-        
-        if not self.pending_admins:
-            tk.Label(pending_admin_frame, text="No pending admin requests", 
-                    font=("Arial", 12), bg="white", fg="#95a5a6").pack(pady=50)
-        else:
-            for admin_id, admin_info in self.pending_admins.items():
-                admin_card = tk.Frame(pending_admin_frame, bg="#fff3cd", relief="ridge", bd=2)
-                admin_card.pack(pady=5, padx=10, fill="x")
-                
-                info_text = f"Admin ID: {admin_id} | Name: {admin_info['name']}"
-                tk.Label(admin_card, text=info_text, font=("Arial", 11), 
-                        bg="#fff3cd", anchor="w").pack(side="left", padx=15, pady=10)
-                
-                btn_frame = tk.Frame(admin_card, bg="#fff3cd")
-                btn_frame.pack(side="right", padx=10)
-                
-                tk.Button(btn_frame, text="✓ Approve", 
-                         command=lambda aid=admin_id: self.approve_admin(aid, admin_window),
-                         bg="#27ae60", fg="white", font=("Arial", 9, "bold"),
-                         width=10, cursor="hand2").pack(side="left", padx=5)
-                
-                tk.Button(btn_frame, text="✗ Reject", 
-                         command=lambda aid=admin_id: self.reject_admin(aid, admin_window),
-                         bg="#e74c3c", fg="white", font=("Arial", 9, "bold"),
-                         width=10, cursor="hand2").pack(side="left", padx=5)
-        
-        # All users tab
-        users_tab = tk.Frame(tab_control, bg="white")
-        tab_control.add(users_tab, text="All Users")
-        
-        tk.Label(users_tab, text="All User Accounts", 
-                font=("Arial", 14, "bold"), bg="white").pack(pady=15)
-        
-        users_frame = tk.Frame(users_tab, bg="white")
-        users_frame.pack(pady=10, padx=20, fill="both", expand=True)
-        
-        if not self.users:
-            tk.Label(users_frame, text="No users found", 
-                    font=("Arial", 12), bg="white", fg="#95a5a6").pack(pady=50)
-        else:
-            for username, info in self.users.items():
-                user_card = tk.Frame(users_frame, bg="#ecf0f1", relief="ridge", bd=2)
-                user_card.pack(pady=5, padx=10, fill="x")
-                
-                status_color = "#27ae60" if info['status'] == "Approved" else "#e67e22"
-                info_text = f"{username} | {info['phone']} | Time: {info['time']}m | Points: {info['points']}"
-                
-                tk.Label(user_card, text=info_text, font=("Arial", 10), 
-                        bg="#ecf0f1", anchor="w").pack(side="left", padx=15, pady=10)
-                
-                tk.Label(user_card, text=info['status'], font=("Arial", 10, "bold"),
-                        bg="#ecf0f1", fg=status_color).pack(side="right", padx=15)
-        
-        tab_control.pack(expand=1, fill="both", padx=20, pady=10)
-    
-    def approve_admin(self, admin_id, admin_window):
-        if admin_id in self.pending_admins:
-            admin_info = self.pending_admins[admin_id]
-            self.admins[admin_id] = {
-                "password": admin_info["password"],
-                "name": admin_info["name"],
-                "status": "Approved"
-            }
-            del self.pending_admins[admin_id]
-            messagebox.showinfo("Success", f"Admin '{admin_id}' has been approved!")
-            admin_window.destroy()
-            self.show_admin_panel()
+        # Reuse the open panel so its tab and scroll state survive
+        if self.admin_panel_open():
+            self.admin_panel.lift()
+            return
+        from Scripts.admin_panel import AdminPanel
+        self.admin_panel = AdminPanel(self)
     
-    def reject_admin(self, admin_id, admin_window):
-        if messagebox.askyesno("Confirm", f"Reject admin request '{admin_id}'?"):
-            del self.pending_admins[admin_id]
-            messagebox.showinfo("Rejected", f"Admin request '{admin_id}' has been rejected.")
-            admin_window.destroy()
-            self.show_admin_panel()
+    def approve_users(self, usernames):
+        self.decide_pending("approve_users", usernames, f"Approve {len(usernames):,} user(s)?",
+                            self.admin_panel.users_decided)
     
-    def approve_user(self, username, admin_window):
-        if username in self.users:
-            self.users[username]["status"] = "Approved"
-            self.users[username]["time"] = 100  # Give 100 mins on approval
-            messagebox.showinfo("Success", f"User '{username}' has been approved!")
-            admin_window.destroy()
-            self.show_admin_panel()
+    def reject_users(self, usernames):
+        self.decide_pending("reject_users", usernames,
+                            f"Reject {len(usernames):,} user(s)? This will delete their accounts.",
+                            self.admin_panel.users_decided)
     
-    def reject_user(self, username, admin_window):
-        if messagebox.askyesno("Confirm", f"Reject user '{username}'? This will delete their account."):
-            del self.users[username]
-            messagebox.showinfo("Rejected", f"User '{username}' has been rejected.")
-            admin_window.destroy()
-            self.show_admin_panel()
+    def approve_admins(self, admin_ids):
+        self.decide_pending("approve_admins", admin_ids, f"Approve {len(admin_ids):,} admin request(s)?",
+                            self.admin_panel.admins_decided)
+    
+    def reject_admins(self, admin_ids):
+        self.decide_pending("reject_admins", admin_ids, f"Reject {len(admin_ids):,} admin request(s)?",
+                            self.admin_panel.admins_decided)
+    
+    def decide_pending(self, op, keys, question, on_done):
+        """Approve or reject a batch from the admin panel's queues: one
+        confirmation, one transaction, one refresh of the panel"""
+        if not keys:
+            messagebox.showinfo("Nothing Selected", "Select one or more rows first.", parent=self.admin_panel)
+            return
+        if not messagebox.askyesno("Confirm", question, parent=self.admin_panel):
+            return
+        try:
+            decided = getattr(self.service, op)(keys)
+        except CafeError as e:
+            self.show_error(e, self.admin_panel)
+            return
+        on_done(decided)
     
+    def admin_panel_open(self):
+        return self.admin_panel is not None and self.admin_panel.winfo_exists()
+    
+    @timed("ui.show_login")
     def show_login(self):
         # Clear window
         for widget in self.winfo_children():
@@ -620,7 +672,10 @@ class MainApp(tk.Tk):
         username_entry.bind('<Return>', lambda e: password_entry.focus())
         password_entry.bind('<Return>', lambda e: self.login(username_entry.get(), password_entry.get()))
     
+    @timed("ui.show_signup")
     def show_signup(self):
+        if not self.started:
+            return
         popup = tk.Toplevel(self)
         popup.title("Sign Up")
         popup.geometry("400x400")
@@ -653,66 +708,57 @@ class MainApp(tk.Tk):
                 confirm_password = confirm_password_entry.get().strip()
                 phone = phone_entry.get().strip()
                 
-                print(f"Signup attempt - Username: {username}, Password length: {len(password)}, Phone: {phone}")  # Debug
-                
-                if not username or not password or not phone:
-                    messagebox.showerror("Error", "All fields are required!")
-                    return
-                
                 if password != confirm_password:
                     messagebox.showerror("Error", "Passwords do not match!")
                     return
                 
-                if len(password) < 4:
-                    messagebox.showerror("Error", "Password must be at least 4 characters!")
-                    return
-                
-                if username in self.users:
-                    messagebox.showerror("Error", "Username already exists!")
-                    return
-                
-                self.users[username] = {
-                    "password": password,
-                    "phone": phone,
-                    "time": 0,
-                    "points": 0,
-                    "streak": 0,
-                    "last_login": None,
-                    "status": "Pending",
-                    "slot": None
-                }
-                
-                print(f"User created successfully: {username}")  # Debug
-                messagebox.showinfo("Success", "Account created! Please wait for admin approval.")
-                popup.destroy()
+                submit_btn.config(state="disabled")
+                self.call_with_password("signup", username, password, phone, password=password,
+                                        check=lambda: self.service.check_signup(username, password, phone),
+                                        on_done=lambda result: account_created(username),
+                                        on_error=signup_failed)
             except Exception as e:
-                print(f"Signup error: {e}")  # Debug
+                log.exception("Signup failed")
                 messagebox.showerror("Error", f"Signup failed: {str(e)}")
         
+        def signup_failed():
+            if popup.winfo_exists():
+                submit_btn.config(state="normal")
+        
+        def account_created(username):
+            if self.admin_panel_open():
+                self.admin_panel.user_signed_up(username)
+            messagebox.showinfo("Success", "Account created! Please wait for admin approval.")
+            if popup.winfo_exists():
+                popup.destroy()
+        
         submit_btn = tk.Button(popup, text="Create Account", command=signup,
                               bg="#27ae60", fg="white", font=("Arial", 11, "bold"),
                               width=15, cursor="hand2", relief="flat", pady=8)
         submit_btn.pack(pady=15)
     
+    @timed("ui.login")
     def login(self, username, password):
         username = username.strip()
         password = password.strip()
         
-        if not username or not password:
-            messagebox.showerror("Error", "Username and password cannot be empty!")
-            return
-        
-        if username not in self.users:
-            messagebox.showerror("Error", "Account not found!")
-            return
-        
-        if self.users[username]["password"] != password:
-            messagebox.showerror("Error", "Incorrect password!")
-            return
-        
-        if self.users[username]["status"] != "Approved":
-            messagebox.showwarning("Pending Approval", "Your account is pending admin approval.")
+        if self.login_pending or not self.started:
             return
+        self.login_pending = True
+        self.call_with_password("login", username, password, password=password,
+                                check=lambda: self.service.check_login(username, password),
+                                verify=("users", username),
+                                on_done=lambda record: self.finish_login(username, password),
+                                on_error=self.login_failed)
+    
+    def login_failed(self):
+        self.login_pending = False
+    
+    @timed("ui.finish_login")
+    def finish_login(self, username, password):
+        """Second half of login, run on the Tk thread once the password is checked"""
+        self.login_pending = False
+        self.upgrade_password("users", username, password)
         
         self.current_user = username
         
@@ -729,6 +775,7 @@ class MainApp(tk.Tk):
         
         self.show_main_interface()
     
+    @timed("ui.show_main_interface")
     def show_main_interface(self):
         # Clear window
         for widget in self.winfo_children():
@@ -805,16 +852,20 @@ class MainApp(tk.Tk):
         self.content_frame = tk.Frame(main_container, bg="white")
         self.content_frame.pack(side="right", fill="both", expand=True)
         
+        # Pages are built on first visit and reused for the rest of the session
+        self.pages = {}
+        self.current_page = None
+        
         # Show home page by default
         self.show_page("home")
         
         # Update window state to normal (allows minimizing)
         self.state('normal')
     
+    @timed("ui.show_page")
     def show_page(self, page_id):
-        # Clear content frame
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
+        if page_id == self.current_page:
+            return
         
         # Update button colors (highlight active)
         for btn_id, btn in self.nav_buttons.items():
@@ -823,30 +874,23 @@ class MainApp(tk.Tk):
             else:
                 btn.config(bg="#34495e")  # Dark gray for inactive
         
-        # Show requested page
-        if page_id == "home":
-            page = HomePage(self.content_frame, self, self.current_user)
-        elif page_id == "account":
-            page = AccountPage(self.content_frame, self, self.current_user)
-        elif page_id == "cafe":
-            page = CafePage(self.content_frame, self, self.current_user)
+        # Hide the current page instead of destroying it
+        if self.current_page:
+            self.pages[self.current_page].pack_forget()
         
-        page.pack(fill="both", expand=True)
-    
-    def refresh_page(self):
-        # Find current active page and refresh it
-        current_page = None
-        for btn_id, btn in self.nav_buttons.items():
-            if btn.cget("bg") == "#3498db":
-                current_page = btn_id
-                break
+        page = self.pages.get(page_id)
+        if page is None:
+            page = page_classes()[page_id](self.content_frame, self, self.current_user)
+            self.pages[page_id] = page
         
-        if current_page:
-            self.show_page(current_page)
+        self.current_page = page_id
+        page.pack(fill="both", expand=True)
+
     
     # Data access methods
     def get_user_data(self, username):
-        return self.users.get(username, {})
+        """Read-only view of a member's record; changes go through the service"""
+        return MappingProxyType(self.users.get(username, {}))
     
     def get_food_menu(self):
         return self.food_items
@@ -854,31 +898,186 @@ class MainApp(tk.Tk):
     def get_pc_slots(self):
         return self.slots
     
-    def update_phone(self, username, new_phone):
-        if username in self.users:
-            self.users[username]["phone"] = new_phone
+    def warn_low_time(self, username, minutes):
+        if username == self.current_user:
+            self.show_notice(f"⏱️ Only {minutes} minutes of playtime left!")
     
-    def assign_pc(self, username, pc_num):
-        if self.slots[pc_num] == "Vacant":
-            self.slots[pc_num] = "Occupied"
-            self.users[username]["slot"] = pc_num
-            return True
-        return False
+    def expire_session(self, username):
+        self.service.end_pc_session(username)
+        self.session_expired(username)
     
-    def end_pc_session(self, username):
-        if self.users[username]["slot"]:
-            pc = self.users[username]["slot"]
-            self.slots[pc] = "Vacant"
-            self.users[username]["slot"] = None
+    def session_expired(self, username):
+        """The member's PC session has been ended for running out of time"""
+        if username == self.current_user:
+            self.logout()
+            self.show_notice("Your playtime has run out. Please top up at the counter.")
     
-    def place_order(self, username, item_code):
-        item = self.food_items[item_code]
-        self.users[username]["points"] += item["points"]
+    def show_notice(self, text, duration=5000):
+        """Small always-on-top message that closes itself"""
+        notice = tk.Toplevel(self)
+        notice.overrideredirect(True)
+        notice.attributes('-topmost', True)
+        tk.Label(notice, text=text, font=("Arial", 12, "bold"), bg="#e67e22", fg="white",
+                 padx=20, pady=12).pack()
+        notice.update_idletasks()
+        x = (self.winfo_screenwidth() - notice.winfo_width()) // 2
+        notice.geometry(f"+{x}+40")
+        notice.after(duration, notice.destroy)
     
+    @timed("ui.show_kitchen_display")
+    def show_kitchen_display(self):
+        if self.kitchen_display is not None and self.kitchen_display.winfo_exists():
+            self.kitchen_display.lift()
+            return
+        from Scripts.kitchen_display import KitchenDisplay
+        self.kitchen_display = KitchenDisplay(self)
+    
+    def show_error(self, error, parent=None):
+        """Show why the service refused an operation"""
+        if parent is not None and not parent.winfo_exists():
+            parent = None
+        show = messagebox.showwarning if isinstance(error, NotApproved) else messagebox.showerror
+        show(error.title, str(error), parent=parent)
+    
+    def call_with_password(self, op, *args, password, check=None, verify=None,
+                           on_done=None, on_error=None, parent=None):
+        """Run a service operation whose password work must stay off the Tk thread.
+        
+        ``check`` (the operation's cheap check_* half) runs here first. The
+        worker then hashes ``password``, or with ``verify=(table, key)``
+        checks it against that account, and the operation finishes back here
+        with hashed=/verified=. With a cafe server, which hashes for itself,
+        the whole request runs on the worker instead. ``on_done`` gets the
+        operation's result; a refusal is shown and ``on_error`` called.
+        """
+        from Scripts.cafe_auth import hash_password, verify_password
+        
+        method = getattr(self.service, op)
+        
+        def finish(outcome):
+            ok, result = outcome
+            if ok:
+                if on_done:
+                    on_done(result)
+                return
+            self.show_error(result, parent)
+            if on_error:
+                on_error()
+        
+        def failed(error):
+            # Anything unexpected still ends the request, so the form isn't left waiting
+            if not isinstance(error, CafeError):
+                log.error("%s failed", op, exc_info=error)
+                error = CafeError(f"Something went wrong, please try again.\n({error})")
+            finish((False, error))
+        
+        def complete(**kwargs):
+            try:
+                outcome = attempt(method, *args, **kwargs)
+            except Exception as e:
+                failed(e)
+                return
+            finish(outcome)
+        
+        try:
+            if check:
+                check()
+            stored = self.service.password_hash(*verify) if verify and not self.remote else None
+        except CafeError as e:
+            finish((False, e))
+            return
+        
+        if self.remote:
+            self.auth.submit(attempt, method, *args, callback=finish, errback=failed)
+        elif verify:
+            self.auth.submit(verify_password, password, stored,
+                             callback=lambda ok: complete(verified=ok), errback=failed)
+        else:
+            self.auth.submit(hash_password, password,
+                             callback=lambda hashed: complete(hashed=hashed), errback=failed)
+    
+    def upgrade_password(self, table, key, password):
+        """Re-hash a plaintext or outdated password after a successful check"""
+        if self.remote:
+            return  # The server upgrades hashes itself
+        if self.service.needs_rehash(table, key):
+            from Scripts.cafe_auth import hash_password
+            self.auth.submit(hash_password, password,
+                             callback=lambda hashed: self.service.set_password_hash(table, key, hashed),
+                             errback=lambda e: log.error("Password upgrade failed", exc_info=e))
+    
+    # Cafe server helpers
+    @timed("ui.apply_remote_changes")
+    def apply_remote_changes(self):
+        """Fold change sets pushed by the server into the local mirror, then
+        act on its session events the way the local SessionClock's would be"""
+        import queue
+        from Scripts.cafe_journal import apply_changes
+        
+        tables = {"users": self.users, "admins": self.admins,
+                  "pending_admins": self.pending_admins, "slots": self.slots, "orders": self.orders}
+        panel_open = self.admin_panel_open()
+        try:
+            while True:
+                changes = self.remote_changes.get_nowait()
+                was_pending = {k for k, _ in changes.get("users", ())
+                               if k in self.users and self.users[k]["status"] == "Pending"}
+                had_request = {k for k, _ in changes.get("pending_admins", ()) if k in self.pending_admins}
+                apply_changes(tables, changes)
+                if not panel_open:
+                    continue
+                # Keep the admin panel's queues in step with other kiosks
+                decided = []
+                for username, record in changes.get("users", ()):
+                    pending_now = record is not None and record["status"] == "Pending"
+                    if pending_now and username not in was_pending:
+                        self.admin_panel.user_signed_up(username)
+                    elif username in was_pending and not pending_now:
+                        decided.append(username)
+                self.admin_panel.users_decided(decided)
+                decided = []
+                for admin_id, record in changes.get("pending_admins", ()):
+                    if record is not None and admin_id not in had_request:
+                        self.admin_panel.admin_requested(admin_id)
+                    elif record is None and admin_id in had_request:
+                        decided.append(admin_id)
+                self.admin_panel.admins_decided(decided)
+        except queue.Empty:
+            pass
+        try:
+            while True:
+                event = self.remote_events.get_nowait()
+                if event["kind"] == "low_time":
+                    self.warn_low_time(event["username"], event["minutes"])
+                elif event["kind"] == "expired":
+                    self.session_expired(event["username"])  # The server has freed the PC
+        except queue.Empty:
+            pass
+        self.after(50, self.apply_remote_changes)
+    
+    def shutdown(self):
+        """Flush pending events and close the database"""
+        self.watchdog.stop()
+        self.auth.shutdown()
+        if self.metrics:
+            self.metrics.close()
+        if self.remote:
+            self.remote.close()
+            return
+        self.journal.close()
+        self.store.close()
+    
+    @timed("ui.logout")
     def logout(self):
         # Lock system again when user logs out
         self.system_locked = True
         self.current_user = None
+        self.admin_id = None
+        if self.remote:
+            try:
+                self.service.logout()
+            except CafeError as e:
+                log.warning("Server logout failed: %s", e)  # The server drops the login with the connection
         
         # Re-enable PC lock features
         if PC_LOCK_ENABLED:
@@ -895,16 +1094,30 @@ class MainApp(tk.Tk):
 
 
 if __name__ == "__main__":
-    # Install required packages if not available
-    if not PC_LOCK_ENABLED:
-        print("Note: PC Lock features disabled. Install pywin32 for full lock functionality:")
-        print("pip install pywin32")
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Cafe PC kiosk")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="Print how long startup took, then exit (status 1 if over the target)")
+    parser.add_argument("--target-ms", type=float, default=STARTUP_TARGET_MS,
+                        help=f"Startup target for --startup-timing (default {STARTUP_TARGET_MS})")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     
     app = MainApp()
     
+    if args.startup_timing:
+        report, ok = app.startup_report(args.target_ms)
+        print(report)
+        app.shutdown()
+        app.destroy()
+        sys.exit(0 if ok else 1)
+    
     try:
         app.mainloop()
     except KeyboardInterrupt:
         # Clean up Windows key blocking
         if PC_LOCK_ENABLED:
-            app.enable_windows_key()
\ No newline at end of file
+            app.enable_windows_key()
+    finally:
+        app.shutdown()